@@ -1,15 +1,26 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
+import plotly.graph_objects as go
 import os
 from io import BytesIO
 from dotenv import load_dotenv
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
 from reportlab.lib.styles import getSampleStyleSheet
 from pptx import Presentation
-from modules.charts import analyze
-from modules.log_parser import parse_log_file
-from modules.database import save_log_data, get_data_to_dataframe, get_logs_by_filters, clear_all_logs, get_statistics
+from modules.archives import UPLOAD_TYPES
+from modules.charts import status_donut_chart, top_ip_chart
+from modules.dataset import LogDataset, summarize_dataset
+from modules.ingest import ingest_source
+from modules.log_parser import PARSE_ENGINES
+from modules.metrics import metrics, start_metrics_server
+from modules.notify import set_notifier
+from modules.storage import STORAGE_BACKEND, get_logs_by_filters, clear_all_logs, get_statistics, get_dashboard_aggregates, get_request_rate, get_query_cache_stats, rebuild_rollups, maintain_partitions, get_partitions
+from modules.pagination import LogPager
+from modules.settings import DB_PAGE_SIZE
+from modules.timeseries import downsample
+from modules.ui import ingest_uploaded_file, parse_uploaded_file, streamlit_notifier
 
 load_dotenv()
 
@@ -17,65 +28,164 @@ plt.style.use("ggplot")
 
 st.set_page_config(page_title="Log Analyzer Pro", layout="wide", initial_sidebar_state="expanded")
 
+# Thông báo của parser / database hiển thị trên giao diện thay vì ghi log
+set_notifier(streamlit_notifier)
+
+# Endpoint /metrics cho Prometheus (METRICS_PORT), chỉ mở một lần mỗi process
+try:
+    start_metrics_server()
+except OSError as e:
+    st.sidebar.warning(f"Metrics endpoint unavailable: {e}")
+
 # Session state
 if "df_global" not in st.session_state:
-    st.session_state.df_global = pd.DataFrame()
+    st.session_state.df_global = LogDataset()
 if "data_source" not in st.session_state:
     st.session_state.data_source = "memory"
+if "db_pager" not in st.session_state:
+    st.session_state.db_pager = None
+if "rate_zoom" not in st.session_state:
+    st.session_state.rate_zoom = None
+if "upload" not in st.session_state:
+    # File upload đã xử lý: {'key', 'file', 'saved'}; mỗi file chỉ được parse / nạp một lần qua các lần rerun
+    st.session_state.upload = None
 
-def page_dashboard(df):
+def dashboard_db_summary():
+    """Chỉ số Dashboard tính trong MySQL, với bộ lọc thời gian / log level tùy chọn"""
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        date_range = st.date_input("Time range", value=(), help="Leave empty for all data")
+    with col2:
+        log_level = st.selectbox("Log Level", ["All", "INFO", "WARNING", "ERROR"], key="dashboard_level")
+    with col3:
+        ip_address = st.text_input("IP address", key="dashboard_ip").strip()
+    
+    start_date = str(date_range[0]) if len(date_range) > 0 else None
+    end_date = str(date_range[1]) if len(date_range) > 1 else None
+    return get_dashboard_aggregates(
+        start_date=start_date,
+        end_date=end_date,
+        log_level=None if log_level == "All" else log_level,
+        ip_address=ip_address or None
+    )
+
+def db_request_rate():
+    """
+    Lưu lượng từ database. Khi đang zoom, chỉ khoảng đang xem được truy vấn nên
+    database chọn lại bảng tổng hợp (phút thay vì giờ) cho khoảng đó
+    """
+    zoom = st.session_state.rate_zoom
+    if not zoom:
+        return get_request_rate()
+    start, end = zoom
+    # Epoch của RateIndex tương ứng giờ lưu trong database; đầu khoảng căn về đầu phút
+    # để bucket phút chứa start không bị loại, cuối khoảng là giây cuối (bao gồm)
+    return get_request_rate(
+        pd.Timestamp(start - start % 60, unit="s").strftime("%Y-%m-%d %H:%M:%S"),
+        pd.Timestamp(end - 1, unit="s").strftime("%Y-%m-%d %H:%M:%S"),
+    )
+
+def traffic_chart(rates):
+    """
+    Requests/giây và errors/giây theo thời gian. Chỉ khoảng đang xem được tổng hợp lại
+    từ RateIndex rồi giảm mẫu LTTB, nên thời gian vẽ không phụ thuộc số dòng log.
+    Kéo chọn (box select) một khoảng trên biểu đồ để zoom.
+    """
+    zoom = st.session_state.rate_zoom
+    if rates is None or rates.total == 0:
+        # Khoảng đang zoom không còn dữ liệu (database vừa bị xóa / bảo trì)
+        if zoom and st.button("Reset zoom", key="rate_zoom_reset"):
+            st.session_state.rate_zoom = None
+            st.rerun()
+        return
+    
+    start, end = zoom if zoom else (None, None)
+    
+    with metrics.timer("render.chart.rates"):
+        frame, bucket = rates.series(start, end)
+        requests = downsample(frame, "requests_per_sec")
+        errors = downsample(frame, "errors_per_sec")
+        
+        fig = go.Figure()
+        fig.add_trace(go.Scattergl(x=requests["time"], y=requests["requests_per_sec"],
+                                   name="Requests/s", mode="lines", line=dict(color="#1f77b4")))
+        fig.add_trace(go.Scattergl(x=errors["time"], y=errors["errors_per_sec"],
+                                   name="Errors/s", mode="lines", line=dict(color="#d62728")))
+        fig.update_layout(title=f"Traffic over time ({bucket}s buckets, {len(frame):,} points)",
+                          height=350, margin=dict(l=10, r=10, t=40, b=10),
+                          dragmode="select", hovermode="x unified")
+    
+    event = st.plotly_chart(fig, use_container_width=True, key="rate_chart",
+                            on_select="rerun", selection_mode="box")
+    
+    boxes = event.selection.get("box", []) if event else []
+    if boxes:
+        low, high = sorted(pd.to_datetime(boxes[0]["x"]))
+        selected = (int(low.timestamp()), int(high.timestamp()) + 1)
+        if selected != zoom and selected[1] - selected[0] > 1:
+            st.session_state.rate_zoom = selected
+            st.rerun()
+    
+    if zoom and st.button("Reset zoom", key="rate_zoom_reset"):
+        st.session_state.rate_zoom = None
+        st.rerun()
+
+def page_dashboard(dataset, source="memory"):
     st.title("📊 Dashboard")
     
-    if df.empty:
+    if source == "database":
+        summary = dashboard_db_summary()
+    elif dataset.empty:
         st.info("Upload a log file or load from database to get started")
         return
+    else:
+        summary = summarize_dataset(dataset)
     
-    # 🔧 Đổi tên cột nếu cần
-    if 'ip_address' in df.columns and 'ip' not in df.columns:
-        df = df.rename(columns={'ip_address': 'ip'})
+    if not summary or summary["total_requests"] == 0:
+        st.info("No data for the selected filters")
+        return
     
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("Total Requests", f"{len(df):,}")
+        st.metric("Total Requests", f"{summary['total_requests']:,}")
     
     with col2:
-        error_count = len(df[df["status"] >= 400])
-        error_rate = (error_count / len(df) * 100) if len(df) > 0 else 0
-        st.metric("Error Rate", f"{error_rate:.1f}%")
+        st.metric("Error Rate", f"{summary['error_rate']:.1f}%")
     
     with col3:
-        unique_ips = df["ip"].nunique()
-        st.metric("Unique IPs", f"{unique_ips:,}")
+        if summary["approximate"]:
+            st.metric("Unique IPs", f"≈{summary['unique_ips']:,}",
+                      help=f"HyperLogLog estimate, standard error ±{summary['unique_ips_error']:,}")
+        else:
+            st.metric("Unique IPs", f"{summary['unique_ips']:,}")
     
     st.divider()
     
     col1, col2 = st.columns(2)
     
+    # Ảnh biểu đồ được cache theo fingerprint dữ liệu: rerun không đổi dữ liệu thì không vẽ lại
     with col1:
-        top_ip = df["ip"].value_counts().head(10)
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.barh(top_ip.index[::-1], top_ip.values[::-1], color="#FF6B6B")
-        ax.set_title("Top 10 IPs by Requests", fontweight="bold", fontsize=14)
-        ax.set_xlabel("Number of Requests")
-        ax.grid(axis="x", alpha=0.3)
-        st.pyplot(fig, use_container_width=True)
+        st.image(top_ip_chart(summary["top_ips"], summary["top_ips_error"], summary["approximate"]),
+                 use_container_width=True)
     
     with col2:
-        status_counts = df["status"].value_counts()
-        fig, ax = plt.subplots(figsize=(10, 6))
-        colors = ["#51CF66", "#FFD93D", "#FF6B6B", "#845EC2"]
-        wedges, texts, autotexts = ax.pie(status_counts.values, labels=status_counts.index, 
-                                           autopct='%1.1f%%', colors=colors[:len(status_counts)], textprops={'fontsize': 10})
-        
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-        
-        centre_circle = plt.Circle((0, 0), 0.70, fc='white')
-        ax.add_artist(centre_circle)
-        ax.set_title("HTTP Status Code Distribution", fontweight="bold", fontsize=14)
-        st.pyplot(fig, use_container_width=True)
+        st.image(status_donut_chart(summary["status_counts"]), use_container_width=True)
+    
+    # Lưu lượng theo thời gian: dataset trong bộ nhớ dùng histogram theo giây,
+    # database dùng bảng tổng hợp theo phút / giờ
+    st.subheader("📈 Traffic over time")
+    traffic_chart(db_request_rate() if source == "database" else dataset.rate_index())
+    
+    # Top IP gây lỗi 404
+    top_404 = summary["top_404_ips"]
+    if not top_404.empty:
+        st.subheader("🔍 Top IPs causing 404")
+        table = pd.DataFrame({"IP": top_404.index, "404 errors": top_404.values})
+        if summary["approximate"]:
+            table["404 errors"] = [f"≤ {count:,}" for count in top_404.values]
+            table["Max error"] = summary["top_404_ips_error"].values
+        st.table(table)
     
     st.divider()
     
@@ -95,44 +205,112 @@ def page_dashboard(df):
                     st.metric("Info", f"{stats.get('info_count', 0):,}")
         except:
             st.warning("Could not retrieve database statistics")
-def page_data_logs(df):
+def open_db_pager(filters=None):
+    """Tạo pager mới cho server_logs, đóng pager cũ (nếu có)"""
+    if st.session_state.db_pager is not None:
+        st.session_state.db_pager.close()
+    st.session_state.db_pager = LogPager(filters=filters)
+    return st.session_state.db_pager
+
+def page_data_logs_db():
+    """Data Logs khi nguồn là database: chỉ đọc trang đang xem, trang sau được đọc trước"""
     st.title("📋 Data Logs")
+    pager = st.session_state.db_pager
     
-    if df.empty:
-        st.info("No data loaded")
+    col1, col2, col3 = st.columns([2, 1, 1])
+    
+    with col1:
+        ip_filter = st.text_input("🔍 IP address", placeholder="Exact IP, e.g. 192.168.1.10")
+    
+    with col2:
+        status_filter = st.text_input("Status", placeholder="e.g. 404")
+    
+    with col3:
+        level_filter = st.selectbox("Log Level", ["All", "INFO", "WARNING", "ERROR"])
+    
+    filters = {
+        "ip_address": ip_filter.strip() or None,
+        "status": int(status_filter) if status_filter.strip().isdigit() else None,
+        "log_level": None if level_filter == "All" else level_filter,
+    }
+    if {k: v for k, v in filters.items() if v is not None} != pager.filters:
+        pager = open_db_pager(filters)
+    
+    try:
+        page = pager.current()
+    except Exception as e:
+        st.error(f"Error: {str(e)}")
         return
     
+    st.session_state.df_global = page
+    st.dataframe(page.to_display(), use_container_width=True, height=400)
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("⬅️ Previous", disabled=not pager.has_prev, use_container_width=True):
+            pager.prev()
+            st.rerun()
+    with col2:
+        st.caption(f"Page {pager.index + 1} · {len(page):,} records per page")
+    with col3:
+        if st.button("Next ➡️", disabled=not pager.has_next, use_container_width=True):
+            pager.next()
+            st.rerun()
+    
+    csv = page.to_display().to_csv(index=False)
+    st.download_button(
+        label="📥 Download page CSV",
+        data=csv,
+        file_name=f"logs_page_{pager.index + 1}.csv",
+        mime="text/csv"
+    )
+
+def page_data_logs(dataset):
+    st.title("📋 Data Logs")
+    
+    if dataset.empty:
+        st.info("No data loaded")
+        return
     
-    if 'ip_address' in df.columns and 'ip' not in df.columns:
-        df = df.rename(columns={'ip_address': 'ip'})
+    df = dataset.frame
     
     col1, col2, col3 = st.columns([2, 1, 1])
     
     with col1:
-        flt = st.text_input("🔍 Search", placeholder="Search by IP or status...")
+        flt = st.text_input("🔍 Search", placeholder="IP or CIDR (10.0.0.0/8), status (404, 5xx), date (2025-12-04 10), text...")
     
     with col2:
         status_filter = st.selectbox("Filter Status", ["All"] + sorted(df["status"].unique().astype(str).tolist()))
     
     with col3:
-        level_filter = st.selectbox("Log Level", ["All"] + df["log_level"].unique().tolist() if "log_level" in df.columns else ["All"])
+        level_filter = st.selectbox("Log Level", ["All"] + df["log_level"].unique().tolist())
     
-    df_filtered = df
+    mask = pd.Series(True, index=df.index)
     
     if flt:
-        df_filtered = df_filtered[df_filtered.astype(str).apply(lambda row: row.str.contains(flt, case=False).any(), axis=1)]
+        found = np.zeros(len(df), dtype=bool)
+        found[dataset.search(flt)] = True
+        mask &= found
     
     if status_filter != "All":
-        df_filtered = df_filtered[df_filtered["status"].astype(str) == status_filter]
+        mask &= df["status"] == int(status_filter)
+    
+    if level_filter != "All":
+        mask &= df["log_level"] == level_filter
     
-    if level_filter != "All" and "log_level" in df.columns:
-        df_filtered = df_filtered[df_filtered["log_level"] == level_filter]
+    filtered = dataset.filter(mask)
     
-    st.dataframe(df_filtered, use_container_width=True, height=400)
-    st.caption(f"Showing {len(df_filtered)} of {len(df)} records")
+    # Chỉ chuyển sang dạng hiển thị các dòng của trang đang xem
+    page_count = max(1, -(-len(filtered) // DB_PAGE_SIZE))
+    page_no = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+    start = (page_no - 1) * DB_PAGE_SIZE
+    window = filtered.take(slice(start, start + DB_PAGE_SIZE)).to_display()
+    
+    st.dataframe(window, use_container_width=True, height=400)
+    st.caption(f"Showing {len(window)} of {len(filtered)} filtered records ({len(df)} total) · page {page_no}/{page_count}")
     
     # Export to CSV
-    csv = df_filtered.to_csv(index=False)
+    csv = filtered.to_display().to_csv(index=False)
     st.download_button(
         label="📥 Download CSV",
         data=csv,
@@ -140,19 +318,16 @@ def page_data_logs(df):
         mime="text/csv"
     )
 
-def page_notifications(df):
+def page_notifications(dataset):
     st.title("⚠️ Notifications")
     
-    if df.empty:
+    if dataset.empty:
         st.info("No data loaded")
         return
     
-    # 🔧 Đổi tên cột nếu cần
-    if 'ip_address' in df.columns and 'ip' not in df.columns:
-        df = df.rename(columns={'ip_address': 'ip'})
-    
-    error_logs = df[df["status"] >= 500]
-    warning_logs = df[(df["status"] >= 400) & (df["status"] < 500)]
+    status = dataset.frame["status"]
+    error_logs = dataset.filter(status >= 500).to_display()
+    warning_logs = dataset.filter((status >= 400) & (status < 500)).to_display()
     
     col1, col2 = st.columns(2)
     
@@ -173,6 +348,7 @@ def page_notifications(df):
 def page_database():
     """Page để quản lý Database"""
     st.title("🗄️ Database Management")
+    st.caption(f"Storage backend: {STORAGE_BACKEND} (STORAGE_BACKEND)")
     
     col1, col2, col3, col4 = st.columns(4)
     
@@ -180,11 +356,15 @@ def page_database():
     with col1:
         if st.button("📥 Load from Database", use_container_width=True):
             with st.spinner("Loading data from database..."):
-                df = get_data_to_dataframe()
-                if not df.empty:
-                    st.session_state.df_global = df
+                try:
+                    dataset = open_db_pager().current()
+                except Exception as e:
+                    st.error(f"Error: {str(e)}")
+                    dataset = LogDataset()
+                if not dataset.empty:
+                    st.session_state.df_global = dataset
                     st.session_state.data_source = "database"
-                    st.success(f"✅ Loaded {len(df):,} records from database")
+                    st.success(f"✅ Loaded first {len(dataset):,} records from database (browse in Data Logs)")
                     st.rerun()
                 else:
                     st.warning("Database is empty")
@@ -192,19 +372,15 @@ def page_database():
     # Save to database
     with col2:
         if st.button("💾 Save to Database", use_container_width=True):
-            if st.session_state.df_global.empty:
-                st.warning("No data in memory to save")
+            upload = st.session_state.upload
+            if st.session_state.data_source != "memory" or upload is None:
+                st.warning("No uploaded file in memory to save")
             else:
-                with st.spinner("Saving to database..."):
-                    df = st.session_state.df_global
-                    data_list = [
-                        (row["ip"], row.get("timestamp"), row["status"], 
-                         row.get("log_level", "INFO"), row.get("response", ""))
-                        for _, row in df.iterrows()
-                    ]
-                    if save_log_data(data_list):
-                        st.success(f"✅ Saved {len(df):,} records to database")
-                        st.rerun()
+                # Nạp lại từ file upload (row_hash + manifest): lưu lần hai không tạo bản ghi trùng
+                with st.spinner("Saving to database..."), metrics.timer("save.ingest"):
+                    report, _ = ingest_source(upload['file'], source_name=upload['file'].name)
+                upload['saved'] = not report['failed_batches']
+                show_ingest_report(report, st)
     
     # Clear database
     with col3:
@@ -227,6 +403,36 @@ def page_database():
             except Exception as e:
                 st.error(f"Error: {str(e)}")
     
+    # Rebuild rollup tables (backfill)
+    if st.button("🔄 Rebuild Rollups", help="Recompute minute/hour rollup tables from server_logs"):
+        with st.spinner("Rebuilding rollup tables..."):
+            rebuild_rollups()
+    
+    # Partitions (theo ngày)
+    with st.expander("🧱 Partitions"):
+        if st.button("🛠️ Maintain Partitions", help="Create upcoming daily partitions and drop expired ones (LOG_RETENTION_DAYS)"):
+            with st.spinner("Maintaining partitions..."):
+                deleted = maintain_partitions()
+                if deleted is not None:
+                    st.success(f"✅ Partitions up to date ({deleted:,} expired records dropped)")
+        partitions = get_partitions()
+        if not partitions.empty:
+            st.dataframe(partitions, use_container_width=True, height=250)
+    
+    # Query cache counters (chỉ backend có cache truy vấn)
+    cache_stats = get_query_cache_stats()
+    if cache_stats is not None:
+        with st.expander("⚡ Query Cache"):
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Hits", f"{cache_stats['hits']:,}")
+            with col2:
+                st.metric("Misses", f"{cache_stats['misses']:,}")
+            with col3:
+                st.metric("Hit Rate", f"{cache_stats['hit_rate'] * 100:.1f}%")
+            with col4:
+                st.metric("Entries", f"{cache_stats['entries']:,} ({cache_stats['bytes'] / 1024:,.0f} KB)")
+    
     st.divider()
     
     # Advanced filter
@@ -251,34 +457,105 @@ def page_database():
         )
         
         if not df_filtered.empty:
-            st.session_state.df_global = df_filtered
+            st.session_state.df_global = LogDataset.from_dataframe(df_filtered)
             st.session_state.data_source = "database_filtered"
             st.success(f"✅ Loaded {len(df_filtered):,} filtered records")
             st.rerun()
         else:
             st.info("No records found with these filters")
 
+def show_ingest_report(report, container=st.sidebar):
+    """Kết quả nạp file (ingest_source): số dòng mới, dòng trùng bị bỏ qua, thông lượng parse / insert"""
+    if report is None:
+        return
+    if report['action'] == 'skip':
+        container.info("ℹ️ File already loaded, nothing new to save")
+    elif not report['failed_batches']:
+        container.success(
+            f"✅ Saved {report['rows_inserted']:,} new records "
+            f"({report['duplicates']:,} duplicates skipped)"
+        )
+    else:
+        container.error(f"❌ {len(report['failed_batches'])} batch(es) failed")
+    
+    # Parse và ghi chạy chồng lên nhau: giai đoạn chậm hơn quyết định tổng thời gian
+    stages = report['stages']
+    if stages:
+        container.caption(
+            f"Parse {stages['parse']['rows_per_sec']:,.0f} rows/s · "
+            f"Insert {stages['insert']['rows_per_sec']:,.0f} rows/s · "
+            f"Total {report['rows_per_sec']:,.0f} rows/s"
+        )
+
+def show_diagnostics():
+    """Thời gian từng giai đoạn (upload → parse → save → render, truy vấn database) ở sidebar"""
+    with st.sidebar.expander("🩺 Diagnostics"):
+        if not metrics.enabled:
+            st.caption("Instrumentation is disabled (METRICS_ENABLED=0)")
+            return
+        
+        snapshot = metrics.snapshot()
+        if snapshot["timers"]:
+            st.dataframe(pd.DataFrame([
+                {"Stage": name, "Calls": t["count"], "Total (s)": round(t["total_sec"], 3),
+                 "Avg (ms)": round(t["avg_ms"], 2), "Max (ms)": round(t["max_sec"] * 1000, 2)}
+                for name, t in snapshot["timers"].items()
+            ]), hide_index=True, use_container_width=True)
+        else:
+            st.caption("No measurements yet")
+        for name, value in snapshot["counters"].items():
+            st.caption(f"{name}: {value:,.0f}")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("Prometheus", metrics.to_prometheus(), file_name="metrics.prom",
+                               mime="text/plain", use_container_width=True)
+        with col2:
+            st.download_button("JSON", metrics.to_json(), file_name="metrics.json",
+                               mime="application/json", use_container_width=True)
+        if st.button("Reset", key="reset_metrics", use_container_width=True):
+            metrics.reset()
+            st.rerun()
+
 def main():
     st.sidebar.title("📊 Log Analyzer Pro")
     st.sidebar.markdown("---")
     
     # File uploader
-    uploaded_file = st.sidebar.file_uploader("Upload log file", type=["log", "txt", "csv"])
+    uploaded_file = st.sidebar.file_uploader("Upload log file", type=UPLOAD_TYPES,
+                                             help="Plain logs, compressed (.gz, .bz2, .xz, .zst) or archives (.tar, .tgz, .zip)")
+    
+    parse_engine = st.sidebar.selectbox("Parse engine", PARSE_ENGINES, format_func=str.capitalize)
     
     if uploaded_file:
-        with st.spinner("Processing file..."):
-            data_list, stats = parse_log_file(uploaded_file)
-            if data_list:
-                df = pd.DataFrame(data_list, columns=["ip", "timestamp", "status", "log_level", "response"])
-                st.session_state.df_global = df
+        auto_save = st.sidebar.checkbox("💾 Auto-save to Database", value=False,
+                                        help="Parse once (line engine) and write to the database while parsing")
+        upload_key = (uploaded_file.file_id, parse_engine)
+        upload = st.session_state.upload
+        
+        if upload is None or upload['key'] != upload_key:
+            with st.spinner("Processing file..."), metrics.timer("upload"):
+                if auto_save:
+                    with metrics.timer("save.ingest"):
+                        dataset, stats, report = ingest_uploaded_file(uploaded_file)
+                else:
+                    dataset, stats = parse_uploaded_file(uploaded_file, engine=parse_engine)
+                    report = None
+            upload = {'key': upload_key, 'file': uploaded_file, 'saved': False}
+            st.session_state.upload = upload
+            if report is not None:
+                upload['saved'] = not report['failed_batches']
+                show_ingest_report(report)
+            if not dataset.empty:
+                st.session_state.df_global = dataset
                 st.session_state.data_source = "memory"
-                st.sidebar.success(f"✅ Loaded {len(df):,} records")
-                
-                # Auto-save option
-                if st.sidebar.checkbox("💾 Auto-save to Database", value=False):
-                    with st.spinner("Saving to database..."):
-                        if save_log_data(data_list):
-                            st.sidebar.success("✅ Saved to database")
+                st.sidebar.success(f"✅ Loaded {len(dataset):,} records")
+        elif auto_save and not upload['saved']:
+            # Auto-save bật sau khi file đã parse vào bộ nhớ: chỉ còn bước nạp database
+            with st.spinner("Saving to database..."), metrics.timer("save.ingest"):
+                report, _ = ingest_source(uploaded_file, source_name=uploaded_file.name)
+            upload['saved'] = not report['failed_batches']
+            show_ingest_report(report)
     
     st.sidebar.markdown("---")
     
@@ -293,23 +570,30 @@ def main():
     st.sidebar.markdown("---")
     
     # Page routing
-    if page == "Dashboard":
-        page_dashboard(st.session_state.df_global)
-    elif page == "Data Logs":
-        page_data_logs(st.session_state.df_global)
-    elif page == "Notifications":
-        page_notifications(st.session_state.df_global)
-    elif page == "Database":
-        page_database()
+    with metrics.timer(f"render.{page.lower().replace(' ', '_')}"):
+        if page == "Dashboard":
+            page_dashboard(st.session_state.df_global, source=st.session_state.data_source)
+        elif page == "Data Logs":
+            if st.session_state.data_source == "database" and st.session_state.db_pager is not None:
+                page_data_logs_db()
+            else:
+                page_data_logs(st.session_state.df_global)
+        elif page == "Notifications":
+            page_notifications(st.session_state.df_global)
+        elif page == "Database":
+            page_database()
     
     # 🔧 DATA SOURCE INDICATOR - ĐẶT SAU PAGE ROUTING
     st.sidebar.markdown("---")
     if not st.session_state.df_global.empty:
         st.sidebar.info(
             f"📍 Source: {st.session_state.data_source.upper()}\n"
-            f"Records: {len(st.session_state.df_global):,}"
+            f"Records: {len(st.session_state.df_global):,}\n"
+            f"Memory: {st.session_state.df_global.memory_usage() / 1024 / 1024:,.1f} MB"
         )
     
+    show_diagnostics()
+    
     st.sidebar.caption("Log Analyzer Pro v1.1")
 
 if __name__ == "__main__":
@@ -0,0 +1,339 @@
+"""
+Benchmark toàn bộ pipeline trên log tổng hợp: parse, tạo DataFrame, tổng hợp Dashboard, ghi database
+
+Mỗi benchmark chạy trong một process riêng để đo được peak RSS của riêng nó;
+kết quả (throughput, thời gian, peak RSS) được ghi ra JSON để so sánh giữa các phiên bản.
+
+Chạy từ thư mục gốc của project:
+    python -m benchmarks.bench_pipeline --lines 5000000 --output bench.json
+    python -m benchmarks.bench_pipeline --log bench.log --compare baseline.json
+    python -m benchmarks.bench_pipeline --only parse_line,dashboard_summary --repeat 5
+
+DB insert / query mặc định chạy bằng backend SQLite (modules.sqlite_store, cùng
+cột và index với init.sql) trên file tạm;
+--db mysql ghi vào database cấu hình trong .env bằng bulk_save_batches
+(chỉ dùng với database thử nghiệm, ví dụ container docker); --db parquet ghi
+bằng backend Parquet (modules.parquet_store) vào thư mục tạm.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from queue import Empty
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.generate_logs import add_generator_arguments, config_from_args, write_log
+
+# Định dạng file kết quả; tăng khi đổi cấu trúc JSON
+RESULT_SCHEMA = 1
+
+def _peak_rss_mb(who: int) -> float:
+    """
+    Peak RSS (MB) theo getrusage: Linux trả về KB, macOS trả về byte
+    """
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _load_dataset(path: str):
+    from modules.log_parser import parse_log_dataset
+    dataset, _ = parse_log_dataset(path, engine="vectorized")
+    return dataset
+
+
+# ----------------------------------------------------------------------
+# Các benchmark: nhận đường dẫn log, trả về (số dòng, số giây đo được).
+# Phần chuẩn bị dữ liệu không tính vào thời gian.
+# ----------------------------------------------------------------------
+def bench_parse_log_file(path: str) -> Tuple[int, float]:
+    from modules.log_parser import parse_log_file
+    start = time.perf_counter()
+    records, _ = parse_log_file(path)
+    return len(records), time.perf_counter() - start
+
+
+def _bench_parse_engine(engine: str) -> Callable[[str], Tuple[int, float]]:
+    def bench(path: str) -> Tuple[int, float]:
+        from modules.log_parser import parse_log_dataset
+        start = time.perf_counter()
+        dataset, _ = parse_log_dataset(path, engine=engine)
+        return len(dataset), time.perf_counter() - start
+    return bench
+
+
+def bench_dataframe_build(path: str) -> Tuple[int, float]:
+    from modules.dataset import LogDataset
+    from modules.log_parser import parse_log_stream
+    batches = list(parse_log_stream(path))
+    start = time.perf_counter()
+    dataset = LogDataset.concat(LogDataset.from_records(batch) for batch in batches)
+    return len(dataset), time.perf_counter() - start
+
+
+def bench_dataframe_display(path: str) -> Tuple[int, float]:
+    dataset = _load_dataset(path)
+    start = time.perf_counter()
+    display = dataset.to_display()
+    return len(display), time.perf_counter() - start
+
+
+def bench_dashboard_summary(path: str) -> Tuple[int, float]:
+    from modules.dataset import summarize_dataset
+    dataset = _load_dataset(path)
+    start = time.perf_counter()
+    summarize_dataset(dataset)
+    return len(dataset), time.perf_counter() - start
+
+
+def bench_db_insert_sqlite(path: str) -> Tuple[int, float]:
+    from modules.settings import DB_BATCH_SIZE
+    dataset = _load_dataset(path)
+    with tempfile.TemporaryDirectory() as tmp:
+        # SQLITE_PATH được đọc khi import module (process riêng của benchmark)
+        os.environ['SQLITE_PATH'] = os.path.join(tmp, "bench.db")
+        from modules.sqlite_store import bulk_save_batches
+        start = time.perf_counter()
+        report = bulk_save_batches(dataset.iter_record_batches(DB_BATCH_SIZE))
+        elapsed = time.perf_counter() - start
+    if report['failed_batches']:
+        raise RuntimeError(f"{len(report['failed_batches'])} batch lỗi: {report['failed_batches'][0]['error']}")
+    return report['rows_inserted'], elapsed
+
+
+def bench_db_query_sqlite(path: str) -> Tuple[int, float]:
+    """
+    Các truy vấn đọc của app trên SQLite đã nạp sẵn: Dashboard, thống kê, lưu lượng,
+    lọc theo log_level và trang đầu của Data Logs
+    """
+    from modules.settings import DB_BATCH_SIZE
+    dataset = _load_dataset(path)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['SQLITE_PATH'] = os.path.join(tmp, "bench.db")
+        from modules import sqlite_store
+        sqlite_store.bulk_save_batches(dataset.iter_record_batches(DB_BATCH_SIZE))
+        start = time.perf_counter()
+        sqlite_store.get_dashboard_aggregates()
+        sqlite_store.get_statistics()
+        sqlite_store.get_request_rate()
+        sqlite_store.get_logs_by_filters(log_level='ERROR')
+        sqlite_store.fetch_log_page()
+        elapsed = time.perf_counter() - start
+    return len(dataset), elapsed
+
+
+def bench_db_insert_mysql(path: str) -> Tuple[int, float]:
+    from modules.database import bulk_save_batches
+    from modules.settings import DB_BATCH_SIZE
+    dataset = _load_dataset(path)
+    start = time.perf_counter()
+    report = bulk_save_batches(dataset.iter_record_batches(DB_BATCH_SIZE))
+    elapsed = time.perf_counter() - start
+    if report['failed_batches']:
+        raise RuntimeError(f"{len(report['failed_batches'])} batch lỗi: {report['failed_batches'][0]['error']}")
+    return report['rows_inserted'], elapsed
+
+
+def bench_db_insert_parquet(path: str) -> Tuple[int, float]:
+    from modules.settings import DB_BATCH_SIZE
+    dataset = _load_dataset(path)
+    with tempfile.TemporaryDirectory() as tmp:
+        # PARQUET_DIR được đọc khi import module (process riêng của benchmark)
+        os.environ['PARQUET_DIR'] = tmp
+        from modules.parquet_store import bulk_save_batches
+        start = time.perf_counter()
+        report = bulk_save_batches(dataset.iter_record_batches(DB_BATCH_SIZE))
+        elapsed = time.perf_counter() - start
+    if report['failed_batches']:
+        raise RuntimeError(f"{len(report['failed_batches'])} batch lỗi: {report['failed_batches'][0]['error']}")
+    return report['rows_inserted'], elapsed
+
+
+BENCHMARKS: Dict[str, Callable[[str], Tuple[int, float]]] = {
+    "parse_log_file": bench_parse_log_file,
+    "parse_line": _bench_parse_engine("line"),
+    "parse_vectorized": _bench_parse_engine("vectorized"),
+    "parse_parallel": _bench_parse_engine("parallel"),
+    "dataframe_build": bench_dataframe_build,
+    "dataframe_display": bench_dataframe_display,
+    "dashboard_summary": bench_dashboard_summary,
+    "db_insert_sqlite": bench_db_insert_sqlite,
+    "db_query_sqlite": bench_db_query_sqlite,
+    "db_insert_mysql": bench_db_insert_mysql,
+    "db_insert_parquet": bench_db_insert_parquet,
+}
+
+DEFAULT_BENCHMARKS = [name for name in BENCHMARKS if not name.startswith("db_")]
+
+
+def _child(name: str, path: str, queue):
+    try:
+        rows, seconds = BENCHMARKS[name](path)
+        queue.put({
+            'rows': rows,
+            'seconds': seconds,
+            'peak_rss_mb': _peak_rss_mb(resource.RUSAGE_SELF),
+            'peak_children_rss_mb': _peak_rss_mb(resource.RUSAGE_CHILDREN),
+        })
+    except Exception as e:
+        queue.put({'error': f"{type(e).__name__}: {e}"})
+
+
+def run_isolated(name: str, path: str) -> Dict:
+    """
+    Chạy một benchmark trong process mới (spawn) để peak RSS không lẫn với benchmark khác
+    """
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(name, path, queue))
+    process.start()
+    while True:
+        try:
+            result = queue.get(timeout=1)
+            break
+        except Empty:
+            if not process.is_alive():
+                # Process bị kill (ví dụ hết bộ nhớ) trước khi kịp gửi kết quả
+                result = {'error': f"Process kết thúc với mã {process.exitcode}"}
+                break
+    process.join()
+    return result
+
+
+def run_benchmark(name: str, path: str, repeat: int, log_bytes: int) -> Dict:
+    """
+    Chạy benchmark `repeat` lần; thời gian lấy lần nhanh nhất, peak RSS lấy lần lớn nhất
+    """
+    runs = [run_isolated(name, path) for _ in range(repeat)]
+    errors = [run['error'] for run in runs if 'error' in run]
+    if errors:
+        return {'error': errors[0]}
+
+    seconds = [run['seconds'] for run in runs]
+    best = min(seconds)
+    rows = runs[0]['rows']
+    return {
+        'rows': rows,
+        'seconds': best,
+        'seconds_median': statistics.median(seconds),
+        'runs': seconds,
+        'rows_per_sec': rows / best if best else None,
+        'mb_per_sec': log_bytes / 1e6 / best if best and name.startswith("parse") else None,
+        'peak_rss_mb': max(run['peak_rss_mb'] for run in runs),
+        'peak_children_rss_mb': max(run['peak_children_rss_mb'] for run in runs),
+    }
+
+
+def _git_version() -> str:
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare_results(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    So sánh với kết quả cũ, in bảng chênh lệch
+
+    Returns:
+        List tên benchmark bị chậm đi hoặc tốn bộ nhớ hơn quá tolerance (tỉ lệ, ví dụ 0.1 = 10%)
+    """
+    if current['log']['config'] != baseline['log']['config'] or current['log']['lines'] != baseline['log']['lines']:
+        print("⚠️ Log sinh với tham số khác baseline, kết quả chỉ mang tính tham khảo")
+
+    regressions = []
+    print(f"\n{'Benchmark':<20} {'rows/sec':>14} {'Δ':>8} {'peak RSS MB':>12} {'Δ':>8}")
+    for name, result in current['results'].items():
+        old = baseline['results'].get(name)
+        if not old or 'error' in result or 'error' in old:
+            continue
+        speed = result['rows_per_sec'] / old['rows_per_sec'] - 1
+        memory = result['peak_rss_mb'] / old['peak_rss_mb'] - 1
+        flag = ""
+        if speed < -tolerance or memory > tolerance:
+            regressions.append(name)
+            flag = "  ⚠️ regression"
+        print(f"{name:<20} {result['rows_per_sec']:>14,.0f} {speed:>+8.1%} "
+              f"{result['peak_rss_mb']:>12,.1f} {memory:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--log', help='File log có sẵn (mặc định sinh log tổng hợp vào thư mục tạm)')
+    parser.add_argument('--lines', type=int, default=1_000_000, help='Số dòng log tổng hợp')
+    parser.add_argument('--only', help=f"Danh sách benchmark, cách nhau dấu phẩy ({', '.join(BENCHMARKS)})")
+    parser.add_argument('--db', choices=['sqlite', 'mysql', 'parquet', 'none'], default='sqlite',
+                        help='Database cho benchmark ghi (mysql ghi vào database trong .env)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Ghi kết quả JSON ra file')
+    parser.add_argument('--compare', help='File JSON kết quả cũ để so sánh')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Ngưỡng regression khi so sánh (0.10 = chậm hơn / tốn RAM hơn 10%%)')
+    add_generator_arguments(parser)
+    args = parser.parse_args()
+
+    if args.only:
+        names = args.only.split(",")
+    else:
+        names = DEFAULT_BENCHMARKS + [name for name in BENCHMARKS
+                                      if name.startswith("db_") and name.endswith(f"_{args.db}")]
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Benchmark không tồn tại: {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.log:
+            path = args.log
+            log_info = {'lines': None, 'config': None, 'path': path}
+        else:
+            path = os.path.join(tmp, "bench.log")
+            print(f"Sinh {args.lines:,} dòng log...")
+            log_info = write_log(path, args.lines, config_from_args(args))
+        log_info['bytes'] = os.path.getsize(path)
+
+        results = {}
+        for name in names:
+            print(f"→ {name}...", flush=True)
+            results[name] = run_benchmark(name, path, args.repeat, log_info['bytes'])
+            result = results[name]
+            if 'error' in result:
+                print(f"  lỗi: {result['error']}")
+            else:
+                print(f"  {result['rows_per_sec']:,.0f} rows/sec, {result['seconds']:.2f}s, "
+                      f"peak RSS {result['peak_rss_mb']:,.0f} MB")
+
+    report = {
+        'schema': RESULT_SCHEMA,
+        'version': _git_version(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'repeat': args.repeat,
+        'log': log_info,
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+        print(f"\nĐã ghi kết quả: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as fh:
+            regressions = compare_results(report, json.load(fh), args.tolerance)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
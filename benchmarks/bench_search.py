@@ -0,0 +1,70 @@
+"""
+Benchmark tìm kiếm trên Data Logs: so khớp chuỗi từng cột so với LogSearchIndex
+
+Chạy từ thư mục gốc của project:
+    python -m benchmarks.bench_search --records 3000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.dataset import LogDataset, uint32_to_ipv4
+
+QUERIES = ["10.0.0.0/8", "192.168.1", "404", "5xx", "not found", "2025-12-04 02", "192.168. 5xx"]
+
+
+def generate_dataset(records: int, seed: int = 0) -> LogDataset:
+    """
+    Dataset ngẫu nhiên: một nửa IP lặp lại từ vài địa chỉ phổ biến, timestamp tăng dần trong 3 ngày
+    """
+    rng = np.random.default_rng(seed)
+    common = np.array([0xC0A80105, 0xC0A80A07, 0xC0A86409, 0x0A010203, 0x0AC80001, 0x08080808], dtype=np.uint32)
+    ips = rng.integers(0, 2**32, records, dtype=np.uint64).astype(np.uint32)
+    ips[:records // 2] = rng.choice(common, records // 2)
+    return LogDataset(pd.DataFrame({
+        "ip": ips,
+        "timestamp": np.sort(rng.integers(1764806400, 1764806400 + 3 * 86400, records)),
+        "status": rng.choice(np.array([200, 301, 404, 500, 503], dtype=np.uint16), records),
+        "log_level": pd.Categorical(rng.choice(["INFO", "WARNING", "ERROR"], records)),
+        "response": pd.Categorical(rng.choice(["OK", "Not Found", "Internal Server Error", "Moved"], records)),
+    }))
+
+
+def string_scan(dataset: LogDataset, text: str) -> np.ndarray:
+    """
+    Cách cũ: mở rộng từng cột thành chuỗi rồi tìm chuỗi con
+    """
+    df = dataset.frame
+    mask = pd.Series(uint32_to_ipv4(df["ip"].to_numpy())).str.contains(text, case=False, regex=False)
+    mask |= df["status"].astype(str).str.contains(text, case=False, regex=False)
+    for column in ["log_level", "response"]:
+        mask |= df[column].astype(str).str.contains(text, case=False, regex=False)
+    return np.flatnonzero(mask.to_numpy())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    dataset = generate_dataset(args.records)
+
+    start = time.perf_counter()
+    string_scan(dataset, "404")
+    print(f"Records:              {args.records:,}")
+    print(f"String scan ('404'):  {(time.perf_counter() - start) * 1000:>10,.1f} ms")
+
+    start = time.perf_counter()
+    dataset.search("10.0.0.0/8")
+    print(f"Index build + query:  {(time.perf_counter() - start) * 1000:>10,.1f} ms")
+
+    for query in QUERIES:
+        start = time.perf_counter()
+        rows = dataset.search(query)
+        print(f"{query!r:22}{(time.perf_counter() - start) * 1000:>10,.1f} ms  ({len(rows):,} rows)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark decode timestamp: parse_timestamp (strptime) so với TimestampDecoder
+
+Chạy từ thư mục gốc của project:
+    python -m benchmarks.bench_timestamps --records 1000000 --per-second 20
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from modules.log_parser import parse_timestamp
+from modules.timestamps import TimestampDecoder
+
+
+def generate_time_fields(records: int, per_second: int):
+    """
+    Tạo chuỗi thời gian CLF, mỗi giây lặp lại `per_second` lần như access log thật
+    """
+    base_time = datetime(2025, 12, 4, 10, 0, 0)
+    return [
+        (base_time + timedelta(seconds=i // per_second)).strftime('%d/%b/%Y:%H:%M:%S') + ' +0700'
+        for i in range(records)
+    ]
+
+
+def measure(func, values) -> float:
+    """
+    Trả về số bản ghi/giây khi áp dụng func lên toàn bộ values
+    """
+    start = time.perf_counter()
+    for value in values:
+        func(value)
+    elapsed = time.perf_counter() - start
+    return len(values) / elapsed if elapsed else float('inf')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=500_000)
+    parser.add_argument('--per-second', type=int, default=20, help='Số dòng log dùng chung một giây')
+    args = parser.parse_args()
+
+    values = generate_time_fields(args.records, args.per_second)
+
+    baseline = measure(parse_timestamp, values)
+
+    uncached = TimestampDecoder(cache_size=0)
+    fast_path = measure(uncached.decode, values)
+
+    decoder = TimestampDecoder.from_sample(values[:1000])
+    memoized = measure(decoder.decode, values)
+
+    print(f"Records:                    {args.records:,} ({args.per_second} dòng/giây)")
+    print(f"parse_timestamp (strptime): {baseline:>14,.0f} records/sec")
+    print(f"Decoder, fast path:         {fast_path:>14,.0f} records/sec  (x{fast_path / baseline:.1f})")
+    print(f"Decoder, fast path + cache: {memoized:>14,.0f} records/sec  (x{memoized / baseline:.1f})")
+    print(f"Cache: {decoder.cache_info()}")
+
+
+if __name__ == '__main__':
+    main()
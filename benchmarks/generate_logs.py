@@ -0,0 +1,230 @@
+"""
+Sinh access log tổng hợp dung lượng lớn cho benchmark / load test
+
+IP và path phân bố Zipf (một số ít IP / trang chiếm phần lớn request), tỉ lệ lỗi
+4xx/5xx, dòng hỏng và định dạng thời gian lẫn lộn đều cấu hình được. Log được
+sinh theo từng khối và ghi thẳng ra file nên bộ nhớ không phụ thuộc số dòng;
+cùng seed luôn cho ra cùng một file.
+
+Chạy từ thư mục gốc của project:
+    python -m benchmarks.generate_logs bench.log --lines 20000000
+    python -m benchmarks.generate_logs bench.log.gz --lines 1000000 --error-rate 0.1
+"""
+import argparse
+import gzip
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from modules.dataset import uint32_to_ipv4
+from modules.timestamps import TIMESTAMP_FORMATS
+
+# Số dòng sinh mỗi khối (quyết định bộ nhớ dùng khi sinh)
+GENERATOR_CHUNK_LINES = 100_000
+
+METHODS = np.array(["GET", "POST", "PUT", "DELETE", "HEAD"])
+METHOD_WEIGHTS = [0.80, 0.14, 0.03, 0.02, 0.01]
+
+SUCCESS_STATUSES = np.array([200, 304, 301, 302, 201, 204])
+SUCCESS_WEIGHTS = [0.86, 0.06, 0.03, 0.02, 0.02, 0.01]
+CLIENT_ERROR_STATUSES = np.array([404, 403, 401, 400])
+CLIENT_ERROR_WEIGHTS = [0.70, 0.12, 0.10, 0.08]
+SERVER_ERROR_STATUSES = np.array([500, 502, 503, 504])
+SERVER_ERROR_WEIGHTS = [0.55, 0.20, 0.15, 0.10]
+
+_PATH_TEMPLATES = [
+    "/index.html", "/login", "/dashboard", "/api/v1/users/{}", "/api/v1/orders/{}",
+    "/products/{}", "/search?q=item{}", "/static/js/app.{}.js", "/images/{}.png", "/blog/post-{}",
+]
+
+_MALFORMED_KINDS = ["truncated", "bad_ip", "bad_time", "garbage"]
+
+
+@dataclass
+class GeneratorConfig:
+    """
+    Tham số sinh log (được ghi kèm kết quả benchmark để so sánh giữa các lần chạy)
+    """
+    seed: int = 0
+    ip_pool: int = 200_000          # Số IP khác nhau
+    ip_zipf: float = 1.3            # Số mũ Zipf của IP (càng lớn càng tập trung)
+    path_pool: int = 50_000         # Số path khác nhau
+    path_zipf: float = 1.2
+    error_rate: float = 0.05        # Tỉ lệ request 4xx + 5xx
+    server_error_share: float = 0.2 # Phần của 5xx trong số request lỗi
+    malformed_rate: float = 0.001   # Tỉ lệ dòng hỏng (parser phải bỏ qua)
+    mixed_time_rate: float = 0.01   # Tỉ lệ dòng dùng format thời gian khác CLF
+    requests_per_sec: float = 500.0 # Tốc độ request trung bình (khoảng cách thời gian giữa các dòng)
+    start: str = "2025-12-04T00:00:00"
+    zone: str = "+0700"
+
+
+def _zipf_ranks(rng: np.random.Generator, exponent: float, pool: int, size: int) -> np.ndarray:
+    """
+    Chỉ số trong [0, pool) phân bố Zipf: chỉ số 0 phổ biến nhất
+    """
+    return (rng.zipf(exponent, size) - 1) % pool
+
+
+def _build_paths(rng: np.random.Generator, pool: int) -> np.ndarray:
+    templates = rng.choice(len(_PATH_TEMPLATES), pool)
+    return np.array([_PATH_TEMPLATES[t].format(i) for i, t in enumerate(templates)], dtype=object)
+
+
+def _choose(rng: np.random.Generator, values: np.ndarray, weights: List[float], size: int) -> np.ndarray:
+    return values[rng.choice(len(values), size, p=weights)]
+
+
+class LogGenerator:
+    """
+    Sinh từng khối dòng log; trạng thái (thời gian, RNG) được giữ giữa các khối
+    """
+
+    def __init__(self, config: GeneratorConfig):
+        self.config = config
+        self.rng = np.random.default_rng(config.seed)
+        ips = self.rng.integers(0x01000000, 0xDF000000, config.ip_pool, dtype=np.uint32)
+        self.ips = uint32_to_ipv4(ips).astype(object)
+        self.paths = _build_paths(self.rng, config.path_pool)
+        self.clock = datetime.fromisoformat(config.start).timestamp()
+        self.stats = {'lines': 0, 'malformed': 0, 'mixed_time': 0, 'errors': 0}
+
+    def _times(self, size: int) -> np.ndarray:
+        """
+        Chuỗi thời gian '[...]' tăng dần; mỗi cặp (giây, format) chỉ được format một lần
+        """
+        cfg = self.config
+        offsets = np.cumsum(self.rng.exponential(1.0 / cfg.requests_per_sec, size))
+        seconds = (self.clock + offsets).astype(np.int64)
+        self.clock += float(offsets[-1])
+
+        formats = np.zeros(size, dtype=np.int64)
+        mixed = self.rng.random(size) < cfg.mixed_time_rate
+        formats[mixed] = self.rng.integers(1, len(TIMESTAMP_FORMATS), int(mixed.sum()))
+        self.stats['mixed_time'] += int(mixed.sum())
+
+        keys, inverse = np.unique(seconds * len(TIMESTAMP_FORMATS) + formats, return_inverse=True)
+        rendered = np.array([
+            datetime.fromtimestamp(int(key) // len(TIMESTAMP_FORMATS)).strftime(
+                TIMESTAMP_FORMATS[int(key) % len(TIMESTAMP_FORMATS)]) + f" {cfg.zone}"
+            for key in keys
+        ], dtype=object)
+        return rendered[inverse]
+
+    def _statuses(self, size: int) -> np.ndarray:
+        cfg = self.config
+        statuses = _choose(self.rng, SUCCESS_STATUSES, SUCCESS_WEIGHTS, size)
+        roll = self.rng.random(size)
+        server = roll < cfg.error_rate * cfg.server_error_share
+        client = ~server & (roll < cfg.error_rate)
+        statuses[client] = _choose(self.rng, CLIENT_ERROR_STATUSES, CLIENT_ERROR_WEIGHTS, int(client.sum()))
+        statuses[server] = _choose(self.rng, SERVER_ERROR_STATUSES, SERVER_ERROR_WEIGHTS, int(server.sum()))
+        self.stats['errors'] += int(client.sum() + server.sum())
+        return statuses
+
+    def _corrupt(self, lines: List[str]):
+        """
+        Thay một phần dòng bằng dòng hỏng: cắt cụt, IP sai, thời gian sai hoặc rác
+        """
+        positions = np.flatnonzero(self.rng.random(len(lines)) < self.config.malformed_rate)
+        kinds = self.rng.choice(_MALFORMED_KINDS, len(positions))
+        for position, kind in zip(positions.tolist(), kinds.tolist()):
+            line = lines[position]
+            if kind == "truncated":
+                lines[position] = line[:int(self.rng.integers(1, len(line) // 2))]
+            elif kind == "bad_ip":
+                lines[position] = "999." + line.split(".", 1)[1]
+            elif kind == "bad_time":
+                head, rest = line.split("[", 1)
+                lines[position] = f"{head}[not-a-time {self.config.zone}]{rest.split(']', 1)[1]}"
+            else:
+                lines[position] = "\x00?? " + line[::-1]
+        self.stats['malformed'] += len(positions)
+
+    def chunk(self, size: int) -> str:
+        """
+        Sinh `size` dòng log (chuỗi kết thúc bằng newline)
+        """
+        cfg = self.config
+        ips = self.ips[_zipf_ranks(self.rng, cfg.ip_zipf, cfg.ip_pool, size)]
+        paths = self.paths[_zipf_ranks(self.rng, cfg.path_zipf, cfg.path_pool, size)]
+        methods = _choose(self.rng, METHODS, METHOD_WEIGHTS, size)
+        statuses = self._statuses(size)
+        sizes = self.rng.lognormal(8.0, 1.2, size).astype(np.int64).astype(object)
+        sizes[(statuses == 304) | (statuses == 204)] = "-"
+
+        lines = [
+            f'{ip} - - [{time_str}] "{method} {path} HTTP/1.1" {status} {body}'
+            for ip, time_str, method, path, status, body in zip(
+                ips.tolist(), self._times(size).tolist(), methods.tolist(),
+                paths.tolist(), statuses.tolist(), sizes.tolist())
+        ]
+        self._corrupt(lines)
+        self.stats['lines'] += size
+        return "\n".join(lines) + "\n"
+
+    def iter_chunks(self, lines: int, chunk_lines: int = GENERATOR_CHUNK_LINES) -> Iterator[str]:
+        remaining = lines
+        while remaining > 0:
+            size = min(chunk_lines, remaining)
+            remaining -= size
+            yield self.chunk(size)
+
+
+def write_log(path: str, lines: int, config: GeneratorConfig = None) -> Dict:
+    """
+    Ghi `lines` dòng log tổng hợp vào path (nén gzip nếu đuôi .gz)
+
+    Returns:
+        dict: Thống kê sinh log (lines, malformed, mixed_time, errors, bytes, elapsed_sec, config)
+    """
+    config = config or GeneratorConfig()
+    generator = LogGenerator(config)
+    opener = gzip.open if path.endswith(".gz") else open
+
+    start = time.perf_counter()
+    with opener(path, "wt", encoding="utf-8", newline="\n") as fh:
+        for chunk in generator.iter_chunks(lines):
+            fh.write(chunk)
+
+    return {
+        **generator.stats,
+        'bytes': os.path.getsize(path),
+        'elapsed_sec': time.perf_counter() - start,
+        'config': asdict(config),
+    }
+
+
+def add_generator_arguments(parser: argparse.ArgumentParser):
+    """
+    Tham số dòng lệnh cho từng trường của GeneratorConfig (dùng chung với bench_pipeline)
+    """
+    defaults = GeneratorConfig()
+    for field, value in asdict(defaults).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=type(value), default=value)
+
+
+def config_from_args(args: argparse.Namespace) -> GeneratorConfig:
+    return GeneratorConfig(**{field: getattr(args, field) for field in asdict(GeneratorConfig())})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output', help='File log đầu ra (.gz để nén)')
+    parser.add_argument('--lines', type=int, default=1_000_000)
+    add_generator_arguments(parser)
+    args = parser.parse_args()
+
+    report = write_log(args.output, args.lines, config_from_args(args))
+    print(f"Lines:      {report['lines']:,} ({report['malformed']:,} malformed, "
+          f"{report['mixed_time']:,} non-CLF timestamps, {report['errors']:,} errors)")
+    print(f"Size:       {report['bytes'] / 1e6:,.1f} MB")
+    print(f"Throughput: {report['lines'] / report['elapsed_sec']:,.0f} lines/sec")
+
+
+if __name__ == '__main__':
+    main()
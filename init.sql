@@ -5,8 +5,12 @@ COLLATE utf8mb4_unicode_ci;
 
 USE log_db;
 
+-- server_logs được partition theo ngày (RANGE COLUMNS trên timestamp):
+-- xóa dữ liệu cũ bằng DROP PARTITION, truy vấn có lọc thời gian chỉ đọc các partition liên quan.
+-- Mọi khóa unique phải chứa cột partition nên PRIMARY KEY là (id, timestamp)
+-- và uq_row_hash là (row_hash, timestamp) (cùng dòng log luôn có cùng timestamp).
 CREATE TABLE IF NOT EXISTS server_logs (
-    id INT AUTO_INCREMENT PRIMARY KEY,
+    id BIGINT NOT NULL AUTO_INCREMENT,
     
     
     ip_address VARCHAR(45) NOT NULL,  
@@ -24,14 +28,78 @@ CREATE TABLE IF NOT EXISTS server_logs (
 
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
+    -- Hash 16 byte của dòng log gốc, dùng để bỏ qua dòng trùng khi nạp lại file
+    row_hash BINARY(16) NULL,
 
+    PRIMARY KEY (id, timestamp),
+    UNIQUE INDEX uq_row_hash (row_hash, timestamp),
     INDEX idx_timestamp (timestamp),
     INDEX idx_ip_address (ip_address),
     INDEX idx_status (status),
     INDEX idx_log_level (log_level),
     INDEX idx_composite (timestamp, log_level, status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+PARTITION BY RANGE COLUMNS (timestamp) (
+    -- Partition theo ngày được tạo bởi add_log_partitions (cuối file)
+    PARTITION p_old VALUES LESS THAN ('2025-12-01'),
+    PARTITION pmax VALUES LESS THAN (MAXVALUE)
+);
+
+-- Manifest các file đã nạp: mỗi lần nạp ghi lại đoạn byte [range_start, range_end)
+CREATE TABLE IF NOT EXISTS ingest_manifest (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+
+    source_name VARCHAR(255) NOT NULL,
+
+    -- SHA-256 của 64 KB đầu file (định danh file)
+    head_hash BINARY(32) NOT NULL,
+
+    -- SHA-256 của 64 KB cuối đoạn đã nạp (xác nhận file chỉ được ghi thêm)
+    tail_hash BINARY(32) NOT NULL,
+
+    range_start BIGINT NOT NULL,
+    range_end BIGINT NOT NULL,
+
+    rows_parsed INT NOT NULL DEFAULT 0,
+    rows_inserted INT NOT NULL DEFAULT 0,
+
+    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    INDEX idx_head_hash (head_hash, range_end)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Bảng tổng hợp theo phút / giờ, được cập nhật khi nạp dữ liệu (save_log_data, bulk loader)
+CREATE TABLE IF NOT EXISTS log_rollup_minute (
+    bucket DATETIME NOT NULL,
+    status SMALLINT NOT NULL,
+    log_level ENUM('INFO', 'WARNING', 'ERROR', 'DEBUG', 'CRITICAL') NOT NULL,
+    request_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, status, log_level)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS log_rollup_hour (
+    bucket DATETIME NOT NULL,
+    status SMALLINT NOT NULL,
+    log_level ENUM('INFO', 'WARNING', 'ERROR', 'DEBUG', 'CRITICAL') NOT NULL,
+    request_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, status, log_level)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Sketch theo giờ (HyperLogLog số IP khác nhau, Space-Saving top IP / top IP lỗi 404),
+-- dạng nhị phân của modules.sketches.LogSketches; gộp các giờ để ước lượng trên khoảng bất kỳ
+CREATE TABLE IF NOT EXISTS log_sketch_hour (
+    bucket DATETIME NOT NULL PRIMARY KEY,
+    sketch MEDIUMBLOB NOT NULL
+) ENGINE=InnoDB;
+
+-- Generation của dữ liệu: tăng sau mỗi lần ghi/xóa log để vô hiệu hóa cache truy vấn của ứng dụng
+CREATE TABLE IF NOT EXISTS cache_generation (
+    id TINYINT PRIMARY KEY,
+    generation BIGINT UNSIGNED NOT NULL DEFAULT 0
+) ENGINE=InnoDB;
+
+INSERT IGNORE INTO cache_generation (id, generation) VALUES (1, 0);
+
 # Database test 
 INSERT INTO server_logs (ip_address, timestamp, status, log_level, response) VALUES
     ('127.0.0.1', '2025-12-01 10:00:00', 200, 'INFO', 'OK'),
@@ -44,15 +112,47 @@ INSERT INTO server_logs (ip_address, timestamp, status, log_level, response) VAL
     ('203.0.113.45', '2025-12-01 10:35:00', 401, 'WARNING', 'Unauthorized');
 
 
+-- Tính lại toàn bộ bảng tổng hợp từ server_logs (backfill)
+DELIMITER //
+CREATE PROCEDURE IF NOT EXISTS rebuild_log_rollups()
+BEGIN
+    DELETE FROM log_rollup_minute;
+    DELETE FROM log_rollup_hour;
+
+    INSERT INTO log_rollup_minute (bucket, status, log_level, request_count)
+    SELECT DATE_FORMAT(timestamp, '%Y-%m-%d %H:%i:00'), status, log_level, COUNT(*)
+    FROM server_logs
+    GROUP BY 1, status, log_level;
+
+    INSERT INTO log_rollup_hour (bucket, status, log_level, request_count)
+    SELECT DATE_FORMAT(bucket, '%Y-%m-%d %H:00:00'), status, log_level, SUM(request_count)
+    FROM log_rollup_minute
+    GROUP BY 1, status, log_level;
+
+    UPDATE cache_generation SET generation = generation + 1 WHERE id = 1;
+END //
+DELIMITER ;
+
+CALL rebuild_log_rollups();
+
+-- Thống kê theo ngày: số request đọc từ bảng tổng hợp theo giờ thay vì group lại server_logs.
+-- Số IP khác nhau không cộng dồn được từ các giờ (sketch theo giờ không đọc được bằng SQL)
+-- nên vẫn đếm COUNT(DISTINCT) trên server_logs, chỉ quét các dòng của ngày đó (idx_composite).
 CREATE OR REPLACE VIEW log_statistics AS
 SELECT 
-    DATE(timestamp) as date,
-    log_level,
-    COUNT(*) as count,
-    COUNT(DISTINCT ip_address) as unique_ips
-FROM server_logs
-GROUP BY DATE(timestamp), log_level
-ORDER BY date DESC, log_level;
+    daily.date,
+    daily.log_level,
+    daily.count,
+    (SELECT COUNT(DISTINCT s.ip_address)
+     FROM server_logs s
+     WHERE s.timestamp >= daily.date AND s.timestamp < daily.date + INTERVAL 1 DAY
+       AND s.log_level = daily.log_level) as unique_ips
+FROM (
+    SELECT DATE(bucket) as date, log_level, SUM(request_count) as count
+    FROM log_rollup_hour
+    GROUP BY DATE(bucket), log_level
+) daily
+ORDER BY daily.date DESC, daily.log_level;
 
 -- View để xem top IP có nhiều lỗi nhất
 CREATE OR REPLACE VIEW top_error_ips AS
@@ -66,17 +166,121 @@ GROUP BY ip_address
 ORDER BY error_count DESC
 LIMIT 10;
 
--- Stored procedure để xóa log cũ hơn N ngày
+-- Tách phần có dữ liệu của partition gom p_old thành partition theo ngày, từ ngày
+-- của MIN(timestamp) tới mốc trên của p_old; p_old chỉ còn giữ khoảng trống trước đó.
+-- Không làm gì khi p_old không còn hoặc đã rỗng, nên gọi lại nhiều lần vẫn an toàn.
+DELIMITER //
+CREATE PROCEDURE IF NOT EXISTS split_old_partition()
+BEGIN
+    DECLARE upper_bound DATE;
+    DECLARE lower_bound DATE;
+    DECLARE parts TEXT DEFAULT '';
+
+    SELECT CAST(TRIM(BOTH '''' FROM PARTITION_DESCRIPTION) AS DATE) INTO upper_bound
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'server_logs' AND PARTITION_NAME = 'p_old';
+
+    IF upper_bound IS NOT NULL THEN
+        SELECT DATE(MIN(timestamp)) INTO lower_bound FROM server_logs PARTITION (p_old);
+    END IF;
+
+    IF lower_bound IS NOT NULL THEN
+        SET parts = CONCAT('PARTITION p_old VALUES LESS THAN (''', lower_bound, '''), ');
+        WHILE lower_bound < upper_bound DO
+            SET parts = CONCAT(parts, 'PARTITION p', DATE_FORMAT(lower_bound, '%Y%m%d'),
+                               ' VALUES LESS THAN (''', DATE_ADD(lower_bound, INTERVAL 1 DAY), '''), ');
+            SET lower_bound = DATE_ADD(lower_bound, INTERVAL 1 DAY);
+        END WHILE;
+
+        SET @ddl = CONCAT('ALTER TABLE server_logs REORGANIZE PARTITION p_old INTO (',
+                          TRIM(TRAILING ', ' FROM parts), ')');
+        PREPARE stmt FROM @ddl;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END IF;
+END //
+DELIMITER ;
+
+-- Tạo partition theo ngày cho tới CURDATE() + days_ahead bằng cách tách pmax.
+-- Nếu đã lâu không chạy, khoảng trống tới hôm nay cũng được chia theo từng ngày
+-- (dòng đã nằm trong pmax được chuyển sang đúng partition của ngày đó).
+DELIMITER //
+CREATE PROCEDURE IF NOT EXISTS add_log_partitions(IN days_ahead INT)
+BEGIN
+    DECLARE lower_bound DATE;
+    DECLARE target DATE DEFAULT DATE_ADD(CURDATE(), INTERVAL days_ahead + 1 DAY);
+    DECLARE parts TEXT DEFAULT '';
+
+    CALL split_old_partition();
+
+    SELECT MAX(CAST(TRIM(BOTH '''' FROM PARTITION_DESCRIPTION) AS DATE)) INTO lower_bound
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'server_logs'
+      AND PARTITION_DESCRIPTION <> 'MAXVALUE';
+
+    WHILE lower_bound < target DO
+        SET parts = CONCAT(parts, 'PARTITION p', DATE_FORMAT(lower_bound, '%Y%m%d'),
+                           ' VALUES LESS THAN (''', DATE_ADD(lower_bound, INTERVAL 1 DAY), '''), ');
+        SET lower_bound = DATE_ADD(lower_bound, INTERVAL 1 DAY);
+    END WHILE;
+
+    IF parts <> '' THEN
+        SET @ddl = CONCAT('ALTER TABLE server_logs REORGANIZE PARTITION pmax INTO (',
+                          parts, 'PARTITION pmax VALUES LESS THAN (MAXVALUE))');
+        PREPARE stmt FROM @ddl;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END IF;
+END //
+DELIMITER ;
+
+-- Xóa log cũ hơn N ngày bằng DROP PARTITION (không DELETE từng dòng).
+-- Chỉ partition nằm trọn trước mốc bị xóa; bảng tổng hợp và sketch được xóa tới cùng mốc.
 DELIMITER //
 CREATE PROCEDURE IF NOT EXISTS clean_old_logs(IN days_old INT)
 BEGIN
-    DELETE FROM server_logs 
-    WHERE timestamp < DATE_SUB(NOW(), INTERVAL days_old DAY);
+    DECLARE cutoff DATE DEFAULT DATE_SUB(CURDATE(), INTERVAL days_old DAY);
+    DECLARE drop_list TEXT;
+    DECLARE dropped_until DATE;
+    DECLARE deleted BIGINT DEFAULT 0;
+
+    SET SESSION group_concat_max_len = 1000000;
+
+    SELECT GROUP_CONCAT(PARTITION_NAME), MAX(CAST(TRIM(BOTH '''' FROM PARTITION_DESCRIPTION) AS DATE))
+    INTO drop_list, dropped_until
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'server_logs'
+      AND PARTITION_DESCRIPTION <> 'MAXVALUE'
+      AND CAST(TRIM(BOTH '''' FROM PARTITION_DESCRIPTION) AS DATE) <= cutoff;
+
+    IF drop_list IS NOT NULL THEN
+        SELECT COALESCE(SUM(request_count), 0) INTO deleted
+        FROM log_rollup_hour WHERE bucket < dropped_until;
+
+        SET @ddl = CONCAT('ALTER TABLE server_logs DROP PARTITION ', drop_list);
+        PREPARE stmt FROM @ddl;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+
+        DELETE FROM log_rollup_minute WHERE bucket < dropped_until;
+        DELETE FROM log_rollup_hour WHERE bucket < dropped_until;
+        DELETE FROM log_sketch_hour WHERE bucket < dropped_until;
+
+        UPDATE cache_generation SET generation = generation + 1 WHERE id = 1;
+    END IF;
     
-    SELECT ROW_COUNT() as deleted_rows;
+    SELECT deleted as deleted_rows;
 END //
 DELIMITER ;
 
+-- Bảo trì hằng ngày: tạo trước partition 7 ngày tới
+-- (retention không chạy tự động, gọi clean_old_logs hoặc dùng LOG_RETENTION_DAYS ở ứng dụng)
+CREATE EVENT IF NOT EXISTS ev_add_log_partitions
+ON SCHEDULE EVERY 1 DAY STARTS (CURDATE() + INTERVAL 1 HOUR)
+DO CALL add_log_partitions(7);
+
+CALL add_log_partitions(7);
+
 -- Kiểm tra dữ liệu đã insert
 SELECT 'Database initialized successfully!' as status;
 SELECT COUNT(*) as total_records FROM server_logs;
\ No newline at end of file
@@ -0,0 +1,22 @@
+-- Migration cho database đã tạo từ init.sql cũ:
+-- thêm row_hash (chống trùng) và bảng ingest_manifest
+-- Chạy: docker exec -i mysql_log_analyzer mysql -uroot -p log_db < migrations/001_ingest_manifest.sql
+
+USE log_db;
+
+ALTER TABLE server_logs
+    ADD COLUMN row_hash BINARY(16) NULL,
+    ADD UNIQUE INDEX uq_row_hash (row_hash);
+
+CREATE TABLE IF NOT EXISTS ingest_manifest (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    source_name VARCHAR(255) NOT NULL,
+    head_hash BINARY(32) NOT NULL,
+    tail_hash BINARY(32) NOT NULL,
+    range_start BIGINT NOT NULL,
+    range_end BIGINT NOT NULL,
+    rows_parsed INT NOT NULL DEFAULT 0,
+    rows_inserted INT NOT NULL DEFAULT 0,
+    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_head_hash (head_hash, range_end)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
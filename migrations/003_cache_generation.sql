@@ -0,0 +1,52 @@
+-- Migration: bảng cache_generation dùng để vô hiệu hóa cache truy vấn sau mỗi lần ghi/xóa
+-- Chạy: docker exec -i mysql_log_analyzer mysql -uroot -p log_db < migrations/003_cache_generation.sql
+
+USE log_db;
+
+CREATE TABLE IF NOT EXISTS cache_generation (
+    id TINYINT PRIMARY KEY,
+    generation BIGINT UNSIGNED NOT NULL DEFAULT 0
+) ENGINE=InnoDB;
+
+INSERT IGNORE INTO cache_generation (id, generation) VALUES (1, 0);
+
+DROP PROCEDURE IF EXISTS rebuild_log_rollups;
+DELIMITER //
+CREATE PROCEDURE rebuild_log_rollups()
+BEGIN
+    DELETE FROM log_rollup_minute;
+    DELETE FROM log_rollup_hour;
+
+    INSERT INTO log_rollup_minute (bucket, status, log_level, request_count)
+    SELECT DATE_FORMAT(timestamp, '%Y-%m-%d %H:%i:00'), status, log_level, COUNT(*)
+    FROM server_logs
+    GROUP BY 1, status, log_level;
+
+    INSERT INTO log_rollup_hour (bucket, status, log_level, request_count)
+    SELECT DATE_FORMAT(bucket, '%Y-%m-%d %H:00:00'), status, log_level, SUM(request_count)
+    FROM log_rollup_minute
+    GROUP BY 1, status, log_level;
+
+    UPDATE cache_generation SET generation = generation + 1 WHERE id = 1;
+END //
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS clean_old_logs;
+DELIMITER //
+CREATE PROCEDURE clean_old_logs(IN days_old INT)
+BEGIN
+    DECLARE cutoff DATETIME DEFAULT DATE(DATE_SUB(NOW(), INTERVAL days_old DAY));
+    DECLARE deleted INT;
+
+    DELETE FROM server_logs 
+    WHERE timestamp < cutoff;
+    SET deleted = ROW_COUNT();
+
+    DELETE FROM log_rollup_minute WHERE bucket < cutoff;
+    DELETE FROM log_rollup_hour WHERE bucket < cutoff;
+
+    UPDATE cache_generation SET generation = generation + 1 WHERE id = 1;
+    
+    SELECT deleted as deleted_rows;
+END //
+DELIMITER ;
@@ -0,0 +1,108 @@
+-- Migration: partition server_logs theo ngày, retention bằng DROP PARTITION
+-- Chạy: docker exec -i mysql_log_analyzer mysql -uroot -p log_db < migrations/004_partition_server_logs.sql
+--
+-- Cần chạy sau 001-003. ALTER TABLE sẽ copy lại toàn bộ bảng: với bảng lớn nên chạy
+-- ngoài giờ cao điểm. Dữ liệu hiện có nằm trong partition p_old (trước hôm nay) và
+-- được xóa khi clean_old_logs vượt qua mốc đó.
+
+USE log_db;
+
+-- Mọi khóa unique phải chứa cột partition
+ALTER TABLE server_logs
+    MODIFY id BIGINT NOT NULL AUTO_INCREMENT,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id, timestamp),
+    DROP INDEX uq_row_hash,
+    ADD UNIQUE INDEX uq_row_hash (row_hash, timestamp);
+
+SET @ddl = CONCAT('ALTER TABLE server_logs PARTITION BY RANGE COLUMNS (timestamp) (',
+                  'PARTITION p_old VALUES LESS THAN (''', CURDATE(), '''), ',
+                  'PARTITION pmax VALUES LESS THAN (MAXVALUE))');
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+DROP PROCEDURE IF EXISTS add_log_partitions;
+DROP PROCEDURE IF EXISTS clean_old_logs;
+
+-- Tạo trước partition theo ngày cho tới CURDATE() + days_ahead bằng cách tách pmax.
+-- Nếu đã lâu không chạy, khoảng trống tới hôm nay được gộp vào một partition.
+DELIMITER //
+CREATE PROCEDURE add_log_partitions(IN days_ahead INT)
+BEGIN
+    DECLARE lower_bound DATE;
+    DECLARE target DATE DEFAULT DATE_ADD(CURDATE(), INTERVAL days_ahead + 1 DAY);
+    DECLARE parts TEXT DEFAULT '';
+
+    SELECT MAX(CAST(TRIM(BOTH '''' FROM PARTITION_DESCRIPTION) AS DATE)) INTO lower_bound
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'server_logs'
+      AND PARTITION_DESCRIPTION <> 'MAXVALUE';
+
+    IF lower_bound < CURDATE() THEN
+        SET parts = CONCAT('PARTITION p', DATE_FORMAT(lower_bound, '%Y%m%d'),
+                           ' VALUES LESS THAN (''', CURDATE(), '''), ');
+        SET lower_bound = CURDATE();
+    END IF;
+
+    WHILE lower_bound < target DO
+        SET parts = CONCAT(parts, 'PARTITION p', DATE_FORMAT(lower_bound, '%Y%m%d'),
+                           ' VALUES LESS THAN (''', DATE_ADD(lower_bound, INTERVAL 1 DAY), '''), ');
+        SET lower_bound = DATE_ADD(lower_bound, INTERVAL 1 DAY);
+    END WHILE;
+
+    IF parts <> '' THEN
+        SET @ddl = CONCAT('ALTER TABLE server_logs REORGANIZE PARTITION pmax INTO (',
+                          parts, 'PARTITION pmax VALUES LESS THAN (MAXVALUE))');
+        PREPARE stmt FROM @ddl;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END IF;
+END //
+DELIMITER ;
+
+-- Xóa log cũ hơn N ngày bằng DROP PARTITION (không DELETE từng dòng).
+-- Chỉ partition nằm trọn trước mốc bị xóa; bảng tổng hợp được xóa tới cùng mốc.
+DELIMITER //
+CREATE PROCEDURE clean_old_logs(IN days_old INT)
+BEGIN
+    DECLARE cutoff DATE DEFAULT DATE_SUB(CURDATE(), INTERVAL days_old DAY);
+    DECLARE drop_list TEXT;
+    DECLARE dropped_until DATE;
+    DECLARE deleted BIGINT DEFAULT 0;
+
+    SET SESSION group_concat_max_len = 1000000;
+
+    SELECT GROUP_CONCAT(PARTITION_NAME), MAX(CAST(TRIM(BOTH '''' FROM PARTITION_DESCRIPTION) AS DATE))
+    INTO drop_list, dropped_until
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'server_logs'
+      AND PARTITION_DESCRIPTION <> 'MAXVALUE'
+      AND CAST(TRIM(BOTH '''' FROM PARTITION_DESCRIPTION) AS DATE) <= cutoff;
+
+    IF drop_list IS NOT NULL THEN
+        SELECT COALESCE(SUM(request_count), 0) INTO deleted
+        FROM log_rollup_hour WHERE bucket < dropped_until;
+
+        SET @ddl = CONCAT('ALTER TABLE server_logs DROP PARTITION ', drop_list);
+        PREPARE stmt FROM @ddl;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+
+        DELETE FROM log_rollup_minute WHERE bucket < dropped_until;
+        DELETE FROM log_rollup_hour WHERE bucket < dropped_until;
+
+        UPDATE cache_generation SET generation = generation + 1 WHERE id = 1;
+    END IF;
+    
+    SELECT deleted as deleted_rows;
+END //
+DELIMITER ;
+
+-- Bảo trì hằng ngày: tạo trước partition 7 ngày tới
+-- (retention không chạy tự động, gọi clean_old_logs hoặc dùng LOG_RETENTION_DAYS ở ứng dụng)
+CREATE EVENT IF NOT EXISTS ev_add_log_partitions
+ON SCHEDULE EVERY 1 DAY STARTS (CURDATE() + INTERVAL 1 HOUR)
+DO CALL add_log_partitions(7);
+
+CALL add_log_partitions(7);
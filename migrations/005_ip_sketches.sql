@@ -0,0 +1,53 @@
+-- Migration: bảng log_sketch_hour (sketch số IP khác nhau / top IP theo giờ)
+-- Chạy: docker exec -i mysql_log_analyzer mysql -uroot -p log_db < migrations/005_ip_sketches.sql
+--
+-- Cần chạy sau 001-004. Sketch được tạo khi nạp dữ liệu; với dữ liệu đã có, bấm
+-- "Rebuild Rollups" trên trang Database để tính lại cả sketch từ server_logs.
+
+USE log_db;
+
+CREATE TABLE IF NOT EXISTS log_sketch_hour (
+    bucket DATETIME NOT NULL PRIMARY KEY,
+    sketch MEDIUMBLOB NOT NULL
+) ENGINE=InnoDB;
+
+DROP PROCEDURE IF EXISTS clean_old_logs;
+
+-- Xóa log cũ hơn N ngày bằng DROP PARTITION (không DELETE từng dòng).
+-- Chỉ partition nằm trọn trước mốc bị xóa; bảng tổng hợp và sketch được xóa tới cùng mốc.
+DELIMITER //
+CREATE PROCEDURE clean_old_logs(IN days_old INT)
+BEGIN
+    DECLARE cutoff DATE DEFAULT DATE_SUB(CURDATE(), INTERVAL days_old DAY);
+    DECLARE drop_list TEXT;
+    DECLARE dropped_until DATE;
+    DECLARE deleted BIGINT DEFAULT 0;
+
+    SET SESSION group_concat_max_len = 1000000;
+
+    SELECT GROUP_CONCAT(PARTITION_NAME), MAX(CAST(TRIM(BOTH '''' FROM PARTITION_DESCRIPTION) AS DATE))
+    INTO drop_list, dropped_until
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'server_logs'
+      AND PARTITION_DESCRIPTION <> 'MAXVALUE'
+      AND CAST(TRIM(BOTH '''' FROM PARTITION_DESCRIPTION) AS DATE) <= cutoff;
+
+    IF drop_list IS NOT NULL THEN
+        SELECT COALESCE(SUM(request_count), 0) INTO deleted
+        FROM log_rollup_hour WHERE bucket < dropped_until;
+
+        SET @ddl = CONCAT('ALTER TABLE server_logs DROP PARTITION ', drop_list);
+        PREPARE stmt FROM @ddl;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+
+        DELETE FROM log_rollup_minute WHERE bucket < dropped_until;
+        DELETE FROM log_rollup_hour WHERE bucket < dropped_until;
+        DELETE FROM log_sketch_hour WHERE bucket < dropped_until;
+
+        UPDATE cache_generation SET generation = generation + 1 WHERE id = 1;
+    END IF;
+    
+    SELECT deleted as deleted_rows;
+END //
+DELIMITER ;
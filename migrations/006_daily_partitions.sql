@@ -0,0 +1,82 @@
+-- Migration: chia partition gom của server_logs thành partition theo ngày
+-- Chạy: docker exec -i mysql_log_analyzer mysql -uroot -p log_db < migrations/006_daily_partitions.sql
+--
+-- Cần chạy sau 001-005. Bản add_log_partitions cũ gộp mọi thứ trước hôm nay vào
+-- một partition (p_old, hoặc khoảng trống khi lâu không chạy), nên retention theo
+-- ngày không xóa được dữ liệu cũ. Lần gọi add_log_partitions cuối file chia dữ
+-- liệu trong p_old thành từng ngày (REORGANIZE copy lại các dòng của p_old).
+
+USE log_db;
+
+DROP PROCEDURE IF EXISTS split_old_partition;
+DROP PROCEDURE IF EXISTS add_log_partitions;
+
+-- Tách phần có dữ liệu của partition gom p_old thành partition theo ngày, từ ngày
+-- của MIN(timestamp) tới mốc trên của p_old; p_old chỉ còn giữ khoảng trống trước đó.
+-- Không làm gì khi p_old không còn hoặc đã rỗng, nên gọi lại nhiều lần vẫn an toàn.
+DELIMITER //
+CREATE PROCEDURE split_old_partition()
+BEGIN
+    DECLARE upper_bound DATE;
+    DECLARE lower_bound DATE;
+    DECLARE parts TEXT DEFAULT '';
+
+    SELECT CAST(TRIM(BOTH '''' FROM PARTITION_DESCRIPTION) AS DATE) INTO upper_bound
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'server_logs' AND PARTITION_NAME = 'p_old';
+
+    IF upper_bound IS NOT NULL THEN
+        SELECT DATE(MIN(timestamp)) INTO lower_bound FROM server_logs PARTITION (p_old);
+    END IF;
+
+    IF lower_bound IS NOT NULL THEN
+        SET parts = CONCAT('PARTITION p_old VALUES LESS THAN (''', lower_bound, '''), ');
+        WHILE lower_bound < upper_bound DO
+            SET parts = CONCAT(parts, 'PARTITION p', DATE_FORMAT(lower_bound, '%Y%m%d'),
+                               ' VALUES LESS THAN (''', DATE_ADD(lower_bound, INTERVAL 1 DAY), '''), ');
+            SET lower_bound = DATE_ADD(lower_bound, INTERVAL 1 DAY);
+        END WHILE;
+
+        SET @ddl = CONCAT('ALTER TABLE server_logs REORGANIZE PARTITION p_old INTO (',
+                          TRIM(TRAILING ', ' FROM parts), ')');
+        PREPARE stmt FROM @ddl;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END IF;
+END //
+DELIMITER ;
+
+-- Tạo partition theo ngày cho tới CURDATE() + days_ahead bằng cách tách pmax.
+-- Nếu đã lâu không chạy, khoảng trống tới hôm nay cũng được chia theo từng ngày
+-- (dòng đã nằm trong pmax được chuyển sang đúng partition của ngày đó).
+DELIMITER //
+CREATE PROCEDURE add_log_partitions(IN days_ahead INT)
+BEGIN
+    DECLARE lower_bound DATE;
+    DECLARE target DATE DEFAULT DATE_ADD(CURDATE(), INTERVAL days_ahead + 1 DAY);
+    DECLARE parts TEXT DEFAULT '';
+
+    CALL split_old_partition();
+
+    SELECT MAX(CAST(TRIM(BOTH '''' FROM PARTITION_DESCRIPTION) AS DATE)) INTO lower_bound
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'server_logs'
+      AND PARTITION_DESCRIPTION <> 'MAXVALUE';
+
+    WHILE lower_bound < target DO
+        SET parts = CONCAT(parts, 'PARTITION p', DATE_FORMAT(lower_bound, '%Y%m%d'),
+                           ' VALUES LESS THAN (''', DATE_ADD(lower_bound, INTERVAL 1 DAY), '''), ');
+        SET lower_bound = DATE_ADD(lower_bound, INTERVAL 1 DAY);
+    END WHILE;
+
+    IF parts <> '' THEN
+        SET @ddl = CONCAT('ALTER TABLE server_logs REORGANIZE PARTITION pmax INTO (',
+                          parts, 'PARTITION pmax VALUES LESS THAN (MAXVALUE))');
+        PREPARE stmt FROM @ddl;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END IF;
+END //
+DELIMITER ;
+
+CALL add_log_partitions(7);
@@ -0,0 +1,26 @@
+-- Migration: trả lại cột unique_ips cho view log_statistics
+-- Chạy: docker exec -i mysql_log_analyzer mysql -uroot -p log_db < migrations/007_log_statistics_unique_ips.sql
+--
+-- Cần chạy sau 002. Bản log_statistics của 002 cũ (đọc từ log_rollup_hour) bỏ mất
+-- cột unique_ips; các truy vấn SELECT unique_ips FROM log_statistics lỗi từ đó.
+
+USE log_db;
+
+-- Thống kê theo ngày: số request đọc từ bảng tổng hợp theo giờ thay vì group lại server_logs.
+-- Số IP khác nhau không cộng dồn được từ các giờ (sketch theo giờ không đọc được bằng SQL)
+-- nên vẫn đếm COUNT(DISTINCT) trên server_logs, chỉ quét các dòng của ngày đó (idx_composite).
+CREATE OR REPLACE VIEW log_statistics AS
+SELECT 
+    daily.date,
+    daily.log_level,
+    daily.count,
+    (SELECT COUNT(DISTINCT s.ip_address)
+     FROM server_logs s
+     WHERE s.timestamp >= daily.date AND s.timestamp < daily.date + INTERVAL 1 DAY
+       AND s.log_level = daily.log_level) as unique_ips
+FROM (
+    SELECT DATE(bucket) as date, log_level, SUM(request_count) as count
+    FROM log_rollup_hour
+    GROUP BY DATE(bucket), log_level
+) daily
+ORDER BY daily.date DESC, daily.log_level;
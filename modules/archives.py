@@ -0,0 +1,257 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from modules.dataset import LogDataset
+from modules.log_parser import PARSE_WORKERS, merge_parse_stats, new_parse_stats, open_binary, parse_log_dataset
+
+# Đuôi file được chấp nhận ở ô upload (log thường, file nén, archive)
+UPLOAD_TYPES = ["log", "txt", "csv", "gz", "bz2", "xz", "zst", "tar", "tgz", "zip"]
+
+# Số byte đầu stream dùng để nhận diện định dạng (đủ để đọc magic 'ustar' của tar)
+HEAD_BYTES = 512
+
+# Số byte mỗi lần chép khi đưa zip không seek được ra file tạm
+ZIP_COPY_CHUNK = 1024 * 1024
+
+_MAGIC = {
+    'gzip': b'\x1f\x8b',
+    'bz2': b'BZh',
+    'xz': b'\xfd7zXZ\x00',
+    'zstd': b'\x28\xb5\x2f\xfd',
+    'zip': b'PK\x03\x04',
+}
+
+_SUFFIXES = {
+    '.gz': '',
+    '.tgz': '.tar',
+    '.bz2': '',
+    '.xz': '',
+    '.zst': '',
+}
+
+
+def detect_format(head: bytes, name: str = "") -> Optional[str]:
+    """
+    Nhận diện định dạng theo magic bytes ở đầu stream (đuôi .tar chỉ dùng khi tar không có magic ustar)
+
+    Returns:
+        'gzip', 'bz2', 'xz', 'zstd', 'zip', 'tar' hoặc None nếu là log thường
+    """
+    for fmt, magic in _MAGIC.items():
+        if head.startswith(magic):
+            return fmt
+    if head[257:262] == b'ustar' or name.lower().endswith('.tar'):
+        return 'tar'
+    return None
+
+
+def _zstd_reader(stream):
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("Cần cài gói zstandard để đọc file .zst (pip install zstandard)")
+    return zstandard.ZstdDecompressor().stream_reader(stream, read_across_frames=True)
+
+
+_DECOMPRESSORS = {
+    'gzip': lambda stream: gzip.GzipFile(fileobj=stream, mode='rb'),
+    'bz2': bz2.BZ2File,
+    'xz': lzma.LZMAFile,
+    'zstd': _zstd_reader,
+}
+
+
+class _HeadReader:
+    """
+    Stream chỉ đọc tuần tự: trả lại phần đầu đã đọc để nhận diện rồi đọc tiếp từ stream gốc
+    """
+
+    def __init__(self, head: bytes, stream):
+        self._head = head
+        self._stream = stream
+
+    def read(self, size: int = -1) -> bytes:
+        if not self._head:
+            return self._stream.read(size)
+        if size is None or size < 0:
+            data, self._head = self._head + self._stream.read(), b""
+            return data
+        data, self._head = self._head[:size], self._head[size:]
+        if len(data) < size:
+            data += self._stream.read(size - len(data))
+        return data
+
+
+def _seekable(stream) -> bool:
+    # Member của tar đọc ở chế độ stream ném AttributeError thay vì trả False
+    try:
+        return stream.seekable()
+    except (AttributeError, OSError):
+        return False
+
+
+def _read_head(stream) -> Tuple[bytes, BinaryIO]:
+    """
+    Đọc HEAD_BYTES byte đầu; stream seek được thì quay lại đầu, ngược lại bọc bằng _HeadReader
+    """
+    head = b""
+    while len(head) < HEAD_BYTES:
+        data = stream.read(HEAD_BYTES - len(head))
+        if not data:
+            break
+        head += data
+
+    if _seekable(stream):
+        stream.seek(-len(head), io.SEEK_CUR)
+        return head, stream
+    return head, _HeadReader(head, stream)
+
+
+def _strip_suffix(name: str) -> str:
+    root, ext = os.path.splitext(name)
+    return root + _SUFFIXES[ext.lower()] if ext.lower() in _SUFFIXES else name
+
+
+def source_name(source) -> str:
+    """
+    Tên nguồn log: tên file của đường dẫn hoặc thuộc tính name của file upload
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.basename(os.fspath(source))
+    return os.path.basename(getattr(source, 'name', None) or 'upload')
+
+
+def is_archive(source) -> bool:
+    """
+    True nếu nguồn là file nén hoặc archive (tar/zip) cần đọc qua iter_log_members
+    """
+    with open_binary(source) as fh:
+        head, _ = _read_head(fh)
+    return detect_format(head, source_name(source)) is not None
+
+
+def iter_log_members(stream, name: str) -> Iterator[Tuple[str, BinaryIO, bool]]:
+    """
+    Duyệt các file log trong một stream, giải nén dạng streaming.
+
+    - gzip / bz2 / xz / zstd: giải nén lớp ngoài rồi nhận diện tiếp (ví dụ .tar.gz)
+    - tar: đọc tuần tự; mỗi member là một đoạn của chính stream tar nên phải
+      được đọc hết trước khi chuyển sang member tiếp theo
+    - zip: mỗi member được mở độc lập nên các member đọc song song được; zip
+      không nằm trên file seek được (ví dụ zip trong tar.gz) được chép ra file
+      tạm trước (vẫn ở dạng nén)
+    - còn lại: chính stream là một file log
+
+    Nội dung giải nén không bao giờ được giữ nguyên vẹn trong bộ nhớ hay ghi ra
+    đĩa. Stream gốc phải còn mở tới khi parse xong.
+
+    Yields:
+        (tên member, stream binary đã giải nén, independent) - independent=False nếu
+        stream chỉ đọc được trước khi lấy member tiếp theo (không parse đồng thời được)
+    """
+    return _iter_members(stream, name, independent=True, random_access=_seekable(stream))
+
+
+def _iter_members(stream, name: str, independent: bool,
+                  random_access: bool) -> Iterator[Tuple[str, BinaryIO, bool]]:
+    """
+    iter_log_members cho một lớp: random_access=True nếu stream là file seek được
+    (không phải output của bộ giải nén hay member của tar)
+    """
+    head, stream = _read_head(stream)
+    fmt = detect_format(head, name)
+
+    if fmt in _DECOMPRESSORS:
+        yield from _iter_members(_DECOMPRESSORS[fmt](stream), _strip_suffix(name), independent, False)
+
+    elif fmt == 'tar':
+        with tarfile.open(fileobj=stream, mode='r|') as tar:
+            for member in tar:
+                if member.isfile():
+                    yield from _iter_members(tar.extractfile(member), f"{name}/{member.name}", False, False)
+
+    elif fmt == 'zip':
+        if not random_access:
+            spool = tempfile.TemporaryFile()
+            shutil.copyfileobj(stream, spool, ZIP_COPY_CHUNK)
+            spool.seek(0)
+            stream = spool
+        archive = zipfile.ZipFile(stream)
+        for info in archive.infolist():
+            if not info.is_dir():
+                yield from _iter_members(archive.open(info), f"{name}/{info.filename}", True, False)
+
+    else:
+        yield name, stream, independent
+
+
+def parse_archive(
+    source,
+    name: Optional[str] = None,
+    engine: str = "line",
+    workers: Optional[int] = None
+) -> Tuple[LogDataset, Dict, List[Dict]]:
+    """
+    Parse file nén / archive: các member độc lập (zip) được giải nén và parse
+    đồng thời trên một thread pool, member của tar được parse ngay từ stream
+    tar trước khi đọc tới member tiếp theo. Kết quả được ghép và sắp theo timestamp.
+
+    Việc giải nén (zlib, bz2, lzma, zstd) nhả GIL nên các member chạy song song
+    thật sự ở phần này. Số member đang chờ parse bị giới hạn để không giữ quá
+    nhiều stream mở cùng lúc.
+
+    Args:
+        source: Đường dẫn file hoặc đối tượng file-like (UploadedFile, BytesIO, ...)
+        name: Tên nguồn (mặc định tên file)
+        engine: Engine parse cho từng member ('line' hoặc 'vectorized')
+        workers: Số thread (mặc định PARSE_WORKERS)
+
+    Returns:
+        tuple: (dataset, stats, members)
+            - dataset: LogDataset đã sắp theo timestamp
+            - stats: Thống kê parse đã gộp
+            - members: List dict {'member', **stats} theo thứ tự trong archive
+    """
+    workers = workers or PARSE_WORKERS
+    name = name or source_name(source)
+    pending = threading.BoundedSemaphore(workers * 2)
+    # Engine 'parallel' cần file trên đĩa: các member đã chạy song song nên dùng engine 'line'
+    member_engine = "line" if engine == "parallel" else engine
+
+    def parse(stream):
+        try:
+            return parse_log_dataset(stream, engine=member_engine)
+        finally:
+            pending.release()
+
+    futures = []
+    with open_binary(source) as fh, ThreadPoolExecutor(max_workers=workers) as executor:
+        for member, stream, independent in iter_log_members(fh, name):
+            pending.acquire()
+            if independent:
+                future = executor.submit(parse, stream)
+            else:
+                # Member của tar chỉ đọc được trước khi chuyển sang member tiếp theo
+                future = Future()
+                future.set_result(parse(stream))
+            futures.append((member, future))
+        results = [(member, future.result()) for member, future in futures]
+
+    stats = new_parse_stats()
+    members = []
+    for member, (_, member_stats) in results:
+        merge_parse_stats(stats, member_stats)
+        members.append({'member': member, **member_stats})
+
+    dataset = LogDataset.concat(dataset for _, (dataset, _) in results)
+    return dataset.sorted_by_time(), stats, members
@@ -1,7 +1,25 @@
+import hashlib
+import os
+from io import BytesIO
+
 import streamlit as st
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 
+from modules.metrics import metrics
+from modules.query_cache import QueryCache
+
+# Cache ảnh PNG của biểu đồ theo fingerprint dữ liệu đầu vào (LRU, giới hạn số ảnh và dung lượng)
+CHART_CACHE_SIZE = int(os.getenv('CHART_CACHE_SIZE', 64))
+CHART_CACHE_MAX_BYTES = int(os.getenv('CHART_CACHE_MAX_MB', 32)) * 1024 * 1024
+CHART_DPI = int(os.getenv('CHART_DPI', 120))
+
+# Ảnh chỉ phụ thuộc dữ liệu đầu vào nên không cần TTL hay generation
+chart_cache = QueryCache(CHART_CACHE_SIZE, CHART_CACHE_MAX_BYTES, ttl=float('inf'))
+
+STATUS_COLORS = ["#51CF66", "#FFD93D", "#FF6B6B", "#845EC2"]
+
 def smart_parse_time(series):
     t1 = pd.to_datetime(series, format="%d/%b/%Y:%H:%M:%S %z", errors="coerce")
     t2 = pd.to_datetime(series, format="%d/%b/%Y:%H:%M:%S", errors="coerce")
@@ -50,10 +68,93 @@ def analyze(df):
 
     plt.tight_layout()
     st.pyplot(fig)
+    plt.close(fig)
 
     # Bảng phụ: Top IP gây lỗi 404
     if not top_404_ip.empty:
         st.subheader("🔍 Top IP gây lỗi 404")
         st.table(top_404_ip.reset_index().rename(columns={"index": "IP", "ip": "Số lỗi 404"}))
     else:
-        st.info("Không có lỗi 404 trong log")
\ No newline at end of file
+        st.info("Không có lỗi 404 trong log")
+
+def fingerprint(*parts) -> str:
+    """
+    Hash nội dung dữ liệu vẽ biểu đồ (Series, mảng, giá trị đơn) làm khóa cache
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, pd.Series):
+            hasher.update(np.asarray(part.index.astype(str)).astype("U").tobytes())
+            hasher.update(np.ascontiguousarray(part.to_numpy()).tobytes())
+        elif isinstance(part, np.ndarray):
+            hasher.update(np.ascontiguousarray(part).tobytes())
+        else:
+            hasher.update(repr(part).encode("utf-8"))
+        hasher.update(b"\x00")
+    return hasher.hexdigest()
+
+
+def cached_chart(name: str, key: str, draw) -> bytes:
+    """
+    Ảnh PNG của biểu đồ: lấy từ cache theo (name, key), nếu chưa có thì gọi draw()
+    để tạo figure, lưu thành PNG rồi đóng figure ngay để giải phóng bộ nhớ
+
+    Args:
+        name: Tên biểu đồ
+        key: Fingerprint dữ liệu đầu vào (xem fingerprint)
+        draw: Hàm không tham số trả về matplotlib Figure
+    """
+    hit, png = chart_cache.get((name, key), 0)
+    metrics.incr("chart.cache_hits" if hit else "chart.cache_misses")
+    if hit:
+        return png
+
+    with metrics.timer(f"render.chart.{name}"):
+        fig = draw()
+        try:
+            buffer = BytesIO()
+            fig.savefig(buffer, format="png", dpi=CHART_DPI, bbox_inches="tight")
+        finally:
+            plt.close(fig)
+    png = buffer.getvalue()
+    chart_cache.put((name, key), 0, png)
+    return png
+
+
+def top_ip_chart(top_ips: pd.Series, top_ips_error: pd.Series, approximate: bool) -> bytes:
+    """
+    Biểu đồ ngang top IP theo số request; với sketch thanh lỗi chỉ khoảng [count - error, count]
+    """
+    def draw():
+        fig, ax = plt.subplots(figsize=(10, 6))
+        ax.barh(top_ips.index[::-1], top_ips.values[::-1], color="#FF6B6B",
+                xerr=[top_ips_error.values[::-1], np.zeros(len(top_ips))] if top_ips_error.any() else None)
+        ax.set_title("Top 10 IPs by Requests" + (" (approx.)" if approximate else ""),
+                     fontweight="bold", fontsize=14)
+        ax.set_xlabel("Number of Requests")
+        ax.grid(axis="x", alpha=0.3)
+        return fig
+
+    return cached_chart("top_ips", fingerprint(top_ips, top_ips_error, approximate), draw)
+
+
+def status_donut_chart(status_counts: pd.Series) -> bytes:
+    """
+    Donut chart phân bố status code
+    """
+    def draw():
+        fig, ax = plt.subplots(figsize=(10, 6))
+        wedges, texts, autotexts = ax.pie(status_counts.values, labels=status_counts.index,
+                                          autopct='%1.1f%%', colors=STATUS_COLORS[:len(status_counts)],
+                                          textprops={'fontsize': 10})
+
+        for autotext in autotexts:
+            autotext.set_color('white')
+            autotext.set_fontweight('bold')
+
+        centre_circle = plt.Circle((0, 0), 0.70, fc='white')
+        ax.add_artist(centre_circle)
+        ax.set_title("HTTP Status Code Distribution", fontweight="bold", fontsize=14)
+        return fig
+
+    return cached_chart("status_donut", fingerprint(status_counts), draw)
@@ -0,0 +1,149 @@
+"""
+Nạp log vào database từ dòng lệnh, không cần Streamlit (cron, worker, script).
+
+Mỗi file được nạp idempotent qua modules.ingest (file đã nạp được bỏ qua, file
+ghi thêm chỉ nạp phần đuôi). Kết quả in ra stdout dạng JSON: báo cáo từng file,
+tổng các bộ đếm parse (stats) và danh sách lỗi có cấu trúc; log ghi ra stderr.
+
+Chạy từ thư mục gốc của project:
+    python -m modules.cli /var/log/nginx/access.log /var/log/archive/
+    python -m modules.cli logs/ --pattern '*.gz' --progress
+    python -m modules.cli big.log --parse-only --engine parallel
+"""
+import argparse
+import fnmatch
+import json
+import logging
+import os
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+from modules import notify
+from modules.ingest import ingest_source
+from modules.log_parser import PARSE_ENGINES, merge_parse_stats, new_parse_stats, parse_source, source_size
+from modules.metrics import metrics
+from modules.settings import DB_BATCH_SIZE, DB_LOCAL_INFILE
+
+logger = logging.getLogger(__name__)
+
+
+def iter_log_paths(paths: List[str], pattern: str = "*") -> Iterator[str]:
+    """
+    Các file cần nạp: file được chỉ định trực tiếp, và mọi file khớp pattern
+    trong thư mục (đệ quy, theo thứ tự tên, bỏ file / thư mục ẩn)
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for name in sorted(files):
+                if not name.startswith(".") and fnmatch.fnmatch(name, pattern):
+                    yield os.path.join(root, name)
+
+
+def progress_printer(path: str) -> Optional[Callable[[int], None]]:
+    """
+    Callback progress in phần trăm ra stderr (tối đa một lần mỗi giây)
+    """
+    total = source_size(path)
+    if not total:
+        return None
+    last = [0.0]
+
+    def report(bytes_read: int):
+        now = time.monotonic()
+        if now - last[0] >= 1.0:
+            last[0] = now
+            print(f"{path}: {min(bytes_read / total, 1.0):6.1%} of {total:,} bytes", file=sys.stderr)
+    return report
+
+
+def load_file(path: str, args: argparse.Namespace) -> Dict:
+    """
+    Nạp (hoặc chỉ parse) một file
+
+    Returns:
+        dict: report của ingest_source kèm 'stats' và 'errors' (list dict {stage, level, message})
+    """
+    progress = progress_printer(path) if args.progress else None
+    start = time.perf_counter()
+
+    with notify.capture() as events:
+        try:
+            if args.parse_only:
+                dataset, stats, members = parse_source(path, engine=args.engine, progress=progress,
+                                                       on_warning=notify.warning)
+                report = {'source_name': path, 'action': 'parse', 'rows_parsed': len(dataset),
+                          'members': members}
+            else:
+                report, stats = ingest_source(path, batch_size=args.batch_size,
+                                              use_load_data=args.load_data, progress=progress)
+            stage = 'parse' if args.parse_only else 'save'
+        except Exception as e:
+            logger.exception("Không thể nạp %s", path)
+            report, stats, stage = {'source_name': path, 'action': 'error'}, new_parse_stats(), 'read'
+            events.append({'level': 'error', 'message': f"{type(e).__name__}: {e}", 'time': time.time()})
+
+    report['stats'] = stats
+    report['elapsed_sec'] = time.perf_counter() - start
+    report['errors'] = [{'stage': stage, **event} for event in events if event['level'] == 'error']
+    report['warnings'] = sum(event['level'] == 'warning' for event in events)
+    for item in report.get('failed_batches', []):
+        report['errors'].append({'stage': 'save', 'level': 'error',
+                                 'message': f"batch {item['batch']} ({item['rows']} rows): {item['error']}"})
+    return report
+
+
+def summarize(reports: List[Dict], elapsed: float) -> Dict:
+    """
+    Tổng hợp báo cáo các file: tổng bộ đếm parse, số dòng đã ghi, lỗi
+    """
+    stats = new_parse_stats()
+    for report in reports:
+        merge_parse_stats(stats, report['stats'])
+    rows_inserted = sum(report.get('rows_inserted', 0) for report in reports)
+    return {
+        'files': len(reports),
+        'skipped': sum(report['action'] == 'skip' for report in reports),
+        'failed': sum(bool(report['errors']) for report in reports),
+        'rows_parsed': stats['parsed_success'],
+        'rows_inserted': rows_inserted,
+        'elapsed_sec': elapsed,
+        'lines_per_sec': stats['total_lines'] / elapsed if elapsed else 0.0,
+        'stats': stats,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='+', help='File log hoặc thư mục chứa log')
+    parser.add_argument('--pattern', default='*', help="Glob tên file khi duyệt thư mục (mặc định '*')")
+    parser.add_argument('--batch-size', type=int, default=DB_BATCH_SIZE)
+    parser.add_argument('--load-data', action=argparse.BooleanOptionalAction, default=DB_LOCAL_INFILE,
+                        help='Dùng LOAD DATA LOCAL INFILE')
+    parser.add_argument('--parse-only', action='store_true', help='Chỉ parse, không ghi database')
+    parser.add_argument('--engine', choices=PARSE_ENGINES, default='line', help='Engine parse cho --parse-only')
+    parser.add_argument('--progress', action='store_true', help='In tiến độ từng file ra stderr')
+    parser.add_argument('--metrics', action='store_true', help='Kèm số liệu từng giai đoạn (modules.metrics) trong JSON')
+    parser.add_argument('--quiet', action='store_true', help='Chỉ ghi log lỗi')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR if args.quiet else logging.INFO,
+                        format='%(asctime)s %(levelname)s %(message)s', stream=sys.stderr)
+
+    start = time.perf_counter()
+    reports = [load_file(path, args) for path in iter_log_paths(args.paths, args.pattern)]
+    result = {'summary': summarize(reports, time.perf_counter() - start), 'files': reports}
+    if args.metrics:
+        result['metrics'] = metrics.snapshot()
+
+    json.dump(result, sys.stdout, indent=2, ensure_ascii=False, default=str)
+    sys.stdout.write("\n")
+    return 1 if result['summary']['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
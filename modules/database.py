@@ -1,11 +1,32 @@
+import numpy as np
 import pandas as pd
 import mysql.connector
 from mysql.connector import Error, pooling
-import streamlit as st
+import csv
+import functools
+import inspect
 import os
-from typing import List, Tuple, Optional
+import queue
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
 from contextlib import contextmanager
 from dotenv import load_dotenv
+from modules import notify
+from modules.dataset import LogDataset, ipv4_to_uint32
+from modules.metrics import metrics
+from modules.sketches import LogSketches
+from modules.timeseries import RATE_MAX_BUCKETS, RateIndex
+from modules.query_cache import QueryCache, normalize_params
+from modules.settings import (DB_BATCH_SIZE, DB_LOCAL_INFILE, DB_PAGE_SIZE, DB_QUEUE_BATCHES, LOG_RETENTION_DAYS,
+                              PARTITION_DAYS_AHEAD)
+from modules.storage_common import (PAGE_COLUMNS, _page_filters, _stage_report, build_log_filters,
+                                    iter_dataframe_batches, show_save_report, timed_query)
 
 load_dotenv()
 
@@ -17,21 +38,215 @@ DB_CONFIG = {
     'port': int(os.getenv('DB_PORT', 3306))
 }
 
-@st.cache_resource
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))           # Số kết nối tối đa trong pool
+DB_WRITERS = int(os.getenv('DB_WRITERS', 4))               # Số thread ghi song song
+
+# Thời gian tối đa (giây) chờ một kết nối rảnh trong pool
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+
+# Cache kết quả truy vấn đọc (get_statistics, get_logs_by_filters, get_dashboard_aggregates)
+QUERY_CACHE_SIZE = int(os.getenv('QUERY_CACHE_SIZE', 128))                    # Số kết quả tối đa
+QUERY_CACHE_MAX_BYTES = int(os.getenv('QUERY_CACHE_MAX_MB', 64)) * 1024 * 1024
+QUERY_CACHE_TTL = float(os.getenv('QUERY_CACHE_TTL', 300))                     # Giây, 0 = tắt cache
+
+# Dashboard/thống kê dùng sketch theo giờ (log_sketch_hour) cho số IP khác nhau và top IP
+DB_USE_SKETCHES = os.getenv('DB_USE_SKETCHES', '1') == '1'
+
+query_cache = QueryCache(QUERY_CACHE_SIZE, QUERY_CACHE_MAX_BYTES, QUERY_CACHE_TTL)
+
+INSERT_QUERY = """
+    INSERT INTO server_logs 
+    (ip_address, timestamp, status, log_level, response) 
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+# Bản ghi có row_hash: dòng trùng (unique index uq_row_hash) được bỏ qua
+INSERT_DEDUP_QUERY = """
+    INSERT IGNORE INTO server_logs 
+    (ip_address, timestamp, status, log_level, response, row_hash) 
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+LOAD_DATA_QUERY = """
+    LOAD DATA LOCAL INFILE %s INTO TABLE server_logs
+    FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+    LINES TERMINATED BY '\\n'
+    (ip_address, timestamp, status, log_level, response)
+"""
+
+LOAD_DATA_DEDUP_QUERY = """
+    LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE server_logs
+    FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+    LINES TERMINATED BY '\\n'
+    (ip_address, timestamp, status, log_level, response, @row_hash)
+    SET row_hash = UNHEX(@row_hash)
+"""
+
+# Keyset pagination theo (timestamp, id) giảm dần: đọc tiếp từ idx_timestamp
+# (index phụ của InnoDB đã chứa id) thay vì OFFSET phải bỏ qua các dòng trước đó
+PAGE_QUERY = """
+    SELECT id, ip_address, timestamp, status, log_level, response
+    FROM server_logs
+    WHERE {where}
+    ORDER BY timestamp DESC, id DESC
+    LIMIT %s
+"""
+
+# Bảng tổng hợp (bucket thời gian x status x log_level), cập nhật trong cùng transaction với batch
+ROLLUP_TABLES = {
+    'minute': 'log_rollup_minute',
+    'hour': 'log_rollup_hour',
+}
+
+ROLLUP_UPSERT_QUERY = """
+    INSERT INTO {table} (bucket, status, log_level, request_count)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE request_count = request_count + VALUES(request_count)
+"""
+
+# Số request / lỗi theo bucket của bảng tổng hợp (biểu đồ lưu lượng theo thời gian)
+RATE_QUERY = """
+    SELECT bucket, SUM(request_count), SUM(CASE WHEN status >= 400 THEN request_count ELSE 0 END)
+    FROM {table}
+    WHERE {where}
+    GROUP BY bucket
+    ORDER BY bucket
+"""
+
+# Sketch theo giờ: mỗi dòng giữ LogSketches.to_bytes() của một giờ
+SKETCH_TABLE = 'log_sketch_hour'
+
+# Khóa dòng của giờ (tạo dòng rỗng nếu chưa có) trước khi đọc - gộp - ghi lại sketch;
+# ON DUPLICATE KEY UPDATE luôn giữ khóa X trên dòng nên các writer không đọc chồng nhau
+SKETCH_LOCK_QUERY = f"""
+    INSERT INTO {SKETCH_TABLE} (bucket, sketch) VALUES (%s, '')
+    ON DUPLICATE KEY UPDATE bucket = bucket
+"""
+
+# Số row_hash mỗi truy vấn kiểm tra dòng đã tồn tại
+ROW_HASH_LOOKUP_SIZE = 1000
+
+_pool = None
+_pool_lock = threading.Lock()
+
 def get_connection_pool():
+    """
+    Connection pool dùng chung cho cả process, tạo ở lần gọi đầu tiên
+    (lần tạo lỗi không được ghi nhớ, lần gọi sau sẽ thử lại)
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            try:
+                _pool = pooling.MySQLConnectionPool(
+                    pool_name="log_pool",
+                    pool_size=DB_POOL_SIZE,  # Số kết nối tối đa trong pool
+                    pool_reset_session=True,
+                    allow_local_infile=DB_LOCAL_INFILE,
+                    **DB_CONFIG
+                )
+                notify.success(" Kết nối database thành công!")
+            except Error as err:
+                notify.error(f" Lỗi tạo connection pool: {err}")
+        return _pool
+
+@timed_query
+def get_cache_generation() -> Optional[int]:
+    """
+    Generation hiện tại của dữ liệu (bảng cache_generation), tăng sau mỗi lần ghi/xóa log
 
+    Returns:
+        int, hoặc None nếu không đọc được (khi đó không dùng cache)
+    """
+    pool = get_connection_pool()
+    if pool is None:
+        return None
     try:
-        pool = pooling.MySQLConnectionPool(
-            pool_name="log_pool",
-            pool_size=5,  # Số kết nối tối đa trong pool
-            pool_reset_session=True,
-            **DB_CONFIG
-        )
-        st.success(" Kết nối database thành công!")
-        return pool
-    except Error as err:
-        st.error(f" Lỗi tạo connection pool: {err}")
+        conn = acquire_connection(pool)
+    except Error:
+        return None
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT generation FROM cache_generation WHERE id = 1")
+        row = cursor.fetchone()
+        return int(row[0]) if row else None
+    except Error:
         return None
+    finally:
+        if cursor:
+            cursor.close()
+        conn.close()
+
+@timed_query
+def bump_cache_generation(conn=None):
+    """
+    Tăng generation để mọi kết quả đã cache (ở mọi process) hết hiệu lực.
+    Nếu truyền conn, câu UPDATE nằm trong transaction của nơi gọi (chưa commit).
+    """
+    query_cache.clear()
+    query = "UPDATE cache_generation SET generation = generation + 1 WHERE id = 1"
+    if conn is not None:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query)
+        finally:
+            cursor.close()
+        return
+
+    pool = get_connection_pool()
+    if pool is None:
+        return
+    conn = acquire_connection(pool)
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query)
+        conn.commit()
+    except Error:
+        conn.rollback()
+    finally:
+        if cursor:
+            cursor.close()
+        conn.close()
+
+def cached_query(func):
+    """
+    Decorator: cache kết quả của hàm đọc theo tên hàm và tham số đã chuẩn hóa.
+
+    Generation được đọc trước khi truy vấn, nên kết quả luôn mới ít nhất bằng
+    generation được gắn. Kết quả rỗng (gồm cả khi truy vấn lỗi) không được cache.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not query_cache.enabled:
+            return func(*args, **kwargs)
+        generation = get_cache_generation()
+        if generation is None:
+            return func(*args, **kwargs)
+
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = (func.__name__, normalize_params(bound.arguments))
+
+        hit, value = query_cache.get(key, generation)
+        metrics.incr("db.cache_hits" if hit else "db.cache_misses")
+        if hit:
+            return value
+        value = func(*args, **kwargs)
+        if value is not None and len(value) > 0:
+            query_cache.put(key, generation, value)
+        return value
+
+    return wrapper
+
+def get_query_cache_stats() -> Optional[Dict]:
+    """
+    Bộ đếm của cache truy vấn (hits, misses, hit_rate, evictions, expired, invalidated, entries, bytes)
+    """
+    return query_cache.stats()
 
 @contextmanager # Cho phép sử dụng với 'with' statement và 'as' và đảm bảo đóng kết nối.
 def get_db_connection():
@@ -43,57 +258,615 @@ def get_db_connection():
     
     conn = None
     try:
-        conn = pool.get_connection()
+        with metrics.timer("db.pool_wait"):
+            conn = pool.get_connection()
         yield conn
     except Error as err:
-        st.error(f"Lỗi kết nối database: {err}")
+        notify.error(f"Lỗi kết nối database: {err}")
         yield None
     finally:
         if conn and conn.is_connected():
             conn.close()
 
-def get_data_to_dataframe() -> pd.DataFrame:
+def get_data_to_dataframe(chunksize: int = 100_000) -> LogDataset:
     """
     Lấy toàn bộ dữ liệu từ bảng server_logs
     
+    Dữ liệu được đọc theo từng trang keyset và chuyển ngay sang dạng cột gọn,
+    nên không giữ DataFrame dạng object của toàn bộ bảng trong bộ nhớ.
+    Để duyệt bảng lớn nên dùng fetch_log_page thay vì tải toàn bộ.
+    
+    Args:
+        chunksize: Số dòng đọc mỗi lần
+    
     Returns:
-        pd.DataFrame: DataFrame chứa dữ liệu log, hoặc DataFrame rỗng nếu lỗi
+        LogDataset: Dữ liệu log dạng gọn, hoặc dataset rỗng nếu lỗi
     """
-    with get_db_connection() as conn:
-        if conn is None:
-            st.warning(" Không thể kết nối database")
-            return pd.DataFrame()
+    try:
+        dataset = LogDataset.concat(iter_log_pages(page_size=chunksize))
+        notify.success(f"Đã tải {len(dataset)} bản ghi từ database")
+        return dataset
         
+    except Exception as e:
+        notify.error(f" Lỗi khi đọc dữ liệu: {e}")
+        return LogDataset()
+
+@timed_query
+def fetch_log_page(
+    after: Optional[Tuple] = None,
+    page_size: int = DB_PAGE_SIZE,
+    **filters
+) -> Tuple[LogDataset, Optional[Tuple]]:
+    """
+    Đọc một trang server_logs (mới nhất trước) bằng keyset pagination
+    
+    Hàm không gọi Streamlit nên có thể chạy trong thread để prefetch trang kế tiếp.
+    
+    Args:
+        after: Cursor (timestamp, id) của dòng cuối trang trước, None cho trang đầu
+        page_size: Số dòng mỗi trang
+        **filters: log_level, status, ip_address (so khớp bằng)
+    
+    Returns:
+        tuple: (LogDataset của trang, cursor trang kế tiếp hoặc None nếu là trang cuối)
+    
+    Raises:
+        Error: Nếu không có connection pool hoặc truy vấn lỗi
+    """
+    pool = get_connection_pool()
+    if pool is None:
+        raise Error("Không có connection pool")
+    
+    where, params = _page_filters(after, filters)
+    conn = acquire_connection(pool)
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        # Đọc thêm một dòng để biết còn trang sau hay không
+        cursor.execute(PAGE_QUERY.format(where=where), params + [page_size + 1])
+        rows = cursor.fetchall()
+    finally:
+        if cursor:
+            cursor.close()
+        conn.close()
+    
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    page = LogDataset.from_dataframe(pd.DataFrame(rows, columns=PAGE_COLUMNS))
+    next_cursor = (rows[-1][2], rows[-1][0]) if has_next else None
+    return page, next_cursor
+
+def iter_log_pages(page_size: int = DB_PAGE_SIZE, **filters) -> Iterator[LogDataset]:
+    """
+    Duyệt lần lượt các trang server_logs theo keyset, mỗi trang một truy vấn ngắn
+    """
+    after = None
+    while True:
+        page, after = fetch_log_page(after, page_size, **filters)
+        if not page.empty:
+            yield page
+        if after is None:
+            return
+
+def acquire_connection(pool, timeout: float = DB_POOL_TIMEOUT):
+    """
+    Lấy một kết nối từ pool, chờ tối đa `timeout` giây nếu pool đang hết kết nối
+
+    Raises:
+        pooling.PoolError: Nếu hết thời gian chờ
+    """
+    with metrics.timer("db.pool_wait"):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return pool.get_connection()
+            except pooling.PoolError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.05)
+
+
+def iter_batches(records: Iterable[Tuple], batch_size: int = DB_BATCH_SIZE) -> Iterator[List[Tuple]]:
+    """
+    Chia records thành các batch có tối đa batch_size phần tử
+    """
+    iterator = iter(records)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _insert_batch_executemany(conn, batch: List[Tuple]) -> int:
+    """
+    Ghi một batch bằng executemany (connector gộp thành một câu INSERT nhiều dòng)
+    """
+    query = INSERT_DEDUP_QUERY if len(batch[0]) == 6 else INSERT_QUERY
+    cursor = conn.cursor()
+    try:
+        cursor.executemany(query, batch)
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+
+def _insert_batch_load_data(conn, batch: List[Tuple]) -> int:
+    """
+    Ghi một batch bằng LOAD DATA LOCAL INFILE qua file CSV tạm
+    """
+    dedup = len(batch[0]) == 6
+
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', newline='', encoding='utf-8') as tmp:
+        writer = csv.writer(tmp, lineterminator='\n')
+        if dedup:
+            writer.writerows(row[:5] + (row[5].hex(),) for row in batch)
+        else:
+            writer.writerows(batch)
+        tmp.flush()
+
+        cursor = conn.cursor()
         try:
-            query = "SELECT * FROM server_logs ORDER BY timestamp DESC"
-            df = pd.read_sql(query, conn)
-            
-            df.rename(columns={'ip_address': 'ip'}, inplace=True)
-            # Convert timestamp sang datetime nếu chưa phải
-            if 'timestamp' in df.columns:
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-            
-            st.success(f"Đã tải {len(df)} bản ghi từ database")
-            return df
-            
+            cursor.execute(LOAD_DATA_DEDUP_QUERY if dedup else LOAD_DATA_QUERY, (tmp.name,))
+            return cursor.rowcount
+        finally:
+            cursor.close()
+
+
+def _minute_bucket(ts: datetime) -> datetime:
+    return ts.replace(second=0, microsecond=0)
+
+
+def _hour_bucket(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def _filter_existing_rows(conn, batch: List[Tuple]) -> List[Tuple]:
+    """
+    Bỏ các dòng có row_hash đã nằm trong server_logs, để bảng tổng hợp
+    chỉ đếm những dòng thực sự được ghi
+    """
+    existing = set()
+    cursor = conn.cursor()
+    try:
+        for start in range(0, len(batch), ROW_HASH_LOOKUP_SIZE):
+            chunk = batch[start:start + ROW_HASH_LOOKUP_SIZE]
+            hashes = [row[5] for row in chunk]
+            timestamps = [row[1] for row in chunk]
+            placeholders = ", ".join(["%s"] * len(hashes))
+            # Khoảng thời gian của chunk giúp MySQL chỉ tìm trong các partition liên quan
+            cursor.execute(f"""
+                SELECT row_hash FROM server_logs
+                WHERE row_hash IN ({placeholders}) AND timestamp BETWEEN %s AND %s
+            """, hashes + [min(timestamps), max(timestamps)])
+            existing.update(bytes(row[0]) for row in cursor.fetchall())
+    finally:
+        cursor.close()
+    return [row for row in batch if row[5] not in existing]
+
+
+def _upsert_rollups(conn, batch: List[Tuple]):
+    """
+    Cộng số lượng của batch vào log_rollup_minute và log_rollup_hour.
+    Các khóa được ghi theo thứ tự tăng dần để các writer song song luôn khóa
+    dòng theo cùng thứ tự (tránh deadlock).
+    """
+    minutes = Counter((_minute_bucket(row[1]), int(row[2]), row[3]) for row in batch)
+    hours = Counter()
+    for (bucket, status, level), count in minutes.items():
+        hours[(_hour_bucket(bucket), status, level)] += count
+
+    cursor = conn.cursor()
+    try:
+        for table, counts in ((ROLLUP_TABLES['minute'], minutes), (ROLLUP_TABLES['hour'], hours)):
+            rows = [key + (count,) for key, count in sorted(counts.items())]
+            cursor.executemany(ROLLUP_UPSERT_QUERY.format(table=table), rows)
+    finally:
+        cursor.close()
+
+
+def _recompute_rollups(conn, start: datetime, end: datetime):
+    """
+    Tính lại bảng tổng hợp cho các giờ nằm trong [start, end] từ server_logs
+    (dùng khi không xác định được chính xác các dòng đã ghi)
+    """
+    start, end = _hour_bucket(start), _hour_bucket(end) + timedelta(hours=1)
+    cursor = conn.cursor()
+    try:
+        for table in ROLLUP_TABLES.values():
+            cursor.execute(f"DELETE FROM {table} WHERE bucket >= %s AND bucket < %s", (start, end))
+        cursor.execute(f"""
+            INSERT INTO {ROLLUP_TABLES['minute']} (bucket, status, log_level, request_count)
+            SELECT DATE_FORMAT(timestamp, '%%Y-%%m-%%d %%H:%%i:00'), status, log_level, COUNT(*)
+            FROM server_logs
+            WHERE timestamp >= %s AND timestamp < %s
+            GROUP BY 1, status, log_level
+        """, (start, end))
+        cursor.execute(f"""
+            INSERT INTO {ROLLUP_TABLES['hour']} (bucket, status, log_level, request_count)
+            SELECT DATE_FORMAT(bucket, '%%Y-%%m-%%d %%H:00:00'), status, log_level, SUM(request_count)
+            FROM {ROLLUP_TABLES['minute']}
+            WHERE bucket >= %s AND bucket < %s
+            GROUP BY 1, status, log_level
+        """, (start, end))
+    finally:
+        cursor.close()
+
+
+def _hour_sketches(batch: List[Tuple]) -> Dict[datetime, LogSketches]:
+    """
+    Sketch của batch theo từng giờ
+    """
+    rows_by_hour = {}
+    for position, row in enumerate(batch):
+        rows_by_hour.setdefault(_hour_bucket(row[1]), []).append(position)
+
+    ips = ipv4_to_uint32([row[0] for row in batch])
+    statuses = np.fromiter((row[2] for row in batch), dtype=np.int64, count=len(batch))
+    sketches = {}
+    for hour, positions in rows_by_hour.items():
+        sketches[hour] = LogSketches()
+        sketches[hour].update(ips[positions], statuses[positions])
+    return sketches
+
+
+def _merge_sketches(conn, batch: List[Tuple]):
+    """
+    Gộp sketch của batch vào log_sketch_hour. Các giờ được khóa theo thứ tự
+    tăng dần như _upsert_rollups để các writer song song không deadlock.
+    """
+    cursor = conn.cursor()
+    try:
+        for hour, sketch in sorted(_hour_sketches(batch).items()):
+            cursor.execute(SKETCH_LOCK_QUERY, (hour,))
+            cursor.execute(f"SELECT sketch FROM {SKETCH_TABLE} WHERE bucket = %s", (hour,))
+            stored = cursor.fetchone()[0]
+            if stored:
+                sketch.merge(LogSketches.from_bytes(bytes(stored)))
+            cursor.execute(f"UPDATE {SKETCH_TABLE} SET sketch = %s WHERE bucket = %s",
+                           (sketch.to_bytes(), hour))
+    finally:
+        cursor.close()
+
+
+def _recompute_sketches(conn, start: datetime, end: datetime):
+    """
+    Tính lại sketch cho các giờ nằm trong [start, end] từ server_logs, chỉ với
+    các giờ có dữ liệu theo log_rollup_hour (gọi sau _recompute_rollups)
+    """
+    start, end = _hour_bucket(start), _hour_bucket(end) + timedelta(hours=1)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DELETE FROM {SKETCH_TABLE} WHERE bucket >= %s AND bucket < %s", (start, end))
+        cursor.execute(f"""
+            SELECT DISTINCT bucket FROM {ROLLUP_TABLES['hour']}
+            WHERE bucket >= %s AND bucket < %s ORDER BY bucket
+        """, (start, end))
+        for (hour,) in cursor.fetchall():
+            cursor.execute("""
+                SELECT ip_address, status FROM server_logs
+                WHERE timestamp >= %s AND timestamp < %s
+            """, (hour, hour + timedelta(hours=1)))
+            sketch = LogSketches()
+            for rows in iter(lambda: cursor.fetchmany(DB_BATCH_SIZE), []):
+                ips, statuses = zip(*rows)
+                sketch.update(ipv4_to_uint32(ips), statuses)
+            if not sketch.total:
+                continue
+            cursor.execute(f"INSERT INTO {SKETCH_TABLE} (bucket, sketch) VALUES (%s, %s)",
+                           (hour, sketch.to_bytes()))
+    finally:
+        cursor.close()
+
+
+def _read_sketches(conn, start_date: Optional[str] = None,
+                   end_date: Optional[str] = None) -> Optional[LogSketches]:
+    """
+    Gộp sketch của các giờ trong khoảng [start_date, end_date] (cùng quy ước với
+    build_log_filters trên bảng tổng hợp)
+
+    Returns:
+        LogSketches, hoặc None nếu không có sketch nào
+    """
+    where, params = build_log_filters(start_date, end_date, time_column="bucket")
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT sketch FROM {SKETCH_TABLE} WHERE {where}", params)
+        return LogSketches.merge_all(LogSketches.from_bytes(bytes(row[0]))
+                                     for row in cursor.fetchall() if row[0])
+    finally:
+        cursor.close()
+
+
+def _write_batch(conn, batch: List[Tuple], insert_batch) -> int:
+    """
+    Ghi một batch và cập nhật bảng tổng hợp, sketch trong cùng transaction (chưa commit)
+
+    Returns:
+        Số dòng đã ghi
+    """
+    if len(batch[0]) == 6:
+        with metrics.timer("save.dedup_lookup"):
+            batch = _filter_existing_rows(conn, batch)
+        if not batch:
+            return 0
+
+    with metrics.timer("save.insert"):
+        inserted = insert_batch(conn, batch)
+    if inserted == len(batch):
+        with metrics.timer("save.rollups"):
+            _upsert_rollups(conn, batch)
+        with metrics.timer("save.sketches"):
+            _merge_sketches(conn, batch)
+    else:
+        # Một phần batch bị bỏ qua do writer khác vừa ghi cùng row_hash
+        timestamps = [row[1] for row in batch]
+        with metrics.timer("save.recompute"):
+            _recompute_rollups(conn, min(timestamps), max(timestamps))
+            _recompute_sketches(conn, min(timestamps), max(timestamps))
+    return inserted
+
+
+def bulk_save_batches(
+    batches: Iterable[List[Tuple]],
+    workers: int = DB_WRITERS,
+    use_load_data: bool = False,
+    queue_batches: int = DB_QUEUE_BATCHES
+) -> Dict:
+    """
+    Ghi các batch log vào database theo pipeline producer / consumer.
+
+    Một thread producer duyệt `batches` (thường là generator parse file, nên việc
+    parse diễn ra ở đây) và đẩy batch vào hàng đợi giới hạn queue_batches batch;
+    các thread writer lấy batch ra và ghi song song trên các kết nối của pool.
+    Parse và ghi chạy chồng lên nhau nên tổng thời gian gần max(parse, insert)
+    thay vì tổng của hai giai đoạn. Hàng đợi đầy thì producer bị chặn
+    (backpressure), nên bộ nhớ tối đa khoảng (queue_batches + workers + 1) batch.
+
+    Mỗi batch được commit riêng: một batch lỗi chỉ rollback batch đó, các batch
+    khác vẫn được lưu. Bảng tổng hợp theo phút/giờ và sketch theo giờ được cập
+    nhật trong cùng transaction với batch. Hàm không gọi Streamlit nên dùng được trong thread/CLI.
+    Lỗi khi tạo batch (đọc / parse file) được raise lại sau khi các writer dừng.
+
+    Args:
+        batches: Iterable các list tuple (ip_address, timestamp, status, log_level, response),
+                 có thể thêm row_hash ở cuối để bỏ qua dòng đã có trong bảng
+        workers: Số thread ghi (mỗi thread giữ một kết nối trong pool)
+        use_load_data: Dùng LOAD DATA LOCAL INFILE thay vì executemany
+        queue_batches: Số batch tối đa nằm chờ trong hàng đợi
+
+    Returns:
+        dict: Báo cáo gồm rows_inserted, batches, failed_batches (list lỗi từng batch),
+              elapsed_sec, rows_per_sec, stages (thông lượng từng giai đoạn: parse,
+              insert, queue_peak)
+    """
+    report = {
+        'rows_inserted': 0,
+        'batches': 0,
+        'failed_batches': [],
+        'elapsed_sec': 0.0,
+        'rows_per_sec': 0.0,
+        'stages': {},
+    }
+
+    pool = get_connection_pool()
+    if pool is None:
+        report['failed_batches'].append({'batch': None, 'rows': 0, 'error': "Không có connection pool"})
+        return report
+
+    insert_batch = _insert_batch_load_data if use_load_data else _insert_batch_executemany
+    workers = max(1, min(workers, DB_POOL_SIZE))
+    pending = queue.Queue(maxsize=max(1, queue_batches))
+    lock = threading.Lock()
+    # Bộ đếm giai đoạn: parse (producer) và insert (tổng của các writer)
+    counters = {'parsed_rows': 0, 'parse_sec': 0.0, 'backpressure_sec': 0.0,
+                'written_rows': 0, 'insert_sec': 0.0, 'starved_sec': 0.0, 'queue_peak': 0}
+    producer_error = []
+    start = time.perf_counter()
+
+    def producer():
+        iterator = iter(batches)
+        batch_no = 0
+        try:
+            while True:
+                t0 = time.perf_counter()
+                batch = next(iterator, None)
+                t1 = time.perf_counter()
+                counters['parse_sec'] += t1 - t0
+                if batch is None:
+                    return
+                counters['parsed_rows'] += len(batch)
+                # Chặn khi hàng đợi đầy cho đến khi một writer lấy bớt batch
+                pending.put((batch_no, batch))
+                counters['backpressure_sec'] += time.perf_counter() - t1
+                counters['queue_peak'] = max(counters['queue_peak'], pending.qsize())
+                batch_no += 1
         except Exception as e:
-            st.error(f" Lỗi khi đọc dữ liệu: {e}")
-            return pd.DataFrame()
+            producer_error.append(e)
+        finally:
+            for _ in range(workers):
+                pending.put(None)
+
+    def writer():
+        conn = None
+        try:
+            while True:
+                # Thời gian chờ batch kế tiếp: parser chậm hơn phần ghi
+                t0 = time.perf_counter()
+                with metrics.timer("save.wait_input"):
+                    item = pending.get()
+                t1 = time.perf_counter()
+                if item is None:
+                    return
+                batch_no, batch = item
+
+                try:
+                    if conn is None or not conn.is_connected():
+                        conn = acquire_connection(pool)
+                    inserted = _write_batch(conn, batch, insert_batch)
+                    with metrics.timer("save.commit"):
+                        conn.commit()
+                except Exception as e:
+                    if conn is not None:
+                        try:
+                            conn.rollback()
+                        except Error:
+                            conn = None
+                    with lock:
+                        report['batches'] += 1
+                        report['failed_batches'].append({'batch': batch_no, 'rows': len(batch), 'error': str(e)})
+                    continue
+                finally:
+                    with lock:
+                        counters['starved_sec'] += t1 - t0
+                        counters['insert_sec'] += time.perf_counter() - t1
+
+                with lock:
+                    report['batches'] += 1
+                    report['rows_inserted'] += inserted
+                    counters['written_rows'] += len(batch)
+        finally:
+            if conn is not None and conn.is_connected():
+                conn.close()
+
+    with ThreadPoolExecutor(max_workers=workers + 1) as executor:
+        futures = [executor.submit(writer) for _ in range(workers)]
+        futures.append(executor.submit(producer))
+        for future in futures:
+            future.result()
+
+    if report['rows_inserted']:
+        bump_cache_generation()
 
-def save_log_data(list_data: List[Tuple]) -> bool:
+    report['elapsed_sec'] = time.perf_counter() - start
+    report['stages'] = {
+        'parse': _stage_report(counters['parsed_rows'], counters['parse_sec'], counters['backpressure_sec']),
+        'insert': _stage_report(counters['written_rows'], counters['insert_sec'], counters['starved_sec'], workers),
+        'queue_peak': counters['queue_peak'],
+    }
+    metrics.observe("save.produce", counters['parse_sec'])
+    metrics.observe("save.backpressure", counters['backpressure_sec'])
+    metrics.observe("save.total", report['elapsed_sec'])
+    metrics.incr("save.rows", report['rows_inserted'])
+    metrics.incr("save.batches", report['batches'])
+    metrics.incr("save.failed_batches", len(report['failed_batches']))
+    if report['elapsed_sec'] > 0:
+        report['rows_per_sec'] = report['rows_inserted'] / report['elapsed_sec']
+    report['failed_batches'].sort(key=lambda item: item['batch'])
+
+    if producer_error:
+        raise producer_error[0]
+    return report
+
+
+def bulk_save_log_data(
+    list_data: Iterable[Tuple],
+    batch_size: int = DB_BATCH_SIZE,
+    workers: int = DB_WRITERS,
+    use_load_data: bool = False
+) -> Dict:
+    """
+    Chia dữ liệu thành batch batch_size dòng và ghi bằng bulk_save_batches
+    """
+    return bulk_save_batches(iter_batches(list_data, batch_size), workers=workers,
+                             use_load_data=use_load_data)
+
+
+def save_log_data(list_data: List[Tuple], batch_size: int = DB_BATCH_SIZE,
+                  use_load_data: bool = DB_LOCAL_INFILE) -> bool:
     """
     Lưu danh sách log vào database
     
+    Dữ liệu được ghi theo từng batch (commit riêng từng batch) song song trên
+    các kết nối của pool, thay vì một transaction lớn cho toàn bộ file.
+    
     Args:
-        list_data: List các tuple (ip_address, timestamp, status, log_level, response)
+        list_data: List các tuple (ip_address, timestamp, status, log_level, response[, row_hash]);
+                   tuple có row_hash chỉ được ghi nếu chưa có dòng cùng hash
+        batch_size: Số dòng mỗi batch
+        use_load_data: Dùng LOAD DATA LOCAL INFILE (cần DB_LOCAL_INFILE=1 và local_infile trên server)
     
     Returns:
-        bool: True nếu thành công, False nếu có lỗi
+        bool: True nếu mọi batch đều thành công, False nếu có lỗi
     """ 
     if not list_data:
-        st.warning("Không có dữ liệu để lưu")
+        notify.warning("Không có dữ liệu để lưu")
         return False
     
+    report = bulk_save_log_data(list_data, batch_size=batch_size, use_load_data=use_load_data)
+    return show_save_report(report)
+
+
+def save_dataframe(data, batch_size: int = DB_BATCH_SIZE,
+                   use_load_data: bool = DB_LOCAL_INFILE) -> bool:
+    """
+    Lưu trực tiếp DataFrame hoặc LogDataset vào database
+
+    Dữ liệu được chuyển sang kiểu Python gốc theo từng chunk và đưa thẳng vào
+    bulk insert, không tạo list tuple cho toàn bộ dữ liệu.
+
+    Args:
+        data: pd.DataFrame (cột ip/ip_address, timestamp, status, log_level, response) hoặc LogDataset
+        batch_size: Số dòng mỗi batch
+        use_load_data: Dùng LOAD DATA LOCAL INFILE
+
+    Returns:
+        bool: True nếu mọi batch đều thành công
+    """
+    if data is None or data.empty:
+        notify.warning("Không có dữ liệu để lưu")
+        return False
+
+    if isinstance(data, LogDataset):
+        batches = data.iter_record_batches(batch_size)
+    else:
+        batches = iter_dataframe_batches(data, batch_size)
+
+    report = bulk_save_batches(batches, use_load_data=use_load_data)
+    return show_save_report(report)
+
+
+@timed_query
+def get_last_ingest(head_hash: bytes) -> Optional[dict]:
+    """
+    Lấy lần nạp gần nhất (range_end lớn nhất) của file có head_hash trong ingest_manifest
+
+    Returns:
+        dict (range_start, range_end, tail_hash, ...) hoặc None nếu file chưa từng được nạp
+    """
+    with get_db_connection() as conn:
+        if conn is None:
+            return None
+        
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT source_name, range_start, range_end, tail_hash, rows_inserted, loaded_at
+                FROM ingest_manifest
+                WHERE head_hash = %s
+                ORDER BY range_end DESC
+                LIMIT 1
+            """, (head_hash,))
+            return cursor.fetchone()
+            
+        except Error as e:
+            notify.error(f"Lỗi khi đọc ingest_manifest: {e}")
+            return None
+            
+        finally:
+            if cursor:
+                cursor.close()
+
+@timed_query
+def record_ingest(entry: dict) -> bool:
+    """
+    Ghi một lần nạp file vào ingest_manifest
+    
+    Args:
+        entry: dict gồm source_name, head_hash, tail_hash, range_start, range_end,
+               rows_parsed, rows_inserted
+    """
     with get_db_connection() as conn:
         if conn is None:
             return False
@@ -101,32 +874,69 @@ def save_log_data(list_data: List[Tuple]) -> bool:
         cursor = None
         try:
             cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO ingest_manifest
+                (source_name, head_hash, tail_hash, range_start, range_end, rows_parsed, rows_inserted)
+                VALUES (%(source_name)s, %(head_hash)s, %(tail_hash)s, %(range_start)s,
+                        %(range_end)s, %(rows_parsed)s, %(rows_inserted)s)
+            """, entry)
+            conn.commit()
+            return True
             
-            query = """
-                INSERT INTO server_logs 
-                (ip_address, timestamp, status, log_level, response) 
-                VALUES (%s, %s, %s, %s, %s)
-            """
+        except Error as e:
+            notify.error(f"Lỗi khi ghi ingest_manifest: {e}")
+            if conn:
+                conn.rollback()
+            return False
+            
+        finally:
+            if cursor:
+                cursor.close()
 
-            cursor.executemany(query, list_data)
+@timed_query
+def clear_all_logs() -> bool:
+    """
+    Xóa toàn bộ dữ liệu trong bảng server_logs
+    
+    Dùng TRUNCATE (xóa và tạo lại bảng/partition) thay vì DELETE từng dòng.
+    Bảng tổng hợp, sketch và ingest_manifest cũng được xóa để có thể nạp lại các file cũ.
+    
+    Returns:
+        bool: True nếu thành công
+    """
+    with get_db_connection() as conn:
+        if conn is None:
+            return False
+        
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            # TRUNCATE không trả về số dòng: lấy từ bảng tổng hợp trước khi xóa
+            cursor.execute(f"SELECT COALESCE(SUM(request_count), 0) FROM {ROLLUP_TABLES['hour']}")
+            deleted = int(cursor.fetchone()[0])
+            for table in ("server_logs", *ROLLUP_TABLES.values(), SKETCH_TABLE, "ingest_manifest"):
+                cursor.execute(f"TRUNCATE TABLE {table}")
+            bump_cache_generation(conn)
             conn.commit()
             
-            st.success(f"Đã lưu {cursor.rowcount} vào database")
+            notify.success(f"Đã xóa {deleted} bản ghi")
             return True
             
         except Error as e:
-            st.error(f" Lỗi khi lưu dữ liệu: {e}")
+            notify.error(f"Lỗi khi xóa dữ liệu: {e}")
             if conn:
-                conn.rollback()  # Rollback nếu có lỗi
+                conn.rollback()
             return False
             
         finally:
             if cursor:
                 cursor.close()
 
-def clear_all_logs() -> bool:
+@timed_query
+def rebuild_rollups() -> bool:
     """
-    Xóa toàn bộ dữ liệu trong bảng server_logs
+    Tính lại toàn bộ log_rollup_minute, log_rollup_hour và log_sketch_hour từ server_logs
+    (backfill cho dữ liệu nạp trước khi có bảng tổng hợp)
     
     Returns:
         bool: True nếu thành công
@@ -138,14 +948,21 @@ def clear_all_logs() -> bool:
         cursor = None
         try:
             cursor = conn.cursor()
-            cursor.execute("DELETE FROM server_logs")
+            cursor.callproc('rebuild_log_rollups')
+            cursor.execute(f"SELECT MIN(bucket), MAX(bucket) FROM {ROLLUP_TABLES['hour']}")
+            first, last = cursor.fetchone()
+            if first is not None:
+                _recompute_sketches(conn, first, last)
+            else:
+                cursor.execute(f"DELETE FROM {SKETCH_TABLE}")
             conn.commit()
+            query_cache.clear()
             
-            st.success(f"Đã xóa {cursor.rowcount} bản ghi")
+            notify.success("Đã tính lại bảng tổng hợp")
             return True
             
         except Error as e:
-            st.error(f"Lỗi khi xóa dữ liệu: {e}")
+            notify.error(f"Lỗi khi tính lại bảng tổng hợp: {e}")
             if conn:
                 conn.rollback()
             return False
@@ -154,6 +971,97 @@ def clear_all_logs() -> bool:
             if cursor:
                 cursor.close()
 
+@timed_query
+def maintain_partitions(days_ahead: int = PARTITION_DAYS_AHEAD,
+                        retention_days: int = LOG_RETENTION_DAYS) -> Optional[int]:
+    """
+    Tạo trước partition theo ngày và (nếu retention_days > 0) xóa các partition cũ
+    
+    Args:
+        days_ahead: Số ngày tới cần có partition sẵn
+        retention_days: Số ngày dữ liệu được giữ lại, 0 = không xóa
+    
+    Returns:
+        int: Số dòng đã xóa, hoặc None nếu lỗi
+    """
+    with get_db_connection() as conn:
+        if conn is None:
+            return None
+        
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            cursor.callproc('add_log_partitions', (days_ahead,))
+            deleted = 0
+            if retention_days > 0:
+                cursor.callproc('clean_old_logs', (retention_days,))
+                for result in cursor.stored_results():
+                    row = result.fetchone()
+                    if row:
+                        deleted = int(row[0])
+            conn.commit()
+            if deleted:
+                query_cache.clear()
+            return deleted
+            
+        except Error as e:
+            notify.error(f"Lỗi khi bảo trì partition: {e}")
+            return None
+            
+        finally:
+            if cursor:
+                cursor.close()
+
+@timed_query
+def get_partitions() -> pd.DataFrame:
+    """
+    Danh sách partition của server_logs (tên, mốc trên, số dòng ước lượng)
+    """
+    with get_db_connection() as conn:
+        if conn is None:
+            return pd.DataFrame()
+        
+        try:
+            return pd.read_sql("""
+                SELECT PARTITION_NAME as name, PARTITION_DESCRIPTION as less_than,
+                       TABLE_ROWS as approx_rows, DATA_LENGTH + INDEX_LENGTH as bytes
+                FROM information_schema.PARTITIONS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'server_logs'
+                ORDER BY PARTITION_ORDINAL_POSITION
+            """, conn)
+        except Exception as e:
+            notify.error(f"Lỗi khi đọc partition: {e}")
+            return pd.DataFrame()
+
+@timed_query
+def explain_partitions(**filters) -> List[str]:
+    """
+    Các partition mà truy vấn của get_logs_by_filters sẽ đọc (theo EXPLAIN),
+    dùng để kiểm tra partition pruning
+    
+    Args:
+        **filters: Tham số giống get_logs_by_filters
+    """
+    where, params = build_log_filters(**filters)
+    with get_db_connection() as conn:
+        if conn is None:
+            return []
+        
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(f"EXPLAIN SELECT * FROM server_logs WHERE {where}", params)
+            partitions = cursor.fetchone().get('partitions') or ''
+            return partitions.split(',') if partitions else []
+        except Error as e:
+            notify.error(f"Lỗi khi EXPLAIN: {e}")
+            return []
+        finally:
+            if cursor:
+                cursor.close()
+
+@cached_query
+@timed_query
 def get_logs_by_filters(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
@@ -180,35 +1088,9 @@ def get_logs_by_filters(
         if conn is None:
             return pd.DataFrame()
         
-        # Build query động dựa trên filters
-        query = "SELECT * FROM server_logs WHERE 1=1"
-        params = []
-        
-        if start_date:
-            query += " AND timestamp >= %s"
-            params.append(start_date)
-        
-        if end_date:
-            query += " AND timestamp <= %s"
-            params.append(end_date)
-        
-        if log_level:
-            query += " AND log_level = %s"
-            params.append(log_level)
-        
-        if ip_address:
-            query += " AND ip_address = %s"
-            params.append(ip_address)
-        
-        if min_status:
-            query += " AND status >= %s"
-            params.append(min_status)
-        
-        if max_status:
-            query += " AND status <= %s"
-            params.append(max_status)
-        
-        query += " ORDER BY timestamp DESC"
+        where, params = build_log_filters(start_date, end_date, log_level, ip_address,
+                                          min_status, max_status)
+        query = f"SELECT * FROM server_logs WHERE {where} ORDER BY timestamp DESC"
         
         try:
             df = pd.read_sql(query, conn, params=params)
@@ -216,13 +1098,125 @@ def get_logs_by_filters(
                 df['timestamp'] = pd.to_datetime(df['timestamp'])
             return df
         except Exception as e:
-            st.error(f"Lỗi khi lọc dữ liệu: {e}")
+            notify.error(f"Lỗi khi lọc dữ liệu: {e}")
             return pd.DataFrame()
 
+@cached_query
+@timed_query
+def get_dashboard_aggregates(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    log_level: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    min_status: Optional[int] = None,
+    max_status: Optional[int] = None,
+    top_k: int = 10
+) -> dict:
+    """
+    Tính các chỉ số của Dashboard ngay trong MySQL, chỉ trả về kết quả đã tổng hợp
+    
+    Tổng số request, số lỗi và phân bố status được đọc từ log_rollup_minute khi
+    không lọc theo IP (mốc thời gian chính xác tới phút). Khi chỉ lọc theo thời
+    gian, số IP khác nhau, top IP và top IP lỗi 404 được ước lượng bằng cách gộp
+    sketch theo giờ (log_sketch_hour) thay vì quét server_logs; nếu sketch không
+    phủ đủ số request của khoảng (dữ liệu nạp ngoài ứng dụng) thì GROUP BY trên server_logs.
+    
+    Args:
+        start_date, end_date, log_level, ip_address, min_status, max_status:
+            Bộ lọc giống get_logs_by_filters
+        top_k: Số IP nhiều request nhất cần lấy
+    
+    Returns:
+        dict: total_requests, error_count, error_rate (%), status_counts (pd.Series status -> số request),
+              unique_ips, unique_ips_error, top_ips, top_ips_error, top_404_ips, top_404_ips_error
+              (pd.Series IP -> số request / sai số tối đa), approximate (True nếu lấy từ sketch);
+              dict rỗng nếu lỗi
+    """
+    filters = (start_date, end_date, log_level, ip_address, min_status, max_status)
+    
+    with get_db_connection() as conn:
+        if conn is None:
+            return {}
+        
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            where, params = build_log_filters(*filters)
+            
+            # Phân bố status (kèm tổng số và số lỗi)
+            if ip_address:
+                cursor.execute(f"""
+                    SELECT status, COUNT(*) FROM server_logs
+                    WHERE {where} GROUP BY status ORDER BY 2 DESC
+                """, params)
+            else:
+                rollup_where, rollup_params = build_log_filters(*filters, time_column="bucket")
+                cursor.execute(f"""
+                    SELECT status, SUM(request_count) FROM {ROLLUP_TABLES['minute']}
+                    WHERE {rollup_where} GROUP BY status ORDER BY 2 DESC
+                """, rollup_params)
+            status_rows = cursor.fetchall()
+            total = sum(int(count) for _, count in status_rows)
+            
+            sketches = None
+            if DB_USE_SKETCHES and not any((log_level, ip_address, min_status, max_status)):
+                sketches = _read_sketches(conn, start_date, end_date)
+            
+            if sketches is not None and sketches.total == total:
+                ip_summary = dict(sketches.summary(top_k), approximate=True)
+            else:
+                ip_summary = _exact_ip_summary(cursor, where, params, top_k)
+            
+        except Error as e:
+            notify.error(f"Lỗi khi tổng hợp dữ liệu: {e}")
+            return {}
+            
+        finally:
+            if cursor:
+                cursor.close()
+    
+    # Chuyển đổi Decimal thành int
+    status_counts = pd.Series({int(status): int(count) for status, count in status_rows}, dtype="int64")
+    error_count = int(status_counts[status_counts.index >= 400].sum())
+    return {
+        'total_requests': total,
+        'error_count': error_count,
+        'error_rate': (error_count / total * 100) if total else 0.0,
+        'status_counts': status_counts,
+        **ip_summary,
+    }
+
+def _exact_ip_summary(cursor, where: str, params: list, top_k: int) -> dict:
+    """
+    Số IP khác nhau, top IP và top IP lỗi 404 tính chính xác bằng GROUP BY trên server_logs
+    (cùng dạng với LogSketches.summary, sai số bằng 0)
+    """
+    result = {'approximate': False}
+    
+    cursor.execute(f"SELECT COUNT(DISTINCT ip_address) FROM server_logs WHERE {where}", params)
+    result['unique_ips'] = int(cursor.fetchone()[0])
+    result['unique_ips_error'] = 0
+    
+    for name, condition in (('top_ips', ''), ('top_404_ips', ' AND status = 404')):
+        cursor.execute(f"""
+            SELECT ip_address, COUNT(*) FROM server_logs
+            WHERE {where}{condition} GROUP BY ip_address ORDER BY 2 DESC LIMIT %s
+        """, params + [top_k])
+        top = pd.Series({ip: int(count) for ip, count in cursor.fetchall()}, dtype="int64")
+        result[name] = top
+        result[f"{name}_error"] = pd.Series(0, index=top.index, dtype="int64")
+    return result
+
+@cached_query
+@timed_query
 def get_statistics() -> dict:
     """
     Lấy thống kê tổng quan về logs
     
+    Số lượng theo log_level được đọc từ log_rollup_hour; thời gian sớm/muộn nhất
+    lấy qua index idx_timestamp; số IP khác nhau ước lượng từ log_sketch_hour
+    (unique_ips_error là sai số chuẩn) nên không phải quét server_logs.
+    
     Returns:
         dict: Dictionary chứa các thống kê
     """
@@ -237,40 +1231,99 @@ def get_statistics() -> dict:
             # Query thống kê
             stats_query = """
                 SELECT 
-                    COUNT(*) as total_logs,
-                    COUNT(DISTINCT ip_address) as unique_ips,
-                    SUM(CASE WHEN log_level = 'ERROR' THEN 1 ELSE 0 END) as error_count,
-                    SUM(CASE WHEN log_level = 'WARNING' THEN 1 ELSE 0 END) as warning_count,
-                    SUM(CASE WHEN log_level = 'INFO' THEN 1 ELSE 0 END) as info_count,
-                    MIN(timestamp) as earliest_log,
-                    MAX(timestamp) as latest_log
-                FROM server_logs
+                    COALESCE(SUM(request_count), 0) as total_logs,
+                    COALESCE(SUM(CASE WHEN log_level = 'ERROR' THEN request_count END), 0) as error_count,
+                    COALESCE(SUM(CASE WHEN log_level = 'WARNING' THEN request_count END), 0) as warning_count,
+                    COALESCE(SUM(CASE WHEN log_level = 'INFO' THEN request_count END), 0) as info_count
+                FROM log_rollup_hour
             """
             
             cursor.execute(stats_query)
             result = cursor.fetchone()
             
+            # MIN/MAX trên cột có index chỉ đọc một đầu của index
+            cursor.execute("""
+                SELECT 
+                    (SELECT MIN(timestamp) FROM server_logs) as earliest_log,
+                    (SELECT MAX(timestamp) FROM server_logs) as latest_log
+            """)
+            bounds = cursor.fetchone()
+            
+            sketches = _read_sketches(conn) if DB_USE_SKETCHES else None
+            if sketches is not None and sketches.total == int(result.get('total_logs', 0)):
+                unique_ips = sketches.summary(top_n=0)
+            else:
+                cursor.execute("SELECT COUNT(DISTINCT ip_address) as unique_ips FROM server_logs")
+                unique_ips = {'unique_ips': cursor.fetchone().get('unique_ips', 0), 'unique_ips_error': 0}
+            
             if result:
                 # Chuyển đổi Decimal thành int
                 return {
                     'total_logs': int(result.get('total_logs', 0)),
-                    'unique_ips': int(result.get('unique_ips', 0)),
+                    'unique_ips': int(unique_ips['unique_ips']),
+                    'unique_ips_error': int(unique_ips['unique_ips_error']),
                     'error_count': int(result.get('error_count', 0)),
                     'warning_count': int(result.get('warning_count', 0)),
                     'info_count': int(result.get('info_count', 0)),
-                    'earliest_log': result.get('earliest_log'),
-                    'latest_log': result.get('latest_log')
+                    'earliest_log': bounds.get('earliest_log'),
+                    'latest_log': bounds.get('latest_log')
                 }
             return {}
             
         except Error as e:
-            st.error(f"Lỗi khi lấy thống kê: {e}")
+            notify.error(f"Lỗi khi lấy thống kê: {e}")
             return {}
             
         finally:
             if cursor:
                 cursor.close()
 
+@cached_query
+@timed_query
+def get_request_rate(start: Optional[str] = None, end: Optional[str] = None) -> Optional[RateIndex]:
+    """
+    Số request và số lỗi theo thời gian từ bảng tổng hợp, cho biểu đồ lưu lượng.
+    Dùng log_rollup_minute nếu khoảng thời gian không quá RATE_MAX_BUCKETS phút,
+    ngược lại dùng log_rollup_hour, nên số dòng đọc không phụ thuộc số log.
+    
+    Args:
+        start: Thời điểm bắt đầu ('YYYY-MM-DD' hoặc 'YYYY-MM-DD HH:MM:SS')
+        end: Thời điểm kết thúc (bao gồm)
+    
+    Returns:
+        RateIndex (xem modules.timeseries), hoặc None nếu lỗi
+    """
+    with get_db_connection() as conn:
+        if conn is None:
+            return None
+        
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            where, params = build_log_filters(start, end, time_column="bucket")
+            
+            cursor.execute(f"SELECT MIN(bucket), MAX(bucket) FROM {ROLLUP_TABLES['hour']} WHERE {where}", params)
+            first, last = cursor.fetchone()
+            minutes = (last - first).total_seconds() / 60 + 60 if first is not None else 0
+            granularity = 'minute' if minutes <= RATE_MAX_BUCKETS else 'hour'
+            
+            cursor.execute(RATE_QUERY.format(table=ROLLUP_TABLES[granularity], where=where), params)
+            rows = cursor.fetchall()
+            
+        except Error as e:
+            notify.error(f"Lỗi khi lấy lưu lượng theo thời gian: {e}")
+            return None
+            
+        finally:
+            if cursor:
+                cursor.close()
+    
+    buckets = np.array([row[0] for row in rows], dtype="datetime64[s]").astype(np.int64)
+    requests = np.array([row[1] for row in rows], dtype=np.int64)
+    errors = np.array([row[2] for row in rows], dtype=np.int64)
+    return RateIndex.from_counts(buckets, requests, errors, 60 if granularity == 'minute' else 3600)
+
+@timed_query
 def test_connection() -> bool:
     """
     Kiểm tra kết nối database
@@ -280,8 +1333,8 @@ def test_connection() -> bool:
     """
     with get_db_connection() as conn:
         if conn and conn.is_connected():
-            st.success("Database đang hoạt động bình thường")
+            notify.success("Database đang hoạt động bình thường")
             return True
         else:
-            st.error(" Không thể kết nối database")
+            notify.error(" Không thể kết nối database")
             return False
\ No newline at end of file
@@ -0,0 +1,287 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+LOG_COLUMNS = ["ip", "timestamp", "status", "log_level", "response"]
+
+CATEGORY_COLUMNS = ["log_level", "response"]
+
+
+def ipv4_to_uint32(values) -> np.ndarray:
+    """
+    Chuyển Series/list địa chỉ IPv4 dạng chuỗi thành mảng uint32.
+    Giá trị không phải IPv4 hợp lệ được ánh xạ thành 0 (0.0.0.0).
+    """
+    series = pd.Series(values, dtype=object)
+    if series.empty:
+        return np.zeros(0, dtype=np.uint32)
+
+    octets = series.str.extract(r'^(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})$')
+    valid = octets.notna().all(axis=1)
+    octets = octets.fillna(0).astype(np.uint32).to_numpy()
+    valid &= (octets <= 255).all(axis=1)
+
+    result = (octets[:, 0] << 24) | (octets[:, 1] << 16) | (octets[:, 2] << 8) | octets[:, 3]
+    result[~valid.to_numpy()] = 0
+    return result.astype(np.uint32)
+
+
+def uint32_to_ipv4(values) -> np.ndarray:
+    """
+    Chuyển mảng uint32 thành mảng chuỗi IPv4 (dtype object)
+    """
+    values = np.asarray(values, dtype=np.uint32)
+    if values.size == 0:
+        return np.empty(0, dtype=object)
+
+    octets = [((values >> shift) & 0xFF).astype(str) for shift in (24, 16, 8, 0)]
+    joined = octets[0]
+    for part in octets[1:]:
+        joined = np.char.add(np.char.add(joined, "."), part)
+    return joined.astype(object)
+
+
+def _to_epoch_seconds(values) -> np.ndarray:
+    """
+    Chuyển datetime (list, Series, mảng datetime64) thành epoch giây dạng int64
+    """
+    return pd.to_datetime(pd.Series(values)).to_numpy(dtype="datetime64[s]").astype(np.int64)
+
+
+class LogDataset:
+    """
+    Dữ liệu log dạng cột gọn trong bộ nhớ, dùng cho st.session_state.df_global.
+
+    - ip: uint32 (IPv4)
+    - timestamp: int64 epoch giây
+    - status: uint16
+    - log_level, response: category
+
+    Chỉ chuyển về giá trị dễ đọc (chuỗi IP, datetime) khi hiển thị hoặc xuất file.
+    Cột id (nếu dữ liệu lấy từ database) được giữ dạng int64.
+    """
+
+    def __init__(self, frame: Optional[pd.DataFrame] = None):
+        if frame is None:
+            frame = _empty_frame()
+        self.frame = frame.reset_index(drop=True)
+        self._search_index = None
+        self._rate_index = None
+
+    # ------------------------------------------------------------------
+    # Tạo dataset
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_records(cls, records: Sequence[Tuple]) -> "LogDataset":
+        """
+        Tạo dataset từ list tuple (ip_address, timestamp, status, log_level, response);
+        cột thêm ở cuối tuple (row_hash) bị bỏ qua
+        """
+        if not records:
+            return cls()
+        ips, timestamps, statuses, levels, responses = list(zip(*records))[:5]
+        return cls(pd.DataFrame({
+            "ip": ipv4_to_uint32(ips),
+            "timestamp": _to_epoch_seconds(timestamps),
+            "status": np.asarray(statuses, dtype=np.uint16),
+            "log_level": pd.Categorical(levels),
+            "response": pd.Categorical(responses),
+        }))
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "LogDataset":
+        """
+        Tạo dataset từ DataFrame dạng đọc được (cột ip/ip_address dạng chuỗi,
+        timestamp dạng datetime)
+        """
+        if df is None or df.empty:
+            return cls()
+        if 'ip_address' in df.columns and 'ip' not in df.columns:
+            df = df.rename(columns={'ip_address': 'ip'})
+
+        frame = pd.DataFrame({
+            "ip": ipv4_to_uint32(df["ip"].to_numpy()),
+            "timestamp": _to_epoch_seconds(df["timestamp"]),
+            "status": df["status"].to_numpy(dtype=np.uint16),
+            "log_level": pd.Categorical(df["log_level"]),
+            "response": pd.Categorical(df["response"]),
+        })
+        if "id" in df.columns:
+            frame.insert(0, "id", df["id"].to_numpy(dtype=np.int64))
+        return cls(frame)
+
+    @classmethod
+    def concat(cls, datasets: Iterable["LogDataset"]) -> "LogDataset":
+        """
+        Ghép nhiều dataset, giữ các cột category ở dạng category
+        """
+        frames = [ds.frame for ds in datasets if len(ds)]
+        if not frames:
+            return cls()
+        if len(frames) == 1:
+            return cls(frames[0])
+
+        columns = {}
+        for name in frames[0].columns:
+            if name in CATEGORY_COLUMNS:
+                columns[name] = union_categoricals([f[name] for f in frames])
+            else:
+                columns[name] = np.concatenate([f[name].to_numpy() for f in frames])
+        return cls(pd.DataFrame(columns))
+
+    # ------------------------------------------------------------------
+    # Thuộc tính cơ bản
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @property
+    def empty(self) -> bool:
+        return self.frame.empty
+
+    def memory_usage(self) -> int:
+        """
+        Dung lượng bộ nhớ (byte) của dữ liệu dạng gọn
+        """
+        return int(self.frame.memory_usage(index=True, deep=True).sum())
+
+    # ------------------------------------------------------------------
+    # Lọc dữ liệu
+    # ------------------------------------------------------------------
+    def filter(self, mask) -> "LogDataset":
+        """
+        Trả về dataset con theo mask boolean
+        """
+        return LogDataset(self.frame[np.asarray(mask, dtype=bool)])
+
+    def take(self, positions) -> "LogDataset":
+        """
+        Trả về dataset con theo vị trí dòng
+        """
+        return LogDataset(self.frame.iloc[positions])
+
+    def search(self, query: str) -> np.ndarray:
+        """
+        Vị trí các dòng khớp truy vấn tìm kiếm (xem modules.search); chỉ mục được
+        tạo ở lần tìm đầu tiên và dùng lại cho các lần sau
+        """
+        if self._search_index is None:
+            from modules.search import LogSearchIndex
+            self._search_index = LogSearchIndex(self.frame)
+        return self._search_index.search(query)
+
+    def rate_index(self):
+        """
+        Histogram số request / lỗi theo giây (xem modules.timeseries), tạo ở lần gọi
+        đầu tiên; biểu đồ lưu lượng và mỗi lần zoom chỉ đọc histogram này
+        """
+        if self._rate_index is None:
+            from modules.timeseries import RateIndex
+            self._rate_index = RateIndex.from_events(self.frame["timestamp"].to_numpy(),
+                                                     self.frame["status"].to_numpy())
+        return self._rate_index
+
+    def sorted_by_time(self) -> "LogDataset":
+        """
+        Dataset sắp theo timestamp (ổn định: các dòng cùng giây giữ thứ tự gốc)
+        """
+        timestamps = self.frame["timestamp"].to_numpy()
+        if len(timestamps) < 2 or (timestamps[1:] >= timestamps[:-1]).all():
+            return self
+        return LogDataset(self.frame.iloc[np.argsort(timestamps, kind="stable")])
+
+    def timestamps(self) -> pd.Series:
+        """
+        Cột timestamp dạng datetime64
+        """
+        return pd.Series(pd.to_datetime(self.frame["timestamp"].to_numpy(), unit="s"), index=self.frame.index)
+
+    # ------------------------------------------------------------------
+    # Mở rộng để hiển thị / xuất
+    # ------------------------------------------------------------------
+    def to_display(self) -> pd.DataFrame:
+        """
+        DataFrame dạng đọc được (IP chuỗi, timestamp datetime) để hiển thị hoặc xuất CSV
+        """
+        display = pd.DataFrame({
+            "ip": uint32_to_ipv4(self.frame["ip"].to_numpy()),
+            "timestamp": self.timestamps().to_numpy(),
+            "status": self.frame["status"].to_numpy(dtype=np.int64),
+            "log_level": self.frame["log_level"].to_numpy(),
+            "response": self.frame["response"].to_numpy(),
+        }, index=self.frame.index)
+        if "id" in self.frame.columns:
+            display.insert(0, "id", self.frame["id"].to_numpy())
+        return display
+
+    def iter_record_batches(self, batch_size: int) -> Iterator[List[Tuple]]:
+        """
+        Trả về từng batch tuple kiểu Python gốc; chỉ một batch được mở rộng tại một thời điểm
+        """
+        for start in range(0, len(self.frame), batch_size):
+            yield _frame_to_records(self.frame.iloc[start:start + batch_size])
+
+
+def _frame_to_records(frame: pd.DataFrame) -> List[Tuple]:
+    """
+    Chuyển frame dạng gọn thành list tuple kiểu Python gốc bằng các phép chuyển theo cột
+    """
+    return list(zip(
+        uint32_to_ipv4(frame["ip"].to_numpy()).tolist(),
+        frame["timestamp"].to_numpy().astype("datetime64[s]").tolist(),
+        frame["status"].to_numpy(dtype=np.int64).tolist(),
+        frame["log_level"].astype(object).tolist(),
+        frame["response"].astype(object).tolist(),
+    ))
+
+
+def _empty_frame() -> pd.DataFrame:
+    """
+    DataFrame rỗng với đúng schema dạng gọn
+    """
+    return pd.DataFrame({
+        "ip": np.zeros(0, dtype=np.uint32),
+        "timestamp": np.zeros(0, dtype=np.int64),
+        "status": np.zeros(0, dtype=np.uint16),
+        "log_level": pd.Categorical([]),
+        "response": pd.Categorical([]),
+    })
+
+
+def exact_ip_summary(df: pd.DataFrame, top_k: int = 10) -> dict:
+    """
+    Số IP khác nhau, top IP và top IP lỗi 404 tính chính xác (cùng dạng với LogSketches.summary)
+    """
+    ips = df["ip"].to_numpy()
+    summary = {"unique_ips": 0, "unique_ips_error": 0, "approximate": False}
+    for name, values in (("top_ips", ips), ("top_404_ips", ips[df["status"].to_numpy() == 404])):
+        # Đếm trực tiếp trên cột uint32, chỉ chuyển top_k IP sang chuỗi
+        unique, counts = np.unique(values, return_counts=True)
+        if name == "top_ips":
+            summary["unique_ips"] = len(unique)
+        # Nhiều request hơn đứng trước, cùng số request thì IP nhỏ hơn đứng trước (unique đã sắp)
+        order = np.argsort(-counts, kind="stable")[:top_k]
+        top = pd.Series(counts[order].astype(np.int64), index=uint32_to_ipv4(unique[order]), name="count")
+        summary[name] = top
+        summary[f"{name}_error"] = pd.Series(0, index=top.index, dtype="int64")
+    return summary
+
+
+def summarize_dataset(dataset: LogDataset, top_k: int = 10) -> dict:
+    """
+    Các chỉ số Dashboard tính trên dữ liệu trong bộ nhớ (cùng dạng với get_dashboard_aggregates)
+
+    Dữ liệu đã nằm trong bộ nhớ nên số IP khác nhau và top IP luôn được đếm chính xác;
+    sketch chỉ dùng cho database (log_sketch_hour), nơi đếm chính xác phải quét server_logs.
+    """
+    df = dataset.frame
+    error_count = int((df["status"] >= 400).sum())
+    ip_summary = exact_ip_summary(df, top_k)
+    return {
+        "total_requests": len(df),
+        "error_count": error_count,
+        "error_rate": (error_count / len(df) * 100) if len(df) > 0 else 0,
+        "status_counts": df["status"].value_counts(),
+        **ip_summary,
+    }
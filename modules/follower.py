@@ -0,0 +1,349 @@
+"""
+Chế độ follow: theo dõi các file log trên đĩa và liên tục nạp phần mới ghi thêm.
+
+Chạy từ thư mục gốc của project:
+    python -m modules.follower /var/log/nginx/access.log [/var/log/app.log ...]
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from modules.log_parser import (RowHasher, merge_parse_stats, new_parse_stats, new_timestamp_decoder, parse_log_stream,
+                                seed_row_hasher)
+from modules.metrics import start_metrics_server
+from modules.settings import STORAGE_BACKEND
+
+logger = logging.getLogger(__name__)
+
+FOLLOW_POLL_INTERVAL = float(os.getenv('FOLLOW_POLL_INTERVAL', 0.5))   # Giây giữa hai lần kiểm tra
+FOLLOW_BATCH_SIZE = int(os.getenv('FOLLOW_BATCH_SIZE', 5_000))         # Số dòng mỗi micro-batch
+FOLLOW_MAX_READ = 16 * 1024 * 1024                                      # Số byte tối đa đọc mỗi lần
+FOLLOW_CHECKPOINT = os.getenv('FOLLOW_CHECKPOINT', '.follow_checkpoints.json')
+
+
+class CheckpointStore:
+    """
+    Lưu offset đã nạp của từng file vào một file JSON (ghi nguyên tử bằng os.replace)
+    """
+
+    def __init__(self, path: str = FOLLOW_CHECKPOINT):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, 'r', encoding='utf-8') as fh:
+                self._data = json.load(fh)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._data = {}
+
+    def get(self, log_path: str) -> Optional[Dict]:
+        return self._data.get(log_path)
+
+    def set(self, log_path: str, device: int, inode: int, offset: int):
+        with self._lock:
+            self._data[log_path] = {'device': device, 'inode': inode, 'offset': offset}
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                json.dump(self._data, fh)
+            os.replace(tmp_path, self.path)
+
+
+def save_batches_to_db(batches: List[List[Tuple]]) -> int:
+    """
+    Sink mặc định: ghi các micro-batch vào kho log (backend của modules.storage)
+
+    Raises:
+        RuntimeError: Nếu có batch không ghi được (offset sẽ không được checkpoint)
+    """
+    from modules.storage import bulk_save_batches
+
+    report = bulk_save_batches(batches, workers=1)
+    if report['failed_batches']:
+        raise RuntimeError(report['failed_batches'][0]['error'])
+    return report['rows_inserted']
+
+
+class _FollowedFile:
+    """
+    Trạng thái theo dõi một file: file handle, định danh (device, inode), offset đã
+    parse (offset) và offset đã ghi xong và checkpoint (saved_offset)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fh = None
+        self.device = None
+        self.inode = None
+        self.offset = 0
+        self.saved_offset = 0
+        self.decoder = None
+        self.row_hasher = RowHasher()
+        self.stats = new_parse_stats()
+        self.pending_stats = new_parse_stats()
+        self.pending_rows = 0
+        self.rows_written = 0
+
+    def open(self, offset: int = 0) -> bool:
+        try:
+            fh = open(self.path, 'rb')
+        except FileNotFoundError:
+            return False
+        st = os.fstat(fh.fileno())
+        self.close()
+        self.fh, self.device, self.inode = fh, st.st_dev, st.st_ino
+        self.offset = self.saved_offset = offset
+        self.decoder = None
+        self.row_hasher = RowHasher()
+        return True
+
+    def close(self):
+        if self.fh:
+            self.fh.close()
+            self.fh = None
+
+
+class LogFollower:
+    """
+    Theo dõi một hoặc nhiều file log, phát hiện dữ liệu ghi thêm, logrotate
+    (đổi tên file) và truncate, chỉ parse phần byte mới và ghi thành micro-batch.
+
+    Offset của mỗi file chỉ được checkpoint sau khi batch đã ghi thành công,
+    nên khi khởi động lại sẽ tiếp tục từ đúng vị trí đã dừng. Mỗi dòng mang
+    row_hash nên phần bị đọc lại sau sự cố không bị ghi trùng.
+
+    Các batch đã parse có thể được gom (flush_rows / flush_interval) trước khi
+    ghi, để backend Parquet ghi ít file lớn thay vì một file nhỏ mỗi lần poll.
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[str],
+        sink: Callable[[List[List[Tuple]]], int] = save_batches_to_db,
+        checkpoints: Optional[CheckpointStore] = None,
+        batch_size: int = FOLLOW_BATCH_SIZE,
+        poll_interval: float = FOLLOW_POLL_INTERVAL,
+        flush_rows: int = 0,
+        flush_interval: float = 0.0
+    ):
+        """
+        Args:
+            paths: Các đường dẫn file log cần theo dõi
+            sink: Hàm nhận list các batch tuple (có row_hash) và trả về số dòng đã ghi
+            checkpoints: Nơi lưu offset (mặc định file FOLLOW_CHECKPOINT)
+            batch_size: Số dòng tối đa mỗi micro-batch
+            poll_interval: Số giây chờ khi không có dữ liệu mới
+            flush_rows: Ghi khi số dòng đang gom đạt ngưỡng này
+            flush_interval: Ghi khi lần ghi trước đã cách quá số giây này
+                (mặc định 0 / 0: ghi ngay sau mỗi đoạn đọc được)
+        """
+        self.sink = sink
+        self.checkpoints = checkpoints if checkpoints is not None else CheckpointStore()
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.files = [_FollowedFile(os.path.abspath(path)) for path in paths]
+        self._buffer: List[List[Tuple]] = []
+        self._buffered_rows = 0
+        self._last_flush = time.monotonic()
+
+        for followed in self.files:
+            self._resume(followed)
+
+    def _resume(self, followed: _FollowedFile):
+        """
+        Mở file và tiếp tục từ checkpoint nếu file vẫn là file cũ (cùng inode, không bị cắt ngắn)
+        """
+        if not followed.open():
+            return
+        saved = self.checkpoints.get(followed.path)
+        if (saved and saved['device'] == followed.device and saved['inode'] == followed.inode
+                and saved['offset'] <= os.fstat(followed.fh.fileno()).st_size):
+            followed.offset = followed.saved_offset = saved['offset']
+            # Dòng trùng với các dòng vừa nạp trước khi dừng vẫn nhận hash khác
+            followed.row_hasher = seed_row_hasher(followed.fh, followed.offset)
+
+    def _consume(self, followed: _FollowedFile, data: bytes) -> int:
+        """
+        Parse các dòng hoàn chỉnh trong data vào bộ đệm, ghi nếu đã tới lúc (_flush_if_due)
+
+        Returns:
+            Số dòng đã ghi
+        """
+        if followed.decoder is None:
+            followed.decoder = new_timestamp_decoder(data[:64 * 1024].decode('latin-1').splitlines())
+
+        for batch in parse_log_stream(io.BytesIO(data), stats=followed.pending_stats, batch_size=self.batch_size,
+                                      decoder=followed.decoder, row_hasher=followed.row_hasher):
+            self._buffer.append(batch)
+            self._buffered_rows += len(batch)
+            followed.pending_rows += len(batch)
+        followed.offset += len(data)
+        return self._flush_if_due()
+
+    def _flush_if_due(self) -> int:
+        if (self._buffered_rows >= self.flush_rows
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            return self.flush()
+        return 0
+
+    def flush(self) -> int:
+        """
+        Ghi các batch đang gom qua sink rồi checkpoint offset của các file đã parse tới
+
+        Returns:
+            Số dòng đã ghi
+
+        Raises:
+            Lỗi của sink: các file quay về offset đã checkpoint để lần poll sau đọc lại
+        """
+        self._last_flush = time.monotonic()
+        batches, self._buffer, self._buffered_rows = self._buffer, [], 0
+        pending = [followed for followed in self.files if followed.offset != followed.saved_offset]
+        try:
+            written = self.sink(batches) if batches else 0
+        except Exception:
+            # Đọc lại phần chưa checkpoint với cùng trạng thái row_hash: dựng lại hasher từ các dòng
+            # ngay trước offset đã checkpoint (như khi resume) thay vì chụp lại cả hasher mỗi lần poll
+            for followed in pending:
+                followed.offset = followed.saved_offset
+                followed.row_hasher = seed_row_hasher(followed.fh, followed.offset)
+                followed.pending_stats, followed.pending_rows = new_parse_stats(), 0
+            raise
+
+        for followed in pending:
+            followed.saved_offset = followed.offset
+            followed.rows_written += followed.pending_rows
+            merge_parse_stats(followed.stats, followed.pending_stats)
+            followed.pending_stats, followed.pending_rows = new_parse_stats(), 0
+            self.checkpoints.set(followed.path, followed.device, followed.inode, followed.offset)
+        return written
+
+    def _read_new(self, followed: _FollowedFile, final: bool = False) -> bytes:
+        """
+        Đọc phần byte mới từ offset, chỉ lấy tới ký tự xuống dòng cuối cùng
+        (trừ khi final=True: file cũ đã bị rotate nên dòng cuối coi như hoàn chỉnh)
+        """
+        followed.fh.seek(followed.offset)
+        data = followed.fh.read(FOLLOW_MAX_READ)
+        if final and len(data) < FOLLOW_MAX_READ:
+            return data
+        return data[:data.rfind(b"\n") + 1]
+
+    def poll_file(self, followed: _FollowedFile) -> int:
+        """
+        Kiểm tra một file và nạp phần mới
+
+        Returns:
+            Số dòng đã ghi
+        """
+        if followed.fh is None and not followed.open():
+            return 0
+
+        written = 0
+        try:
+            current = os.stat(followed.path)
+        except FileNotFoundError:
+            current = None
+
+        # logrotate đổi tên file: nạp nốt phần còn lại của file cũ rồi chuyển sang file mới
+        if current is None or (current.st_dev, current.st_ino) != (followed.device, followed.inode):
+            data = self._read_new(followed, final=True)
+            while data:
+                written += self._consume(followed, data)
+                data = self._read_new(followed, final=True)
+            # Offset đang gom thuộc file cũ: ghi và checkpoint trước khi chuyển file
+            written += self.flush()
+            if current is not None and followed.open(offset=0):
+                logger.info("Phát hiện rotate: %s", followed.path)
+            return written
+
+        # File bị truncate (copytruncate): đọc lại từ đầu
+        if current.st_size < followed.offset:
+            logger.info("Phát hiện truncate: %s", followed.path)
+            written += self.flush()
+            followed.open(offset=0)
+
+        data = self._read_new(followed)
+        if data:
+            written += self._consume(followed, data)
+        return written
+
+    def poll_once(self) -> int:
+        """
+        Kiểm tra tất cả các file một lần
+
+        Returns:
+            Tổng số dòng đã ghi
+        """
+        written = 0
+        for followed in self.files:
+            try:
+                written += self.poll_file(followed)
+            except Exception as e:
+                logger.error("Lỗi khi nạp %s: %s", followed.path, e)
+        try:
+            written += self._flush_if_due()
+        except Exception as e:
+            logger.error("Lỗi khi ghi: %s", e)
+        return written
+
+    def run(self, stop_event: Optional[threading.Event] = None):
+        """
+        Vòng lặp follow cho tới khi stop_event được set
+        """
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            buffered = self._buffered_rows
+            if self.poll_once() == 0 and self._buffered_rows == buffered:
+                stop_event.wait(self.poll_interval)
+
+    def close(self):
+        """
+        Ghi nốt các batch đang gom rồi đóng các file
+        """
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error("Lỗi khi ghi: %s", e)
+        for followed in self.files:
+            followed.close()
+
+
+def main():
+    flush_rows, flush_interval = 0, 0.0
+    if STORAGE_BACKEND == 'parquet':
+        # Mỗi lần ghi của backend Parquet tạo một file mới mỗi ngày: gom trước khi ghi
+        from modules.parquet_store import PARQUET_FILE_ROWS, PARQUET_FLUSH_SECONDS
+        flush_rows, flush_interval = PARQUET_FILE_ROWS, PARQUET_FLUSH_SECONDS
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='+', help='Các file log cần theo dõi')
+    parser.add_argument('--interval', type=float, default=FOLLOW_POLL_INTERVAL)
+    parser.add_argument('--batch-size', type=int, default=FOLLOW_BATCH_SIZE)
+    parser.add_argument('--checkpoint', default=FOLLOW_CHECKPOINT)
+    parser.add_argument('--flush-rows', type=int, default=flush_rows, help='Ghi khi đã gom đủ số dòng này')
+    parser.add_argument('--flush-interval', type=float, default=flush_interval,
+                        help='Ghi khi lần ghi trước đã cách quá số giây này')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    start_metrics_server()
+
+    follower = LogFollower(args.paths, checkpoints=CheckpointStore(args.checkpoint),
+                           batch_size=args.batch_size, poll_interval=args.interval,
+                           flush_rows=args.flush_rows, flush_interval=args.flush_interval)
+    try:
+        follower.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        follower.close()
+
+
+if __name__ == '__main__':
+    main()
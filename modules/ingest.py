@@ -0,0 +1,246 @@
+import hashlib
+import os
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from modules.archives import is_archive, iter_log_members, source_name as default_source_name
+from modules.log_parser import (ByteRangeReader, RowHasher, merge_parse_stats, new_parse_stats, open_binary,
+                                parse_log_stream, seed_row_hasher, source_size)
+from modules.settings import DB_BATCH_SIZE, DB_LOCAL_INFILE
+from modules.storage import bulk_save_batches, get_last_ingest, record_ingest
+
+# Số byte đầu/cuối file dùng để nhận diện file
+FINGERPRINT_BYTES = 64 * 1024
+
+
+def _sha256_range(fh, start: int, end: int) -> bytes:
+    """
+    SHA-256 của đoạn byte [start, end)
+    """
+    fh.seek(start)
+    return hashlib.sha256(fh.read(max(end - start, 0))).digest()
+
+
+def _last_line_end(fh, size: int) -> int:
+    """
+    Vị trí ngay sau ký tự xuống dòng cuối cùng (chỉ nạp các dòng đã hoàn chỉnh)
+    """
+    end = size
+    while end > 0:
+        start = max(end - FINGERPRINT_BYTES, 0)
+        fh.seek(start)
+        block = fh.read(end - start)
+        pos = block.rfind(b"\n")
+        if pos >= 0:
+            return start + pos + 1
+        end = start
+    return 0
+
+
+def head_hash(fh, size: int) -> bytes:
+    """
+    Định danh file: SHA-256 của FINGERPRINT_BYTES byte đầu tiên
+    """
+    return _sha256_range(fh, 0, min(size, FINGERPRINT_BYTES))
+
+
+def tail_hash(fh, end: int) -> bytes:
+    """
+    SHA-256 của FINGERPRINT_BYTES byte kết thúc tại vị trí end
+    """
+    return _sha256_range(fh, max(end - FINGERPRINT_BYTES, 0), end)
+
+
+def plan_ingest(source) -> Dict:
+    """
+    Xác định phần nào của file cần nạp dựa trên ingest_manifest.
+
+    - 'skip': file đã được nạp đầy đủ (cùng head_hash, cùng điểm kết thúc, cùng tail_hash)
+    - 'append': file chỉ được ghi thêm, nạp phần đuôi [range_end cũ, end)
+    - 'full': file mới hoặc đã thay đổi, nạp toàn bộ (dòng trùng bị loại qua row_hash)
+
+    File nén / archive không nạp phần đuôi được (vị trí byte là của dữ liệu nén)
+    nên chỉ có 'skip' hoặc 'full'.
+
+    Returns:
+        dict: action, start, end, size, head_hash, tail_hash, archive
+    """
+    size = source_size(source)
+    archive = is_archive(source)
+
+    with open_binary(source) as fh:
+        if size is None:
+            fh.seek(0, os.SEEK_END)
+            size = fh.tell()
+
+        end = size if archive else _last_line_end(fh, size)
+        plan = {
+            'action': 'full',
+            'start': 0,
+            'end': end,
+            'size': size,
+            'head_hash': head_hash(fh, size),
+            'tail_hash': tail_hash(fh, end),
+            'archive': archive,
+        }
+
+        last = get_last_ingest(plan['head_hash'])
+        if last:
+            last_end = int(last['range_end'])
+            if last_end <= end and tail_hash(fh, last_end) == bytes(last['tail_hash']):
+                if last_end == end:
+                    plan['action'], plan['start'] = 'skip', last_end
+                elif not archive:
+                    plan['action'], plan['start'] = 'append', last_end
+
+    return plan
+
+
+def _archive_batches(fh, name: str, stats: Dict, batch_size: int,
+                     members: List[Dict]) -> Iterator[List[Tuple]]:
+    """
+    Batch có row_hash của từng file trong archive, ghi thống kê parse của từng file vào members
+    """
+    for member, stream, _ in iter_log_members(fh, name):
+        member_stats = new_parse_stats()
+        yield from parse_log_stream(stream, stats=member_stats, batch_size=batch_size, with_row_hash=True)
+        merge_parse_stats(stats, member_stats)
+        members.append({'member': member, **member_stats})
+
+
+def _tee(batches: Iterator[List[Tuple]], on_batch: Callable[[List[Tuple]], None]) -> Iterator[List[Tuple]]:
+    for batch in batches:
+        on_batch(batch)
+        yield batch
+
+
+def _file_batches(fh, plan: Dict, stats: Dict, batch_size: int,
+                  progress: Optional[Callable[[int], None]],
+                  on_batch: Optional[Callable[[List[Tuple]], None]],
+                  other_stats: Dict) -> Iterator[List[Tuple]]:
+    """
+    Batch có row_hash của đoạn [start, end) cần nạp của một file không nén.
+
+    Khi có on_batch, cả file được parse đúng một lần theo thứ tự: phần đã nạp
+    trước start và dòng cuối chưa hoàn chỉnh sau end chỉ đi qua on_batch (thống
+    kê vào other_stats), phần cần nạp đi qua on_batch rồi được yield để ghi.
+    Phần trước start cũng làm RowHasher đếm số lần xuất hiện như khi nạp cả file.
+    """
+    start, end = plan['start'], plan['end']
+
+    def segment(first: int, last: int, segment_stats: Dict, hasher: RowHasher) -> Iterator[List[Tuple]]:
+        report = (lambda n: progress(first + n)) if progress and on_batch else progress
+        return parse_log_stream(ByteRangeReader(fh, first, last), stats=segment_stats, batch_size=batch_size,
+                                row_hasher=hasher, progress=report)
+
+    if on_batch is None:
+        # Phần đuôi tiếp tục đếm số lần xuất hiện từ các dòng đã nạp
+        hasher = seed_row_hasher(fh, start) if plan['action'] == 'append' else RowHasher()
+        yield from segment(start, end, stats, hasher)
+        return
+
+    hasher = RowHasher()
+    for batch in segment(0, start, other_stats, hasher):
+        on_batch(batch)
+    for batch in segment(start, end, stats, hasher):
+        on_batch(batch)
+        yield batch
+    for batch in segment(end, plan['size'], other_stats, hasher):
+        on_batch(batch)
+
+
+def ingest_source(
+    source,
+    source_name: Optional[str] = None,
+    batch_size: int = DB_BATCH_SIZE,
+    use_load_data: bool = DB_LOCAL_INFILE,
+    progress: Optional[Callable[[int], None]] = None,
+    on_batch: Optional[Callable[[List[Tuple]], None]] = None
+) -> Tuple[Dict, Dict]:
+    """
+    Nạp file log vào server_logs một cách idempotent.
+
+    File đã nạp được bỏ qua chỉ với một truy vấn manifest; file được ghi thêm
+    chỉ nạp phần đuôi mới. Mỗi dòng mang row_hash nên các dòng nằm trong đoạn
+    chồng lấn (file rotate, upload lại) bị unique index loại bỏ thay vì bị
+    ghi trùng. File nén / archive được giải nén dạng streaming, lần lượt từng file.
+
+    Args:
+        source: Đường dẫn file hoặc đối tượng file-like có seek()
+        source_name: Tên nguồn ghi vào manifest (mặc định tên file)
+        batch_size: Số dòng mỗi batch
+        use_load_data: Dùng LOAD DATA LOCAL INFILE
+        progress: Callback nhận số byte đã đọc của phần cần nạp (file không nén;
+                  với on_batch là số byte đã đọc của cả file)
+        on_batch: Nhận mọi batch của cả file (kể cả phần đã nạp hoặc bị bỏ qua) trong
+                  cùng lần parse với phần ghi database, ví dụ để dựng LogDataset trong
+                  bộ nhớ mà không parse file lần thứ hai. Được gọi trên thread producer.
+
+    Returns:
+        tuple: (report, stats)
+            - report: action, range_start, range_end, rows_parsed, rows_inserted,
+                      duplicates, failed_batches, rows_per_sec, members (thống kê từng file của archive),
+                      stages (thông lượng parse / insert của pipeline, xem bulk_save_batches)
+            - stats: Thống kê parse của phần đã nạp (của cả file nếu có on_batch)
+    """
+    if source_name is None:
+        source_name = default_source_name(source)
+
+    plan = plan_ingest(source)
+    stats = new_parse_stats()
+    report = {
+        'source_name': source_name,
+        'action': plan['action'],
+        'range_start': plan['start'],
+        'range_end': plan['end'],
+        'rows_parsed': 0,
+        'rows_inserted': 0,
+        'duplicates': 0,
+        'failed_batches': [],
+        'rows_per_sec': 0.0,
+        'members': [],
+        'stages': {},
+    }
+
+    other_stats = new_parse_stats()
+    if plan['action'] == 'skip' and on_batch is None:
+        return report, stats
+
+    with open_binary(source) as fh:
+        if plan['archive']:
+            batches = _archive_batches(fh, source_name, stats, batch_size, report['members'])
+            if on_batch is not None:
+                batches = _tee(batches, on_batch)
+        else:
+            batches = _file_batches(fh, plan, stats, batch_size, progress, on_batch, other_stats)
+
+        if plan['action'] == 'skip':
+            # Chỉ parse cho on_batch, không có gì để ghi
+            for _ in batches:
+                pass
+            merge_parse_stats(other_stats, stats)
+            return report, other_stats
+        save_report = bulk_save_batches(batches, use_load_data=use_load_data)
+
+    report['rows_parsed'] = stats['parsed_success']
+    report['rows_inserted'] = save_report['rows_inserted']
+    report['duplicates'] = report['rows_parsed'] - report['rows_inserted']
+    report['failed_batches'] = save_report['failed_batches']
+    report['rows_per_sec'] = save_report['rows_per_sec']
+    report['stages'] = save_report['stages']
+
+    # Chỉ ghi manifest khi mọi batch thành công, để lần sau nạp lại phần lỗi
+    if not save_report['failed_batches']:
+        record_ingest({
+            'source_name': source_name[:255],
+            'head_hash': plan['head_hash'],
+            'tail_hash': plan['tail_hash'],
+            'range_start': plan['start'],
+            'range_end': plan['end'],
+            'rows_parsed': report['rows_parsed'],
+            'rows_inserted': report['rows_inserted'],
+        })
+
+    if on_batch is not None:
+        merge_parse_stats(other_stats, stats)
+        return report, other_stats
+    return report, stats
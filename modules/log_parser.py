@@ -1,7 +1,19 @@
+import hashlib
+import os
 import re 
-from datetime import datetime
-import streamlit as st
-from typing import List, Tuple, Dict, Optional
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import chain, islice
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from modules.dataset import LOG_COLUMNS, LogDataset
+from modules.metrics import METRICS_SAMPLE_EVERY, metrics
+from modules.timestamps import TIMESTAMP_FORMATS, TimestampDecoder
 
 LOG_PATTERN = re.compile(
     r'(?P<ip>\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}) '  
@@ -34,6 +46,8 @@ STATUS_MESSAGES ={
     504: "Gateway Timeout",
 }
 
+LOG_LEVELS = ["INFO", "WARNING", "ERROR"]
+
 def determine_log_level (status_code : int) ->str:
   """
     Hàm dùng dể phân loại mức độ log dựa trên status code
@@ -58,8 +72,8 @@ def validate_ip (ip_address: str) ->bool:
         return False
     for part in parts:
         num = int(part)
-    if num <0 or num > 255:
-        return False
+        if num <0 or num > 255:
+            return False
     return True
   except ValueError:
     return False
@@ -77,14 +91,7 @@ def parse_timestamp(time_str: str) -> Optional[datetime]:
     time_str = time_str.split()[0] if ' ' in time_str else time_str
     
     # Thử các format phổ biến
-    formats = [
-        '%d/%b/%Y:%H:%M:%S',      # 04/Dec/2025:10:00:00
-        '%d/%m/%Y:%H:%M:%S',      # 04/12/2025:10:00:00
-        '%Y-%m-%d %H:%M:%S',      # 2025-12-04 10:00:00
-        '%d-%b-%Y %H:%M:%S',      # 04-Dec-2025 10:00:00
-    ]
-    
-    for fmt in formats:
+    for fmt in TIMESTAMP_FORMATS:
         try:
             return datetime.strptime(time_str, fmt)
         except ValueError:
@@ -93,180 +100,821 @@ def parse_timestamp(time_str: str) -> Optional[datetime]:
     return None
   
 
-def parse_log_file(uploaded_file) -> Tuple[List[Tuple], Dict]:
+DEFAULT_CHUNK_SIZE = 1024 * 1024   # Đọc 1 MiB mỗi lần
+DEFAULT_BATCH_SIZE = 50_000        # Số bản ghi tối đa trong một batch
+
+# Số dòng đầu file dùng để xác định format thời gian
+TIMESTAMP_SAMPLE_LINES = 1000
+
+# Chuẩn hóa thời gian về UTC theo múi giờ trong log (mặc định giữ giờ địa phương)
+NORMALIZE_UTC = os.getenv('LOG_TIMESTAMP_UTC', '0') == '1'
+
+# Số giây RowHasher nhớ số lần xuất hiện của các dòng: dòng trùng cách nhau không
+# quá ngần này (tính theo timestamp mới nhất đã gặp) vẫn có row_hash khác nhau dù
+# nằm xen với dòng của giây khác (%t của Apache không luôn tăng dần)
+ROW_HASH_WINDOW = int(os.getenv('ROW_HASH_WINDOW', 300))
+
+# Số cảnh báo tối đa hiển thị cho từng loại lỗi
+WARNING_LIMITS = {
+    'parse_errors': 5,
+    'invalid_ips': 3,
+    'timestamp_errors': 3,
+    'invalid_status': 3,
+}
+
+
+def new_parse_stats() -> Dict[str, int]:
     """
-    Đọc file log và trả về danh sách các bản ghi đã parse
-    
-    Returns:
-        tuple: (data_list, stats_dict)
-            - data_list: List các tuple (ip_address, timestamp, status, log_level, response)
-            - stats_dict: Dictionary chứa thống kê parse
+    Tạo dictionary thống kê parse rỗng
     """
-    data_list = []
-    stats = {
+    return {
         'total_lines': 0,
         'parsed_success': 0,
         'parse_errors': 0,
         'invalid_ips': 0,
         'timestamp_errors': 0,
         'invalid_status': 0,
-        'empty_lines': 0
+        'empty_lines': 0,
+        'latin1_chunks': 0
     }
-    
+
+
+def parse_log_line(
+    line: str,
+    decoder: Optional[TimestampDecoder] = None
+) -> Tuple[Optional[Tuple], Optional[str], Optional[str]]:
+    """
+    Parse một dòng log (đã strip, không rỗng)
+
+    Args:
+        line: Dòng log
+        decoder: TimestampDecoder của file (mặc định dùng parse_timestamp)
+
+    Returns:
+        tuple: (entry, error_key, error_message)
+            - entry: tuple (ip_address, timestamp, status, log_level, response) hoặc None
+            - error_key: Tên bộ đếm lỗi trong stats nếu parse thất bại
+            - error_message: Mô tả lỗi để hiển thị
+    """
+    match = LOG_PATTERN.search(line)
+    if not match:
+        return None, 'parse_errors', "Không khớp pattern log"
 
     try:
-        content = uploaded_file.getvalue().decode("utf-8")
-    except UnicodeDecodeError:
+        group = match.groupdict()
+
+        # 1. Validate IP address
+        ip_address = group['ip']
+        if not validate_ip(ip_address):
+            return None, 'invalid_ips', f"IP không hợp lệ '{ip_address}'"
+
+        # 2. Parse timestamp
+        if decoder is not None:
+            timestamp = decoder.decode(group['time'])
+        else:
+            timestamp = parse_timestamp(group['time'])
+        if timestamp is None:
+            return None, 'timestamp_errors', f"Không parse được timestamp '{group['time']}'"
+
+        # 3. Parse và validate status code
         try:
-            content = uploaded_file.getvalue().decode("latin-1")
-            st.info(" File được decode bằng Latin-1 encoding")
-        except Exception as e:
-            st.error(f" Không thể đọc file: {e}")
-            return [], stats
-    
-    # Parse từng dòng log
-    lines = content.splitlines()
-    
-    # Progress bar cho file lớn > 100 dòng
-    if len(lines) > 100:
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+            status_code = int(group['status'])
+            if not (100 <= status_code <= 599):
+                raise ValueError("Status code ngoài phạm vi HTTP")
+        except ValueError:
+            return None, 'invalid_status', f"Status code không hợp lệ '{group['status']}'"
+
+        # 4. Tạo các trường tự động
+        entry = (
+            ip_address,
+            timestamp,
+            status_code,
+            determine_log_level(status_code),
+            determine_response_text(status_code)
+        )
+        return entry, None, None
+
+    except Exception as e:
+        return None, 'parse_errors', f"Lỗi không xác định - {str(e)[:100]}"
+
+
+@contextmanager
+def open_binary(source):
+    """
+    Mở nguồn log ở chế độ binary.
+
+    Nhận đường dẫn file (str/PathLike) hoặc đối tượng file-like có .read()
+    (ví dụ UploadedFile của Streamlit, BytesIO).
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as fh:
+            yield fh
     else:
-        progress_bar = None
-        status_text = None
-    
-    for line_num, line in enumerate(lines, 1):
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        yield source
+
+
+def source_size(source) -> Optional[int]:
+    """
+    Kích thước nguồn log theo byte (None nếu không xác định được)
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    size = getattr(source, 'size', None)
+    if isinstance(size, int):
+        return size
+    if hasattr(source, 'getbuffer'):
+        return source.getbuffer().nbytes
+    return None
+
+
+def _decode_chunk(chunk: bytes, stats: Dict) -> str:
+    """
+    Decode một khối byte gồm các dòng hoàn chỉnh, fallback sang Latin-1 nếu không phải UTF-8
+    """
+    try:
+        return chunk.decode("utf-8")
+    except UnicodeDecodeError:
+        stats['latin1_chunks'] += 1
+        return chunk.decode("latin-1")
+
+
+def iter_log_lines(
+    source,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    stats: Optional[Dict] = None,
+    progress: Optional[Callable[[int], None]] = None
+) -> Iterator[str]:
+    """
+    Đọc nguồn log theo từng khối byte cố định và trả về từng dòng.
+
+    Dòng bị cắt ngang ranh giới khối được giữ lại và ghép với khối kế tiếp,
+    nên mỗi khối chỉ được decode khi đã kết thúc bằng một dòng hoàn chỉnh.
+    Bộ nhớ sử dụng tỉ lệ với chunk_size chứ không phụ thuộc kích thước file.
+
+    Args:
+        source: Đường dẫn file hoặc đối tượng file-like
+        chunk_size: Số byte đọc mỗi lần
+        stats: Dictionary thống kê để ghi nhận số khối decode bằng Latin-1
+        progress: Callback nhận tổng số byte đã đọc
+    """
+    if stats is None:
+        stats = new_parse_stats()
+
+    buffer = bytearray()
+    bytes_read = 0
+
+    with open_binary(source) as fh:
+        while True:
+            with metrics.timer("parse.read"):
+                chunk = fh.read(chunk_size)
+            if not chunk:
+                break
+            bytes_read += len(chunk)
+            buffer += chunk
+
+            cut = buffer.rfind(b"\n") + 1
+            if cut:
+                complete = bytes(buffer[:cut])
+                del buffer[:cut]
+                with metrics.timer("parse.decode"):
+                    lines = _decode_chunk(complete, stats).splitlines()
+                yield from lines
+
+            if progress:
+                progress(bytes_read)
+
+    # Dòng cuối không có ký tự xuống dòng
+    if buffer:
+        yield from _decode_chunk(bytes(buffer), stats).splitlines()
+
+
+def _sample_time_fields(lines: List[str]) -> Iterator[str]:
+    """
+    Lấy trường thời gian của các dòng mẫu để xác định format
+    """
+    for line in lines:
+        match = LOG_PATTERN.search(line)
+        if match:
+            yield match.group('time')
+
+
+def new_timestamp_decoder(sample_lines: List[str]) -> TimestampDecoder:
+    """
+    Tạo TimestampDecoder cho một file từ các dòng đầu file
+    """
+    return TimestampDecoder.from_sample(_sample_time_fields(sample_lines), utc=NORMALIZE_UTC)
+
+
+def compute_row_hash(line: str, occurrence: int) -> bytes:
+    """
+    Hash 16 byte của một dòng log, dùng để loại bản ghi trùng khi nạp lại file.
+
+    occurrence là số lần dòng giống hệt đã xuất hiện trong cùng một giây của
+    file, để các request trùng nhau thật sự vẫn có hash khác nhau.
+    """
+    return hashlib.blake2b(f"{occurrence}\x00{line}".encode("utf-8"), digest_size=16).digest()
+
+
+class RowHasher:
+    """
+    Tạo row_hash cho các dòng của một file, nhớ số lần xuất hiện của từng cặp
+    (giây, dòng) trong cửa sổ ROW_HASH_WINDOW giây trước timestamp mới nhất.
+    Giữ cùng một RowHasher khi parse file theo nhiều lần (chế độ follow, nạp
+    phần đuôi) để dòng trùng nằm ở hai lần đọc vẫn có hash khác nhau.
+    """
+
+    def __init__(self, window: int = ROW_HASH_WINDOW):
+        self.window = timedelta(seconds=window)
+        # giây -> {hash(dòng): số lần đã gặp}; khóa bằng hash() để không giữ cả chuỗi dòng
+        self._occurrences: Dict[datetime, Dict[int, int]] = {}
+        self._latest = None
+
+    def __call__(self, line: str, second) -> bytes:
+        counts = self._occurrences.get(second)
+        if counts is None:
+            counts = self._occurrences[second] = {}
+            if self._latest is None or second > self._latest:
+                self._latest = second
+                self._evict()
+        key = hash(line)
+        occurrence = counts.get(key, 0)
+        counts[key] = occurrence + 1
+        return compute_row_hash(line, occurrence)
+
+    def _evict(self):
+        cutoff = self._latest - self.window
+        for second in [second for second in self._occurrences if second < cutoff]:
+            del self._occurrences[second]
+
+
+def _sample_line_stages(line: str, decoder: TimestampDecoder, weight: int):
+    """
+    Đo riêng regex và decode timestamp của một dòng mẫu, tính như `weight` dòng
+    (đo từng dòng sẽ làm chậm chính vòng parse)
+    """
+    start = time.perf_counter()
+    match = LOG_PATTERN.search(line)
+    matched = time.perf_counter()
+    if match:
+        decoder.decode(match.group('time'))
+        metrics.observe("parse.timestamp", (time.perf_counter() - matched) * weight, weight)
+    metrics.observe("parse.regex", (matched - start) * weight, weight)
+
+
+def parse_log_stream(
+    source,
+    stats: Optional[Dict] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_warning: Optional[Callable[[str], None]] = None,
+    progress: Optional[Callable[[int], None]] = None,
+    with_row_hash: bool = False,
+    decoder: Optional[TimestampDecoder] = None,
+    row_hasher: Optional[RowHasher] = None
+) -> Iterator[List[Tuple]]:
+    """
+    Parse log ở chế độ streaming, trả về từng batch bản ghi.
+
+    Bộ nhớ tối đa phụ thuộc vào batch_size và chunk_size, không phụ thuộc
+    kích thước file, nên dùng được cho file log nhiều GB.
+
+    Args:
+        source: Đường dẫn file hoặc đối tượng file-like (UploadedFile, BytesIO, ...)
+        stats: Dictionary thống kê (tạo bằng new_parse_stats()), được cập nhật tại chỗ
+        batch_size: Số bản ghi tối đa mỗi batch
+        chunk_size: Số byte đọc mỗi lần
+        on_warning: Callback nhận thông báo cảnh báo cho các dòng lỗi đầu tiên
+        progress: Callback nhận tổng số byte đã đọc
+        with_row_hash: Thêm row_hash (compute_row_hash) vào cuối mỗi tuple
+        decoder: TimestampDecoder dùng lại từ lần parse trước (mặc định tạo mới từ mẫu)
+        row_hasher: RowHasher dùng lại từ lần parse trước (ngụ ý with_row_hash)
+
+    Yields:
+        List các tuple (ip_address, timestamp, status, log_level, response[, row_hash])
+    """
+    if stats is None:
+        stats = new_parse_stats()
+
+    batch = []
+    lines = iter_log_lines(source, chunk_size=chunk_size, stats=stats, progress=progress)
+
+    # Xác định format thời gian một lần từ các dòng đầu file
+    sample = list(islice(lines, TIMESTAMP_SAMPLE_LINES))
+    if decoder is None:
+        decoder = new_timestamp_decoder(sample)
+
+    if with_row_hash and row_hasher is None:
+        row_hasher = RowHasher()
+
+    sample_every = METRICS_SAMPLE_EVERY if metrics.enabled else 0
+
+    for line_num, line in enumerate(chain(sample, lines), 1):
         stats['total_lines'] += 1
-        
-        # Update progress bar mỗi 100 dòng
-        if progress_bar and line_num % 100 == 0:
-            progress = min(line_num / len(lines), 1.0)
-            progress_bar.progress(progress)
-            status_text.text(f"Đang xử lý dòng {line_num}/{len(lines)}...")
-        
+
         # Bỏ qua dòng trống
         line = line.strip()
         if not line:
             stats['empty_lines'] += 1
             continue
-        
-        # Tìm kiếm pattern trong dòng log
-        match = LOG_PATTERN.search(line)
-        if not match:
-            stats['parse_errors'] += 1
-            if stats['parse_errors'] <= 5:  # Chỉ hiện 5 cảnh báo đầu
-                st.warning(f"⚠️ Dòng {line_num}: Không khớp pattern log")
-            continue
-        
-        try:
-            group = match.groupdict()
-            
-            # 1. Validate IP address
-            ip_address = group['ip']
-            if not validate_ip(ip_address):
-                stats['invalid_ips'] += 1
-                if stats['invalid_ips'] <= 3:
-                    st.warning(f"⚠️ Dòng {line_num}: IP không hợp lệ '{ip_address}'")
-                continue
-            
-            # 2. Parse timestamp
-            timestamp = parse_timestamp(group['time'])
-            if timestamp is None:
-                stats['timestamp_errors'] += 1
-                if stats['timestamp_errors'] <= 3:
-                    st.warning(f"⚠️ Dòng {line_num}: Không parse được timestamp '{group['time']}'")
-                continue
-            
-            # 3. Parse và validate status code
-            try:
-                status_code = int(group['status'])
-                if not (100 <= status_code <= 599):
-                    raise ValueError(f"Status code ngoài phạm vi HTTP")
-            except ValueError as e:
-                stats['invalid_status'] += 1
-                if stats['invalid_status'] <= 3:
-                    st.warning(f"⚠️ Dòng {line_num}: Status code không hợp lệ '{group['status']}'")
-                continue
-            
-            # 4. Tạo các trường tự động
-            log_level = determine_log_level(status_code)
-            response_text = determine_response_text(status_code)
-
-            entry = (
-                ip_address,
-                timestamp,
-                status_code,
-                log_level,
-                response_text
-            )
-            
-            data_list.append(entry)
-            stats['parsed_success'] += 1
-            
-        except Exception as e:
-            stats['parse_errors'] += 1
-            if stats['parse_errors'] <= 3:
-                st.warning(f"⚠️ Dòng {line_num}: Lỗi không xác định - {str(e)[:100]}")
+
+        if sample_every and line_num % sample_every == 0:
+            _sample_line_stages(line, decoder, sample_every)
+
+        entry, error_key, message = parse_log_line(line, decoder)
+        if entry is None:
+            stats[error_key] += 1
+            if on_warning and stats[error_key] <= WARNING_LIMITS[error_key]:
+                on_warning(f"⚠️ Dòng {line_num}: {message}")
             continue
-    
-    # Clear progress bar
-    if progress_bar:
-        progress_bar.empty()
-        status_text.empty()
-    
-    # Hiển thị thống kê chi tiết
-    if stats['total_lines'] > 0:
-        success_rate = (stats['parsed_success'] / stats['total_lines']) * 100
-        
 
-        if success_rate >= 90:
-            box_type = "success"
-            emoji = "✅"
-        elif success_rate >= 70:
-            box_type = "info"
-            emoji = "ℹ️"
-        else:
-            box_type = "warning"
-            emoji = "⚠️"
-        
-        stats_message = f"""
-        {emoji} **Kết quả parse log:**
-        
-        **Tổng quan:**
-        - Tổng số dòng: **{stats['total_lines']:,}**
-        - Parse thành công: **{stats['parsed_success']:,}** ({success_rate:.1f}%)
-        - Dòng trống: **{stats['empty_lines']:,}**
-        
-        **Chi tiết lỗi:**
-        - Không khớp pattern: **{stats['parse_errors']:,}**
-        - IP không hợp lệ: **{stats['invalid_ips']:,}**
-        - Lỗi timestamp: **{stats['timestamp_errors']:,}**
-        - Status code không hợp lệ: **{stats['invalid_status']:,}**
-        """
-        
-        if box_type == "success":
-            st.success(stats_message)
-        elif box_type == "info":
-            st.info(stats_message)
+        if row_hasher is not None:
+            entry += (row_hasher(line, entry[1]),)
+
+        batch.append(entry)
+        stats['parsed_success'] += 1
+
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+# Số process dùng cho chế độ parse song song (mặc định: số CPU)
+PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', 0)) or os.cpu_count() or 1
+
+# File nhỏ hơn ngưỡng này được parse trong process hiện tại
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+
+
+def merge_parse_stats(target: Dict, other: Dict) -> Dict:
+    """
+    Cộng dồn các bộ đếm trong other vào target
+    """
+    for key, value in other.items():
+        target[key] = target.get(key, 0) + value
+    return target
+
+
+def split_byte_ranges(path, parts: int) -> List[Tuple[int, int]]:
+    """
+    Chia file thành tối đa `parts` đoạn byte [start, end), mỗi ranh giới nằm
+    ngay sau ký tự xuống dòng để không cắt đôi dòng log nào.
+    """
+    size = os.path.getsize(path)
+    boundaries = [0]
+
+    with open(path, 'rb') as fh:
+        for i in range(1, parts):
+            fh.seek(size * i // parts)
+            fh.readline()  # Tiến tới cuối dòng hiện tại
+            pos = fh.tell()
+            if pos >= size:
+                break
+            if pos > boundaries[-1]:
+                boundaries.append(pos)
+
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+
+class ByteRangeReader:
+    """
+    File-like chỉ đọc trong đoạn byte [start, end) của một file
+    """
+
+    def __init__(self, fh, start: int, end: int):
+        fh.seek(start)
+        self._fh = fh
+        self._remaining = end - start
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b""
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._fh.read(size)
+        self._remaining -= len(data)
+        return data
+
+
+# Đoạn đọc ngược đầu tiên khi dựng lại RowHasher (gấp đôi sau mỗi lần)
+SEED_BLOCK_BYTES = 64 * 1024
+
+
+def _line_start(fh, pos: int) -> int:
+    """
+    Vị trí đầu dòng đầy đủ đầu tiên tại hoặc sau pos
+    """
+    if pos == 0:
+        return 0
+    fh.seek(pos - 1)
+    while True:
+        block = fh.read(SEED_BLOCK_BYTES)
+        if not block:
+            return fh.tell()
+        index = block.find(b"\n")
+        if index >= 0:
+            return fh.tell() - len(block) + index + 1
+
+
+def seed_row_hasher(fh, end: int) -> RowHasher:
+    """
+    RowHasher mang số lần xuất hiện của các dòng ngay trước vị trí end, như khi
+    đã parse cả file tới end: phần đuôi được ghi thêm nhận cùng row_hash như
+    khi nạp lại toàn bộ file, nên dòng trùng thật (cùng giây với dòng đã nạp)
+    không bị unique index loại.
+
+    Đọc ngược từ end (đoạn dài gấp đôi sau mỗi lần) cho tới khi dòng đầu đoạn
+    cũ hơn timestamp mới nhất của đoạn quá cửa sổ của RowHasher.
+    """
+    hasher = RowHasher()
+    size = SEED_BLOCK_BYTES
+    while True:
+        start = _line_start(fh, max(end - size, 0))
+        records = [entry for batch in parse_log_stream(ByteRangeReader(fh, start, end)) for entry in batch]
+        if start == 0 or (records and records[0][1] <= max(entry[1] for entry in records) - hasher.window):
+            break
+        size *= 2
+
+    for _ in parse_log_stream(ByteRangeReader(fh, start, end), row_hasher=hasher):
+        pass
+    return hasher
+
+
+def _parse_byte_range(args) -> Tuple[Dict[str, list], Dict]:
+    """
+    Worker: parse một đoạn byte của file, trả về kết quả dạng cột và stats riêng
+    """
+    path, start, end, chunk_size = args
+    stats = new_parse_stats()
+    columns = {name: [] for name in LOG_COLUMNS}
+    appenders = [columns[name].append for name in LOG_COLUMNS]
+
+    with open(path, 'rb') as fh:
+        reader = ByteRangeReader(fh, start, end)
+        for batch in parse_log_stream(reader, stats=stats, chunk_size=chunk_size):
+            for entry in batch:
+                for append, value in zip(appenders, entry):
+                    append(value)
+
+    return columns, stats
+
+
+def _parse_byte_range_worker(args) -> Tuple[Dict[str, list], Dict, Dict]:
+    """
+    _parse_byte_range trong process của pool, kèm số liệu metrics của worker để gộp về process chính
+    """
+    return _parse_byte_range(args) + (metrics.drain(),)
+
+
+def parse_log_file_parallel(
+    source,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Tuple[Dict[str, list], Dict]:
+    """
+    Parse file log song song trên nhiều process.
+
+    File được chia thành các đoạn byte căn theo ranh giới dòng, mỗi đoạn được
+    parse trong một process của pool. Kết quả dạng cột và stats của từng worker
+    được ghép lại theo đúng thứ tự trong file.
+
+    Args:
+        source: Đường dẫn file hoặc đối tượng file-like (UploadedFile, BytesIO, ...)
+        workers: Số process (mặc định PARSE_WORKERS)
+        chunk_size: Số byte đọc mỗi lần trong worker
+
+    Returns:
+        tuple: (columns, stats_dict)
+            - columns: Dictionary {tên cột: list giá trị} theo LOG_COLUMNS
+            - stats_dict: Dictionary chứa thống kê parse đã gộp
+    """
+    workers = workers or PARSE_WORKERS
+
+    # Nguồn không phải file trên đĩa (upload) được ghi ra file tạm để chia đoạn
+    if not isinstance(source, (str, os.PathLike)):
+        with tempfile.NamedTemporaryFile(suffix=".log") as tmp:
+            with open_binary(source) as fh:
+                shutil.copyfileobj(fh, tmp, chunk_size)
+            tmp.flush()
+            return parse_log_file_parallel(tmp.name, workers=workers, chunk_size=chunk_size)
+
+    size = os.path.getsize(source)
+    parts = workers if size >= PARALLEL_MIN_BYTES else 1
+    tasks = [(os.fspath(source), start, end, chunk_size)
+             for start, end in split_byte_ranges(source, parts)]
+
+    if len(tasks) <= 1:
+        results = [_parse_byte_range(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            results = list(executor.map(_parse_byte_range_worker, tasks))
+        for *_, worker_metrics in results:
+            metrics.merge(worker_metrics)
+        results = [result[:2] for result in results]
+
+    columns = {name: [] for name in LOG_COLUMNS}
+    stats = new_parse_stats()
+    for part_columns, part_stats in results:
+        for name in LOG_COLUMNS:
+            columns[name].extend(part_columns[name])
+        merge_parse_stats(stats, part_stats)
+
+    return columns, stats
+
+
+# Số dòng xử lý mỗi lần trong engine vectorized
+VECTOR_BATCH_LINES = 200_000
+
+
+def _build_status_lookups() -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """
+    Tạo bảng tra cứu status -> log_level / response cho engine vectorized
+
+    Returns:
+        tuple: (level_codes, response_categories, response_codes)
+            - level_codes: Mã vị trí trong LOG_LEVELS theo từng status 0..599
+            - response_categories: Danh sách response text duy nhất
+            - response_codes: Mã vị trí trong response_categories theo từng status 0..599
+    """
+    level_codes = np.zeros(600, dtype=np.int8)
+    response_codes = np.zeros(600, dtype=np.int16)
+    response_categories = []
+
+    for status_code in range(100, 600):
+        level_codes[status_code] = LOG_LEVELS.index(determine_log_level(status_code))
+        response_codes[status_code] = len(response_categories)
+        response_categories.append(determine_response_text(status_code))
+
+    return level_codes, response_categories, response_codes
+
+
+_LEVEL_CODES, RESPONSE_CATEGORIES, _RESPONSE_CODES = _build_status_lookups()
+
+# Khớp đúng những dòng LOG_PATTERN khớp, nhưng tách sẵn 4 octet của IP và
+# bỏ các group không dùng đến
+_VECTOR_PATTERN = re.compile(
+    r'(?P<ip>(?P<o1>\d{1,3})\.(?P<o2>\d{1,3})\.(?P<o3>\d{1,3})\.(?P<o4>\d{1,3})) '
+    r'- - '
+    r'\[(?P<time>[^\]]+)\] '
+    r'"\w+ '
+    r'[^\s]+ '
+    r'HTTP/[0-9.]+" '
+    r'(?P<status>\d{3}) '
+    r'(?:\d+|-)'
+)
+
+
+def _parse_timestamps_vectorized(times: pd.Series, decoder: TimestampDecoder) -> pd.Series:
+    """
+    Parse cột thời gian: mỗi chuỗi khác nhau chỉ được decode một lần
+
+    Returns:
+        Series datetime64 (NaT nếu không parse được)
+    """
+    codes, unique_values = pd.factorize(times)
+    parsed = pd.to_datetime(pd.Series([decoder.decode(value) for value in unique_values], dtype=object))
+    if len(codes) == 0:
+        return pd.Series(parsed.to_numpy(), index=times.index, dtype="datetime64[ns]")
+    return pd.Series(parsed.to_numpy()[codes], index=times.index)
+
+
+def _parse_lines_vectorized(
+    lines: List[str],
+    stats: Dict,
+    decoder: TimestampDecoder
+) -> pd.DataFrame:
+    """
+    Parse một batch dòng log bằng các phép toán vectorized của pandas/NumPy
+    """
+    series = pd.Series(lines, dtype=object).str.strip()
+    stats['total_lines'] += len(series)
+
+    empty = series == ''
+    stats['empty_lines'] += int(empty.sum())
+    series = series[~empty]
+
+    # 1. Áp dụng LOG_PATTERN (dạng tách sẵn octet) cho toàn bộ Series
+    with metrics.timer("parse.regex", len(series)):
+        parts = series.str.extract(_VECTOR_PATTERN)
+    matched = parts['ip'].notna()
+    stats['parse_errors'] += int((~matched).sum())
+    parts = parts[matched]
+
+    # 2. Validate IP: từng octet phải nằm trong 0..255
+    octets = parts[['o1', 'o2', 'o3', 'o4']].astype(np.int16)
+    valid_ip = (octets <= 255).all(axis=1)
+    stats['invalid_ips'] += int((~valid_ip).sum())
+    parts = parts[valid_ip]
+
+    # 3. Parse timestamp
+    with metrics.timer("parse.timestamp", len(parts)):
+        timestamps = _parse_timestamps_vectorized(parts['time'], decoder)
+    valid_time = timestamps.notna()
+    stats['timestamp_errors'] += int((~valid_time).sum())
+    parts = parts[valid_time]
+    timestamps = timestamps[valid_time]
+
+    # 4. Validate status code trong phạm vi 100..599
+    status = parts['status'].astype(np.int64)
+    valid_status = (status >= 100) & (status <= 599)
+    stats['invalid_status'] += int((~valid_status).sum())
+
+    status = status[valid_status].to_numpy()
+    stats['parsed_success'] += len(status)
+
+    # 5. Tạo log_level / response bằng bảng tra cứu
+    with metrics.timer("parse.frame"):
+        return pd.DataFrame({
+            "ip": parts['ip'][valid_status].to_numpy(dtype=object),
+            "timestamp": timestamps[valid_status].to_numpy(),
+            "status": status,
+            "log_level": pd.Categorical.from_codes(_LEVEL_CODES[status], categories=LOG_LEVELS),
+            "response": pd.Categorical.from_codes(_RESPONSE_CODES[status], categories=RESPONSE_CATEGORIES),
+        })
+
+
+def parse_log_dataframe(
+    source,
+    batch_lines: int = VECTOR_BATCH_LINES,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Engine vectorized: parse log và trả về trực tiếp DataFrame có kiểu dữ liệu
+
+    Cho cùng kết quả và cùng bộ đếm stats như engine từng dòng (parse_log_stream)
+    nhưng xử lý từng batch dòng bằng str.extract và phép so sánh vectorized.
+
+    Args:
+        source: Đường dẫn file hoặc đối tượng file-like (UploadedFile, BytesIO, ...)
+        batch_lines: Số dòng xử lý mỗi lần
+        chunk_size: Số byte đọc mỗi lần
+
+    Returns:
+        tuple: (df, stats_dict)
+            - df: DataFrame với các cột LOG_COLUMNS (log_level/response dạng category)
+            - stats_dict: Dictionary chứa thống kê parse
+    """
+    stats = new_parse_stats()
+    frames = []
+    line_iter = iter_log_lines(source, chunk_size=chunk_size, stats=stats)
+
+    # Xác định format thời gian một lần từ các dòng đầu file
+    lines = list(islice(line_iter, TIMESTAMP_SAMPLE_LINES))
+    decoder = new_timestamp_decoder(lines)
+
+    for line in line_iter:
+        lines.append(line)
+        if len(lines) >= batch_lines:
+            frames.append(_parse_lines_vectorized(lines, stats, decoder))
+            lines = []
+
+    if lines or not frames:
+        frames.append(_parse_lines_vectorized(lines, stats, decoder))
+
+    return pd.concat(frames, ignore_index=True), stats
+
+
+PARSE_ENGINES = ["line", "parallel", "vectorized"]
+
+
+def parse_log_to_dataframe(
+    source,
+    engine: str = "line"
+) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Parse log bằng engine được chọn và trả về DataFrame
+
+    Args:
+        source: Đường dẫn file hoặc đối tượng file-like
+        engine: 'line' (từng dòng), 'parallel' (nhiều process) hoặc 'vectorized'
+
+    Returns:
+        tuple: (df, stats_dict)
+    """
+    if engine == "vectorized":
+        return parse_log_dataframe(source)
+
+    if engine == "parallel":
+        columns, stats = parse_log_file_parallel(source)
+        return pd.DataFrame(columns, columns=LOG_COLUMNS), stats
+
+    if engine == "line":
+        stats = new_parse_stats()
+        data_list = []
+        for batch in parse_log_stream(source, stats=stats):
+            data_list.extend(batch)
+        return pd.DataFrame(data_list, columns=LOG_COLUMNS), stats
+
+    raise ValueError(f"Engine không hợp lệ: {engine}")
+
+
+def parse_log_dataset(source, engine: str = "line") -> Tuple[LogDataset, Dict]:
+    """
+    Parse log thành LogDataset dạng cột gọn
+
+    Với engine 'line', mỗi batch được chuyển sang dạng gọn ngay khi parse xong
+    nên không bao giờ giữ toàn bộ list tuple trong bộ nhớ.
+
+    Returns:
+        tuple: (dataset, stats_dict)
+    """
+    with metrics.timer("parse.total"):
+        if engine != "line":
+            df, stats = parse_log_to_dataframe(source, engine=engine)
+            with metrics.timer("parse.frame"):
+                dataset = LogDataset.from_dataframe(df)
         else:
-            st.warning(stats_message)
-        
-        # Cảnh báo nếu quá nhiều lỗi
-        total_errors = (stats['parse_errors'] + stats['invalid_ips'] + 
-                       stats['timestamp_errors'] + stats['invalid_status'])
-        
-        if total_errors > stats['parsed_success']:
-            st.error("""
-            ⚠️ Số dòng lỗi nhiều hơn số dòng thành công!
-            
-            Gợi ý khắc phục:
-            1. Kiểm tra format log có đúng chuẩn Apache/Nginx không
-            2. Xem mẫu log mong đợi: `127.0.0.1 - - [04/Dec/2025:10:00:00 +0700] "GET /index.html HTTP/1.1" 200 1024`
-            3. Kiểm tra encoding file (UTF-8 hoặc Latin-1)
-            """)
-    
+            stats = new_parse_stats()
+            dataset = _compact_concat(parse_log_stream(source, stats=stats))
+    metrics.incr("parse.lines", stats['total_lines'])
+    metrics.incr("parse.rows", stats['parsed_success'])
+    return dataset, stats
+
+
+def _compact_concat(batches: Iterator[List[Tuple]]) -> LogDataset:
+    """
+    Chuyển từng batch tuple sang dạng gọn ngay khi parse xong rồi ghép lại
+    """
+    datasets = []
+    for batch in batches:
+        with metrics.timer("parse.frame"):
+            datasets.append(LogDataset.from_records(batch))
+    return LogDataset.concat(datasets)
+
+
+def parse_log_file(
+    source,
+    progress: Optional[Callable[[int], None]] = None,
+    on_warning: Optional[Callable[[str], None]] = None
+) -> Tuple[List[Tuple], Dict]:
+    """
+    Đọc file log và trả về danh sách các bản ghi đã parse
+
+    Args:
+        source: Đường dẫn file hoặc đối tượng file-like
+        progress: Callback nhận tổng số byte đã đọc
+        on_warning: Callback nhận cảnh báo cho các dòng lỗi đầu tiên
+
+    Returns:
+        tuple: (data_list, stats_dict)
+            - data_list: List các tuple (ip_address, timestamp, status, log_level, response)
+            - stats_dict: Dictionary chứa thống kê parse
+    """
+    data_list = []
+    stats = new_parse_stats()
+
+    with metrics.timer("parse.total"):
+        for batch in parse_log_stream(source, stats=stats, on_warning=on_warning, progress=progress):
+            data_list.extend(batch)
+
     return data_list, stats
 
+
+def parse_source(
+    source,
+    engine: str = "line",
+    progress: Optional[Callable[[int], None]] = None,
+    on_warning: Optional[Callable[[str], None]] = None
+) -> Tuple[LogDataset, Dict, List[Dict]]:
+    """
+    Parse một file log (thường, nén hoặc archive) thành LogDataset, không phụ thuộc giao diện.
+
+    File nén (.gz, .bz2, .xz, .zst) và archive (.tar, .zip) được giải nén dạng
+    streaming, các member được parse đồng thời (xem modules.archives).
+    Lỗi đọc file được raise cho nơi gọi xử lý.
+
+    Args:
+        source: Đường dẫn file hoặc đối tượng file-like (UploadedFile, BytesIO, ...)
+        engine: Một trong PARSE_ENGINES
+        progress: Callback nhận tổng số byte đã đọc (chỉ engine "line")
+        on_warning: Callback nhận cảnh báo cho các dòng lỗi đầu tiên (chỉ engine "line")
+
+    Returns:
+        tuple: (dataset, stats_dict, members) - members: thống kê từng file của archive
+    """
+    from modules.archives import is_archive, parse_archive
+
+    if is_archive(source):
+        return parse_archive(source, engine=engine)
+
+    if engine == "line":
+        stats = new_parse_stats()
+        with metrics.timer("parse.total"):
+            batches = parse_log_stream(source, stats=stats, on_warning=on_warning, progress=progress)
+            dataset = _compact_concat(batches)
+        metrics.incr("parse.lines", stats['total_lines'])
+        metrics.incr("parse.rows", stats['parsed_success'])
+        return dataset, stats, []
+
+    dataset, stats = parse_log_dataset(source, engine=engine)
+    return dataset, stats, []
+
+
 def generate_sample_log(num_lines: int = 10) -> str:
     """
     Tạo file log mẫu để test
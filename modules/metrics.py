@@ -0,0 +1,222 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+# Bật/tắt đo thời gian từng giai đoạn (upload → parse → save → render, truy vấn database)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+
+# Cổng HTTP xuất /metrics (Prometheus) và /metrics.json, 0 = không mở
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+
+# Parse theo dòng: cứ mỗi N dòng đo riêng regex và timestamp của một dòng rồi nhân lên N
+METRICS_SAMPLE_EVERY = int(os.getenv('METRICS_SAMPLE_EVERY', 256))
+
+METRICS_PREFIX = "log_analyzer"
+
+_NULL_TIMER = nullcontext()
+
+
+class Metrics:
+    """
+    Bộ đếm và bộ đo thời gian theo giai đoạn, dùng chung cho cả process (thread-safe).
+
+    - timer/observe: số lần, tổng thời gian, thời gian lớn nhất của một giai đoạn
+    - incr: bộ đếm sự kiện (số dòng, cache hit, ...)
+
+    Tên giai đoạn có dạng '<nhóm>.<bước>' (parse.regex, save.insert, db.query.get_statistics).
+    Khi tắt, timer trả về context rỗng dùng chung và các hàm ghi nhận trả về ngay.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._timers: Dict[str, list] = {}     # name -> [count, total_sec, max_sec]
+        self._counters: Dict[str, float] = {}
+        self.started = time.time()
+
+    def observe(self, name: str, seconds: float, count: int = 1):
+        """
+        Ghi nhận `count` lần chạy của giai đoạn `name` với tổng thời gian `seconds`
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._timers.get(name)
+            if entry is None:
+                self._timers[name] = [count, seconds, seconds / count if count else seconds]
+            else:
+                entry[0] += count
+                entry[1] += seconds
+                entry[2] = max(entry[2], seconds / count if count else seconds)
+
+    def incr(self, name: str, value: float = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    @contextmanager
+    def _timer(self, name: str, count: int = 1):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, count)
+
+    def timer(self, name: str, count: int = 1):
+        """
+        Context manager đo thời gian một giai đoạn (count: số đơn vị được xử lý, ví dụ số dòng):
+
+            with metrics.timer("save.insert"):
+                ...
+        """
+        return self._timer(name, count) if self.enabled else _NULL_TIMER
+
+    def timed(self, name: Optional[str] = None):
+        """
+        Decorator đo thời gian mỗi lần gọi hàm (mặc định dùng tên hàm)
+        """
+        def decorator(func):
+            stage = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self._timer(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # ------------------------------------------------------------------
+    # Đọc / gộp / xuất
+    # ------------------------------------------------------------------
+    def snapshot(self) -> Dict:
+        """
+        Returns:
+            dict: {'timers': {name: {count, total_sec, max_sec, avg_ms}}, 'counters': {name: value},
+                   'enabled', 'uptime_sec'}
+        """
+        with self._lock:
+            timers = {name: list(entry) for name, entry in self._timers.items()}
+            counters = dict(self._counters)
+        return {
+            'enabled': self.enabled,
+            'uptime_sec': time.time() - self.started,
+            'timers': {
+                name: {
+                    'count': count,
+                    'total_sec': total,
+                    'max_sec': peak,
+                    'avg_ms': total / count * 1000 if count else 0.0,
+                }
+                for name, (count, total, peak) in sorted(timers.items())
+            },
+            'counters': dict(sorted(counters.items())),
+        }
+
+    def drain(self) -> Dict:
+        """
+        Lấy số liệu thô rồi xóa (dùng trong process worker để gửi về process chính)
+        """
+        with self._lock:
+            data = {'timers': self._timers, 'counters': self._counters}
+            self._timers, self._counters = {}, {}
+        return data
+
+    def merge(self, data: Dict):
+        """
+        Gộp số liệu thô từ drain() của process khác
+        """
+        if not self.enabled or not data:
+            return
+        with self._lock:
+            for name, (count, total, peak) in data['timers'].items():
+                entry = self._timers.setdefault(name, [0, 0.0, 0.0])
+                entry[0] += count
+                entry[1] += total
+                entry[2] = max(entry[2], peak)
+            for name, value in data['counters'].items():
+                self._counters[name] = self._counters.get(name, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self._timers, self._counters = {}, {}
+            self.started = time.time()
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """
+        Định dạng text exposition của Prometheus
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def family(metric: str, kind: str, help_text: str, label: str, values: Dict[str, float]):
+            lines.append(f"# HELP {METRICS_PREFIX}_{metric} {help_text}")
+            lines.append(f"# TYPE {METRICS_PREFIX}_{metric} {kind}")
+            for name, value in values.items():
+                lines.append(f'{METRICS_PREFIX}_{metric}{{{label}="{name}"}} {value:.6g}')
+
+        timers = snapshot['timers']
+        family("stage_seconds_total", "counter", "Tổng thời gian của giai đoạn", "stage",
+               {name: t['total_sec'] for name, t in timers.items()})
+        family("stage_calls_total", "counter", "Số lần chạy giai đoạn", "stage",
+               {name: t['count'] for name, t in timers.items()})
+        family("stage_seconds_max", "gauge", "Thời gian lớn nhất của một lần chạy", "stage",
+               {name: t['max_sec'] for name, t in timers.items()})
+        family("events_total", "counter", "Bộ đếm sự kiện", "name", snapshot['counters'])
+        lines.append(f"# TYPE {METRICS_PREFIX}_uptime_seconds gauge")
+        lines.append(f"{METRICS_PREFIX}_uptime_seconds {snapshot['uptime_sec']:.0f}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = metrics.to_prometheus(), "text/plain; version=0.0.4; charset=utf-8"
+        elif self.path == "/metrics.json":
+            body, content_type = metrics.to_json(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int = METRICS_PORT) -> Optional[ThreadingHTTPServer]:
+    """
+    Mở endpoint /metrics và /metrics.json trên một thread nền (chỉ mở một lần mỗi process)
+
+    Returns:
+        Server đang chạy, hoặc None nếu port = 0
+    """
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
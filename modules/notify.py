@@ -0,0 +1,100 @@
+"""
+Thông báo từ phần lõi (parser, database, ingest) ra ngoài mà không phụ thuộc Streamlit.
+
+Phần lõi chỉ gọi notify.error / warning / info / success; nơi nhận thông báo do
+lớp ngoài cùng quyết định bằng set_notifier():
+    - mặc định: ghi qua logging (cron, worker, benchmark, CLI)
+    - app Streamlit: hiển thị st.error / st.warning ... (modules.ui.streamlit_notifier)
+
+capture() gom các thông báo thành danh sách dict để báo cáo lỗi có cấu trúc.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("log_analyzer")
+
+LEVELS = {
+    'error': logging.ERROR,
+    'warning': logging.WARNING,
+    'info': logging.INFO,
+    'success': logging.INFO,
+}
+
+# Notifier nhận (level, message), level là một khóa của LEVELS
+Notifier = Callable[[str, str], None]
+
+
+def log_notifier(level: str, message: str):
+    """
+    Notifier mặc định: ghi thông báo qua logging
+    """
+    logger.log(LEVELS.get(level, logging.INFO), message.strip())
+
+
+_notifier: Notifier = log_notifier
+_lock = threading.Lock()
+
+
+def set_notifier(notifier: Optional[Notifier]) -> Notifier:
+    """
+    Đổi nơi nhận thông báo cho cả process (None = logging)
+
+    Returns:
+        Notifier trước đó
+    """
+    global _notifier
+    with _lock:
+        previous, _notifier = _notifier, notifier or log_notifier
+    return previous
+
+
+def notify(level: str, message: str):
+    _notifier(level, message)
+
+
+def error(message: str):
+    notify('error', message)
+
+
+def warning(message: str):
+    notify('warning', message)
+
+
+def info(message: str):
+    notify('info', message)
+
+
+def success(message: str):
+    notify('success', message)
+
+
+@contextmanager
+def capture(levels=('error', 'warning'), forward: bool = True) -> Iterator[List[Dict]]:
+    """
+    Gom các thông báo trong khối with thành list dict {level, message, time}
+
+        with notify.capture() as events:
+            ingest_source(path)
+        errors = [e for e in events if e['level'] == 'error']
+
+    Args:
+        levels: Các level được gom
+        forward: Vẫn chuyển thông báo cho notifier hiện tại
+    """
+    events: List[Dict] = []
+    previous = _notifier
+
+    def collect(level: str, message: str):
+        if level in levels:
+            events.append({'level': level, 'message': message.strip(), 'time': time.time()})
+        if forward:
+            previous(level, message)
+
+    set_notifier(collect)
+    try:
+        yield events
+    finally:
+        set_notifier(previous)
@@ -0,0 +1,88 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from modules.dataset import LogDataset
+from modules.settings import DB_PAGE_SIZE
+from modules.storage import fetch_log_page
+
+
+class LogPager:
+    """
+    Duyệt server_logs theo từng trang (keyset pagination trên (timestamp, id)).
+
+    Chỉ giữ trang đang xem và trang kế tiếp trong bộ nhớ; trang kế tiếp được
+    đọc trước ở thread nền nên bấm "Next" không phải chờ truy vấn. Cursor của
+    các trang đã xem được giữ lại để quay về trang trước.
+    """
+
+    def __init__(
+        self,
+        page_size: int = DB_PAGE_SIZE,
+        filters: Optional[Dict] = None,
+        fetch: Callable[..., Tuple[LogDataset, Optional[Tuple]]] = fetch_log_page
+    ):
+        """
+        Args:
+            page_size: Số dòng mỗi trang
+            filters: log_level, status, ip_address truyền cho fetch
+            fetch: Hàm đọc một trang, trả về (LogDataset, cursor kế tiếp)
+        """
+        self.page_size = page_size
+        self.filters = {k: v for k, v in (filters or {}).items() if v is not None}
+        self._fetch = fetch
+        self._cursors: List[Optional[Tuple]] = [None]   # cursor bắt đầu của từng trang đã biết
+        self.index = 0
+        self._page: Optional[Tuple[LogDataset, Optional[Tuple]]] = None
+        self._prefetch: Optional[Tuple[int, Future]] = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def _load(self, index: int) -> Tuple[LogDataset, Optional[Tuple]]:
+        return self._fetch(self._cursors[index], self.page_size, **self.filters)
+
+    def _schedule_prefetch(self):
+        next_cursor = self._page[1]
+        if next_cursor is None:
+            return
+        if len(self._cursors) == self.index + 1:
+            self._cursors.append(next_cursor)
+        if self._prefetch is None or self._prefetch[0] != self.index + 1:
+            self._prefetch = (self.index + 1, self._executor.submit(self._load, self.index + 1))
+
+    def current(self) -> LogDataset:
+        """
+        Trang đang xem (đọc từ database nếu chưa có) và bắt đầu đọc trước trang kế tiếp
+        """
+        if self._page is None:
+            if self._prefetch is not None and self._prefetch[0] == self.index:
+                future = self._prefetch[1]
+                self._prefetch = None
+                try:
+                    self._page = future.result()
+                except Exception:
+                    self._page = self._load(self.index)
+            else:
+                self._page = self._load(self.index)
+        self._schedule_prefetch()
+        return self._page[0]
+
+    @property
+    def has_next(self) -> bool:
+        return self._page is not None and self._page[1] is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.index > 0
+
+    def next(self):
+        if self.has_next:
+            self.index += 1
+            self._page = None
+
+    def prev(self):
+        if self.has_prev:
+            self.index -= 1
+            self._page = None
+            self._prefetch = None
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,723 @@
+"""
+Backend lưu trữ Parquet nhúng (STORAGE_BACKEND=parquet): log được ghi thành các
+file Parquet phân vùng theo ngày (PARQUET_DIR/day=YYYY-MM-DD/part-*.parquet) và
+truy vấn bằng pyarrow.dataset, không cần MySQL server.
+
+- Bộ lọc được đẩy xuống pyarrow (predicate pushdown): điều kiện thời gian loại
+  cả thư mục ngày không liên quan, thống kê min/max của row group loại tiếp các
+  row group; chỉ các cột cần cho từng truy vấn được đọc (column pruning).
+- Các hàm có cùng tên, tham số và dạng kết quả với modules.database nên
+  modules.storage chọn được backend chỉ bằng cấu hình.
+- Không có bảng tổng hợp / sketch: thống kê được tính chính xác trên các cột gọn
+  (ip uint32, status uint16, log_level/response dạng dictionary).
+- row_hash được lưu cùng dòng; khi ghi, các dòng có row_hash đã có trong cùng
+  ngày và cùng khoảng thời gian của batch bị bỏ (thay cho unique index uq_row_hash),
+  nên đọc lại một đoạn log (follower, nạp lại file) không ghi trùng. File đã nạp
+  được bỏ qua qua manifest (_ingest_manifest.json).
+"""
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from modules import notify
+from modules.dataset import LOG_COLUMNS, LogDataset, exact_ip_summary, ipv4_to_uint32
+from modules.metrics import metrics
+from modules.settings import DB_BATCH_SIZE, DB_PAGE_SIZE, LOG_RETENTION_DAYS, PARTITION_DAYS_AHEAD
+from modules.storage_common import _stage_report, show_save_report, timed_query
+from modules.timeseries import RateIndex
+
+PARQUET_DIR = os.getenv('PARQUET_DIR', 'data/parquet')                  # Thư mục chứa dữ liệu
+PARQUET_FILE_ROWS = int(os.getenv('PARQUET_FILE_ROWS', 1_000_000))      # Số dòng gom lại trước khi ghi file
+PARQUET_FLUSH_SECONDS = float(os.getenv('PARQUET_FLUSH_SECONDS', 60))  # Follower: số giây gom tối đa trước khi ghi file
+PARQUET_ROW_GROUP = int(os.getenv('PARQUET_ROW_GROUP', 128 * 1024))    # Số dòng mỗi row group
+PARQUET_COMPRESSION = os.getenv('PARQUET_COMPRESSION', 'zstd')
+
+MANIFEST_FILE = '_ingest_manifest.json'
+
+SCHEMA = pa.schema([
+    ("ip", pa.uint32()),
+    ("timestamp", pa.timestamp("s")),
+    ("status", pa.uint16()),
+    ("log_level", pa.dictionary(pa.int32(), pa.string())),
+    ("response", pa.dictionary(pa.int32(), pa.string())),
+    ("row_hash", pa.binary(16)),   # NULL với dữ liệu không có row_hash (save_dataframe, file ghi trước đây)
+])
+
+PARTITIONING = ds.partitioning(pa.schema([("day", pa.string())]), flavor="hive")
+
+_write_lock = threading.Lock()
+
+
+def _day_dir(day: str) -> str:
+    return os.path.join(PARQUET_DIR, f"day={day}")
+
+
+def _day_name(epoch: int) -> str:
+    """
+    Thư mục ngày (YYYY-MM-DD, theo UTC) chứa thời điểm epoch giây
+    """
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _list_days() -> List[str]:
+    """
+    Các ngày đã có dữ liệu (YYYY-MM-DD), tăng dần
+    """
+    if not os.path.isdir(PARQUET_DIR):
+        return []
+    return sorted(name[4:] for name in os.listdir(PARQUET_DIR)
+                  if name.startswith("day=") and os.path.isdir(os.path.join(PARQUET_DIR, name)))
+
+
+def _dataset() -> Optional[ds.Dataset]:
+    """
+    Toàn bộ dữ liệu dạng pyarrow Dataset (chưa đọc gì), None nếu chưa có dữ liệu
+    """
+    if not _list_days():
+        return None
+    return ds.dataset(PARQUET_DIR, schema=SCHEMA.append(pa.field("day", pa.string())),
+                      format="parquet", partitioning=PARTITIONING)
+
+
+def _timestamp_scalar(value) -> pa.Scalar:
+    return pa.scalar(pd.Timestamp(value).to_pydatetime(), pa.timestamp("s"))
+
+
+def build_filter(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    log_level: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    min_status: Optional[int] = None,
+    max_status: Optional[int] = None,
+    status: Optional[int] = None
+) -> Optional[ds.Expression]:
+    """
+    Biểu thức lọc pyarrow tương đương build_log_filters của modules.database.
+    Điều kiện thời gian được lặp lại trên cột partition day để bỏ qua cả thư mục ngày.
+    """
+    conditions = []
+
+    if start_date:
+        conditions.append(ds.field("day") >= pd.Timestamp(start_date).strftime("%Y-%m-%d"))
+        conditions.append(ds.field("timestamp") >= _timestamp_scalar(start_date))
+
+    if end_date:
+        conditions.append(ds.field("day") <= pd.Timestamp(end_date).strftime("%Y-%m-%d"))
+        conditions.append(ds.field("timestamp") <= _timestamp_scalar(end_date))
+
+    if log_level:
+        conditions.append(ds.field("log_level") == log_level)
+
+    if ip_address:
+        conditions.append(ds.field("ip") == pa.scalar(int(ipv4_to_uint32([ip_address])[0]), pa.uint32()))
+
+    if status is not None:
+        conditions.append(ds.field("status") == pa.scalar(status, pa.uint16()))
+
+    if min_status is not None:
+        conditions.append(ds.field("status") >= pa.scalar(min_status, pa.uint16()))
+
+    if max_status is not None:
+        conditions.append(ds.field("status") <= pa.scalar(max_status, pa.uint16()))
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def _read(columns: List[str], expression: Optional[ds.Expression] = None) -> pa.Table:
+    """
+    Đọc các cột `columns` của những dòng thỏa expression
+    """
+    dataset = _dataset()
+    if dataset is None:
+        return SCHEMA.empty_table().select(columns)
+    return dataset.to_table(columns=columns, filter=expression)
+
+
+def _to_frame(table: pa.Table) -> pd.DataFrame:
+    """
+    Bảng Arrow thành frame dạng gọn của LogDataset (timestamp int64 epoch giây, category)
+    """
+    if "timestamp" in table.column_names:
+        index = table.column_names.index("timestamp")
+        table = table.set_column(index, "timestamp", pc.cast(table["timestamp"], pa.int64()))
+    return table.to_pandas()
+
+
+def _to_table(frame: pd.DataFrame) -> pa.Table:
+    """
+    Frame dạng gọn của LogDataset thành bảng Arrow theo SCHEMA
+    """
+    return pa.table({
+        "ip": pa.array(frame["ip"].to_numpy(), pa.uint32()),
+        "timestamp": pa.array(frame["timestamp"].to_numpy(), pa.int64()).cast(pa.timestamp("s")),
+        "status": pa.array(frame["status"].to_numpy(), pa.uint16()),
+        "log_level": pa.array(frame["log_level"]).cast(SCHEMA.field("log_level").type),
+        "response": pa.array(frame["response"]).cast(SCHEMA.field("response").type),
+        "row_hash": pa.array(frame["row_hash"].to_numpy() if "row_hash" in frame.columns else [None] * len(frame),
+                             pa.binary(16)),
+    }, schema=SCHEMA)
+
+
+def _drop_existing(part: pd.DataFrame, day: str) -> pd.DataFrame:
+    """
+    Bỏ các dòng có row_hash đã có trong ngày `day` (chỉ đọc row_hash trong khoảng
+    thời gian của part) hoặc lặp lại trong chính part, như INSERT IGNORE trên uq_row_hash
+    """
+    if "row_hash" not in part.columns:
+        return part
+    timestamps = part["timestamp"].to_numpy()
+    existing = _read(["row_hash"], (ds.field("day") == day)
+                     & (ds.field("timestamp") >= pa.scalar(int(timestamps.min()), pa.int64()).cast(pa.timestamp("s")))
+                     & (ds.field("timestamp") <= pa.scalar(int(timestamps.max()), pa.int64()).cast(pa.timestamp("s")))
+                     & ds.field("row_hash").is_valid())
+    # So khớp bằng set Python: isin của pandas chuyển bytes sang mảng 'S' và làm mất byte 0 ở cuối
+    seen = set(existing["row_hash"].to_pylist())
+    keep = np.ones(len(part), dtype=bool)
+    for position, row_hash in enumerate(part["row_hash"]):
+        if row_hash is None:
+            continue
+        if row_hash in seen:
+            keep[position] = False
+        else:
+            seen.add(row_hash)
+    return part[keep]
+
+
+def _write_frame(frame: pd.DataFrame) -> int:
+    """
+    Ghi frame dạng gọn (có thể kèm cột row_hash) thành một file mỗi ngày, bỏ các
+    dòng đã ghi trước đó (_drop_existing), các dòng sắp theo timestamp để
+    thống kê min/max của row group lọc được theo thời gian.
+    File được ghi ra tên tạm (bắt đầu bằng '.', pyarrow bỏ qua) rồi đổi tên,
+    nên truy vấn đồng thời không bao giờ đọc phải file ghi dở.
+
+    Returns:
+        int: Số dòng đã ghi
+    """
+    if frame.empty:
+        return 0
+    written = 0
+    days = frame["timestamp"].to_numpy() // 86400
+    for day in np.unique(days):
+        name = _day_name(int(day) * 86400)
+        part = _drop_existing(frame[days == day], name).sort_values("timestamp", kind="stable")
+        if part.empty:
+            continue
+        directory = _day_dir(name)
+        os.makedirs(directory, exist_ok=True)
+        filename = f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet"
+        tmp_path = os.path.join(directory, f".{filename}.tmp")
+        pq.write_table(_to_table(part), tmp_path, row_group_size=PARQUET_ROW_GROUP,
+                       compression=PARQUET_COMPRESSION)
+        os.replace(tmp_path, os.path.join(directory, filename))
+        written += len(part)
+    return written
+
+
+# ----------------------------------------------------------------------
+# Ghi
+# ----------------------------------------------------------------------
+def _batch_dataset(batch: List[Tuple]) -> LogDataset:
+    """
+    Dataset dạng gọn của một batch tuple, giữ row_hash (phần tử thứ 6 nếu có) thành cột row_hash
+    """
+    dataset = LogDataset.from_records(batch)
+    if batch and len(batch[0]) > 5:
+        dataset.frame["row_hash"] = [entry[5] for entry in batch]
+    return dataset
+
+
+def bulk_save_batches(
+    batches: Iterable[List[Tuple]],
+    workers: int = 1,
+    use_load_data: bool = False,
+    queue_batches: int = 1
+) -> Dict:
+    """
+    Ghi các batch log thành file Parquet (cùng dạng báo cáo với modules.database.bulk_save_batches).
+
+    Các batch được gom tới PARQUET_FILE_ROWS dòng rồi ghi trên một thread riêng
+    trong khi batch tiếp theo được parse; chỉ một lần ghi chạy cùng lúc nên bộ
+    nhớ tối đa khoảng hai lần PARQUET_FILE_ROWS dòng. Dòng có row_hash đã ghi
+    trước đó bị bỏ qua và không tính vào rows_inserted.
+
+    Args:
+        batches: Iterable các list tuple (ip_address, timestamp, status, log_level, response[, row_hash])
+        workers, use_load_data, queue_batches: Giữ cho cùng chữ ký với backend MySQL, không dùng
+    """
+    report = {
+        'rows_inserted': 0,
+        'batches': 0,
+        'failed_batches': [],
+        'elapsed_sec': 0.0,
+        'rows_per_sec': 0.0,
+        'stages': {},
+    }
+    counters = {'parsed_rows': 0, 'parse_sec': 0.0, 'backpressure_sec': 0.0,
+                'written_rows': 0, 'insert_sec': 0.0}
+    start = time.perf_counter()
+
+    def flush(datasets: List[LogDataset], batch_numbers: List[int]):
+        t0 = time.perf_counter()
+        try:
+            with _write_lock, metrics.timer("save.insert"):
+                written = _write_frame(LogDataset.concat(datasets).frame)
+        except Exception as e:
+            for batch_no, dataset in zip(batch_numbers, datasets):
+                report['failed_batches'].append({'batch': batch_no, 'rows': len(dataset), 'error': str(e)})
+        else:
+            report['rows_inserted'] += written
+            counters['written_rows'] += written
+        finally:
+            counters['insert_sec'] += time.perf_counter() - t0
+
+    pending: List[LogDataset] = []
+    numbers: List[int] = []
+    in_flight = []
+
+    def submit(executor):
+        # Chờ lần ghi trước xong (backpressure) rồi ghi khối mới ở thread nền
+        t0 = time.perf_counter()
+        for future in in_flight:
+            future.result()
+        in_flight.clear()
+        counters['backpressure_sec'] += time.perf_counter() - t0
+        if pending:
+            in_flight.append(executor.submit(flush, list(pending), list(numbers)))
+            pending.clear()
+            numbers.clear()
+
+    iterator = iter(batches)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        while True:
+            t0 = time.perf_counter()
+            batch = next(iterator, None)
+            if batch is not None:
+                pending.append(_batch_dataset(batch))
+                numbers.append(report['batches'])
+                report['batches'] += 1
+                counters['parsed_rows'] += len(batch)
+            counters['parse_sec'] += time.perf_counter() - t0
+            if batch is None:
+                break
+            if sum(len(dataset) for dataset in pending) >= PARQUET_FILE_ROWS:
+                submit(executor)
+        submit(executor)
+        for future in in_flight:
+            future.result()
+
+    report['elapsed_sec'] = time.perf_counter() - start
+    report['stages'] = {
+        'parse': _stage_report(counters['parsed_rows'], counters['parse_sec'], counters['backpressure_sec']),
+        'insert': _stage_report(counters['written_rows'], counters['insert_sec'],
+                                max(report['elapsed_sec'] - counters['insert_sec'], 0.0)),
+        'queue_peak': 1,
+    }
+    metrics.observe("save.total", report['elapsed_sec'])
+    metrics.incr("save.rows", report['rows_inserted'])
+    metrics.incr("save.batches", report['batches'])
+    metrics.incr("save.failed_batches", len(report['failed_batches']))
+    if report['elapsed_sec'] > 0:
+        report['rows_per_sec'] = report['rows_inserted'] / report['elapsed_sec']
+    report['failed_batches'].sort(key=lambda item: item['batch'])
+    return report
+
+
+def save_dataframe(data, batch_size: int = DB_BATCH_SIZE, use_load_data: bool = False) -> bool:
+    """
+    Lưu DataFrame hoặc LogDataset thành file Parquet (LogDataset được ghi thẳng
+    từ các cột gọn, không chuyển qua tuple)
+
+    Returns:
+        bool: True nếu ghi thành công
+    """
+    if data is None or data.empty:
+        notify.warning("Không có dữ liệu để lưu")
+        return False
+
+    dataset = data if isinstance(data, LogDataset) else LogDataset.from_dataframe(data)
+    report = {'rows_inserted': 0, 'batches': 1, 'failed_batches': [], 'rows_per_sec': 0.0}
+    start = time.perf_counter()
+    try:
+        with _write_lock, metrics.timer("save.insert"):
+            report['rows_inserted'] = _write_frame(dataset.frame)
+    except Exception as e:
+        report['failed_batches'].append({'batch': 0, 'rows': len(dataset), 'error': str(e)})
+    elapsed = time.perf_counter() - start
+    if elapsed > 0:
+        report['rows_per_sec'] = report['rows_inserted'] / elapsed
+    return show_save_report(report)
+
+
+# ----------------------------------------------------------------------
+# Manifest nạp file (xem modules.ingest)
+# ----------------------------------------------------------------------
+def _manifest_path() -> str:
+    return os.path.join(PARQUET_DIR, MANIFEST_FILE)
+
+
+def _load_manifest() -> Dict:
+    try:
+        with open(_manifest_path(), "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def get_last_ingest(head_hash: bytes) -> Optional[dict]:
+    """
+    Lần nạp gần nhất của file có head_hash (cùng dạng với bản MySQL)
+    """
+    entry = _load_manifest().get(head_hash.hex())
+    if entry is None:
+        return None
+    return dict(entry, tail_hash=bytes.fromhex(entry['tail_hash']))
+
+
+def record_ingest(entry: dict) -> bool:
+    """
+    Ghi một lần nạp file vào manifest (chỉ giữ lần nạp có range_end lớn nhất của mỗi file)
+    """
+    try:
+        with _write_lock:
+            manifest = _load_manifest()
+            key = entry['head_hash'].hex()
+            previous = manifest.get(key)
+            if previous is None or previous['range_end'] <= entry['range_end']:
+                manifest[key] = dict(entry, head_hash=key, tail_hash=entry['tail_hash'].hex(),
+                                     loaded_at=datetime.now().isoformat(sep=' ', timespec='seconds'))
+            os.makedirs(PARQUET_DIR, exist_ok=True)
+            tmp_path = _manifest_path() + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump(manifest, fh)
+            os.replace(tmp_path, _manifest_path())
+        return True
+    except OSError as e:
+        notify.error(f"Lỗi khi ghi manifest: {e}")
+        return False
+
+
+# ----------------------------------------------------------------------
+# Đọc
+# ----------------------------------------------------------------------
+@timed_query
+def get_logs_by_filters(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    log_level: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    min_status: Optional[int] = None,
+    max_status: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Lấy dữ liệu log với các bộ lọc tùy chọn (mới nhất trước), cùng cột với bản MySQL
+    trừ cột id
+    """
+    try:
+        table = _read(LOG_COLUMNS, build_filter(start_date, end_date, log_level, ip_address,
+                                                 min_status, max_status))
+        frame = _to_frame(table).sort_values("timestamp", ascending=False, kind="stable")
+        return LogDataset(frame).to_display().rename(columns={'ip': 'ip_address'})
+    except Exception as e:
+        notify.error(f"Lỗi khi lọc dữ liệu: {e}")
+        return pd.DataFrame()
+
+
+def _epoch(value) -> Optional[int]:
+    return int(pd.Timestamp(value).timestamp()) if value is not None else None
+
+
+def _row_groups(dataset: ds.Dataset, day: str, expression: Optional[ds.Expression]) -> List[Tuple]:
+    """
+    Các row group của một thư mục ngày có thể chứa dòng thỏa expression (loại
+    bằng thống kê min/max), kèm timestamp lớn nhất, tên file và vị trí dòng đầu
+    của row group trong file, sắp theo timestamp lớn nhất giảm dần
+    """
+    condition = ds.field("day") == day
+    if expression is not None:
+        condition = condition & expression
+
+    groups = []
+    for fragment in dataset.get_fragments(filter=condition):
+        offsets = np.cumsum([0] + [fragment.metadata.row_group(i).num_rows
+                                   for i in range(fragment.metadata.num_row_groups)])
+        name = os.path.basename(fragment.path)
+        for piece in fragment.split_by_row_group(expression, schema=dataset.schema):
+            row_group = piece.row_groups[0]
+            stats = (row_group.statistics or {}).get("timestamp") or {}
+            newest = _epoch(stats.get("max"))
+            groups.append((np.inf if newest is None else newest, name, int(offsets[row_group.id]), piece))
+    groups.sort(key=lambda group: group[:3], reverse=True)
+    return groups
+
+
+def fetch_log_page(
+    after: Optional[Tuple] = None,
+    page_size: int = DB_PAGE_SIZE,
+    **filters
+) -> Tuple[LogDataset, Optional[Tuple]]:
+    """
+    Đọc một trang log (mới nhất trước) bằng keyset pagination trên (timestamp, file, row):
+    tên file Parquet và vị trí dòng trong file là khóa phụ duy nhất, ổn định cho
+    các dòng cùng timestamp (file chỉ được ghi một lần, dòng trong file đã sắp theo timestamp).
+
+    Điều kiện timestamp <= cursor được đẩy xuống pyarrow; các ngày được duyệt
+    từ mới đến cũ và trong mỗi ngày chỉ đọc các row group có timestamp lớn nhất
+    đủ mới để vào trang, nên chi phí mỗi trang không phụ thuộc kích thước ngày.
+
+    Args:
+        after: Cursor (timestamp epoch giây, tên file, vị trí dòng) của dòng cuối trang trước,
+               None cho trang đầu
+        page_size: Số dòng mỗi trang
+        **filters: log_level, status, ip_address (so khớp bằng)
+
+    Returns:
+        tuple: (LogDataset của trang, cursor trang kế tiếp hoặc None nếu là trang cuối)
+    """
+    dataset = _dataset()
+    if dataset is None:
+        return LogDataset(), None
+
+    expression = build_filter(**filters)
+    last_day = None
+    if after is not None:
+        after_ts = after[0]
+        bound = ds.field("timestamp") <= pa.scalar(after_ts, pa.int64()).cast(pa.timestamp("s"))
+        expression = bound if expression is None else expression & bound
+        last_day = _day_name(after_ts)
+
+    # Đọc thêm một dòng để biết còn trang sau hay không
+    limit = page_size + 1
+    frames, rows = [], 0
+    for day in reversed(_list_days()):
+        if last_day is not None and day > last_day:
+            continue
+        for newest, name, offset, piece in _row_groups(dataset, day, expression):
+            # Các row group còn lại đều cũ hơn dòng thứ `limit` đã có: không thể vào trang
+            if rows >= limit and newest < threshold:
+                break
+            table = piece.to_table(schema=dataset.schema, columns=LOG_COLUMNS)
+            position = pa.array(np.arange(offset, offset + len(table), dtype=np.int64))
+            table = table.append_column("row", position).append_column("file", pa.array([name] * len(table)))
+            if expression is not None:
+                table = table.filter(expression)
+            frame = _to_frame(table)
+            if after is not None:
+                frame = frame[_before_cursor(frame, after)]
+            frames.append(frame)
+            rows += len(frame)
+            if rows >= limit:
+                threshold = _sorted_page(frames, limit)["timestamp"].iloc[-1]
+        # Ngày cũ hơn chỉ chứa dòng cũ hơn mọi dòng đã có
+        if rows >= limit:
+            break
+
+    if not frames:
+        return LogDataset(), None
+    frame = _sorted_page(frames, limit)
+    has_next = len(frame) > page_size
+    frame = frame.iloc[:page_size]
+    next_cursor = None
+    if has_next:
+        last = frame.iloc[-1]
+        next_cursor = (int(last["timestamp"]), last["file"], int(last["row"]))
+    return LogDataset(frame.drop(columns=["file", "row"]).reset_index(drop=True)), next_cursor
+
+
+def _before_cursor(frame: pd.DataFrame, after: Tuple) -> np.ndarray:
+    """
+    Dòng đứng sau cursor (timestamp, file, row) theo thứ tự giảm dần
+    """
+    after_ts, after_file, after_row = after
+    timestamps = frame["timestamp"].to_numpy()
+    files = frame["file"].to_numpy()
+    same_file = (files == after_file) & (frame["row"].to_numpy() < after_row)
+    return (timestamps < after_ts) | ((timestamps == after_ts) & ((files < after_file) | same_file))
+
+
+def _sorted_page(frames: List[pd.DataFrame], limit: int) -> pd.DataFrame:
+    frame = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    return frame.sort_values(["timestamp", "file", "row"], ascending=False, kind="stable").head(limit)
+
+
+@timed_query
+def get_dashboard_aggregates(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    log_level: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    min_status: Optional[int] = None,
+    max_status: Optional[int] = None,
+    top_k: int = 10
+) -> dict:
+    """
+    Các chỉ số Dashboard (cùng dạng với bản MySQL), tính chính xác chỉ trên hai cột ip, status
+    """
+    try:
+        table = _read(["ip", "status"], build_filter(start_date, end_date, log_level, ip_address,
+                                                    min_status, max_status))
+    except Exception as e:
+        notify.error(f"Lỗi khi tổng hợp dữ liệu: {e}")
+        return {}
+
+    frame = _to_frame(table)
+    status_counts = frame["status"].astype("int64").value_counts()
+    error_count = int(status_counts[status_counts.index >= 400].sum())
+    total = len(frame)
+    return {
+        'total_requests': total,
+        'error_count': error_count,
+        'error_rate': (error_count / total * 100) if total else 0.0,
+        'status_counts': status_counts,
+        **exact_ip_summary(frame, top_k),
+    }
+
+
+@timed_query
+def get_statistics() -> dict:
+    """
+    Thống kê tổng quan; tổng số dòng đọc từ metadata của file Parquet
+    """
+    dataset = _dataset()
+    if dataset is None:
+        return {}
+
+    try:
+        total = dataset.count_rows()
+        table = dataset.to_table(columns=["ip", "timestamp", "log_level"])
+    except Exception as e:
+        notify.error(f"Lỗi khi lấy thống kê: {e}")
+        return {}
+
+    levels = pc.value_counts(pc.cast(table["log_level"], pa.string()))
+    level_counts = {item['values'].as_py(): item['counts'].as_py() for item in levels}
+    bounds = pc.min_max(table["timestamp"])
+    return {
+        'total_logs': int(total),
+        'unique_ips': int(pc.count_distinct(table["ip"]).as_py()),
+        'unique_ips_error': 0,
+        'error_count': int(level_counts.get('ERROR', 0)),
+        'warning_count': int(level_counts.get('WARNING', 0)),
+        'info_count': int(level_counts.get('INFO', 0)),
+        'earliest_log': bounds['min'].as_py(),
+        'latest_log': bounds['max'].as_py(),
+    }
+
+
+@timed_query
+def get_request_rate(start: Optional[str] = None, end: Optional[str] = None) -> Optional[RateIndex]:
+    """
+    Số request và số lỗi theo giây cho biểu đồ lưu lượng (xem modules.timeseries)
+    """
+    try:
+        frame = _to_frame(_read(["timestamp", "status"], build_filter(start, end)))
+    except Exception as e:
+        notify.error(f"Lỗi khi lấy lưu lượng theo thời gian: {e}")
+        return None
+    return RateIndex.from_events(frame["timestamp"].to_numpy(), frame["status"].to_numpy())
+
+
+# ----------------------------------------------------------------------
+# Quản lý
+# ----------------------------------------------------------------------
+def _count_rows(day: str) -> int:
+    directory = _day_dir(day)
+    return sum(pq.ParquetFile(os.path.join(directory, name)).metadata.num_rows
+               for name in os.listdir(directory) if name.endswith(".parquet") and not name.startswith("."))
+
+
+@timed_query
+def clear_all_logs() -> bool:
+    """
+    Xóa toàn bộ file dữ liệu và manifest
+    """
+    try:
+        with _write_lock:
+            days = _list_days()
+            deleted = sum(_count_rows(day) for day in days)
+            for day in days:
+                shutil.rmtree(_day_dir(day))
+            if os.path.exists(_manifest_path()):
+                os.remove(_manifest_path())
+        notify.success(f"Đã xóa {deleted} bản ghi")
+        return True
+    except OSError as e:
+        notify.error(f"Lỗi khi xóa dữ liệu: {e}")
+        return False
+
+
+def rebuild_rollups() -> bool:
+    """
+    Backend Parquet không có bảng tổng hợp: thống kê luôn tính trên dữ liệu gốc
+    """
+    notify.info("Backend Parquet không dùng bảng tổng hợp, không cần tính lại")
+    return True
+
+
+@timed_query
+def maintain_partitions(days_ahead: int = PARTITION_DAYS_AHEAD,
+                        retention_days: int = LOG_RETENTION_DAYS) -> Optional[int]:
+    """
+    Xóa các thư mục ngày cũ hơn retention_days (thư mục ngày mới được tạo khi ghi,
+    days_ahead không cần dùng)
+
+    Returns:
+        int: Số dòng đã xóa, hoặc None nếu lỗi
+    """
+    if retention_days <= 0:
+        return 0
+    cutoff = (datetime.now() - timedelta(days=retention_days)).strftime("%Y-%m-%d")
+    try:
+        with _write_lock:
+            deleted = 0
+            for day in _list_days():
+                if day < cutoff:
+                    deleted += _count_rows(day)
+                    shutil.rmtree(_day_dir(day))
+        return deleted
+    except OSError as e:
+        notify.error(f"Lỗi khi bảo trì partition: {e}")
+        return None
+
+
+@timed_query
+def get_partitions() -> pd.DataFrame:
+    """
+    Danh sách thư mục ngày (tên, số file, số dòng, dung lượng)
+    """
+    rows = []
+    for day in _list_days():
+        directory = _day_dir(day)
+        files = [os.path.join(directory, name) for name in os.listdir(directory)
+                 if name.endswith(".parquet") and not name.startswith(".")]
+        rows.append({
+            'name': f"day={day}",
+            'files': len(files),
+            'rows': sum(pq.ParquetFile(path).metadata.num_rows for path in files),
+            'bytes': sum(os.path.getsize(path) for path in files),
+        })
+    return pd.DataFrame(rows)
+
+
+def get_query_cache_stats() -> Optional[Dict]:
+    """
+    Backend Parquet không có cache truy vấn: mỗi lần đọc tính lại trên dữ liệu
+    """
+    return None
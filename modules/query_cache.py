@@ -0,0 +1,128 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Dict, Hashable, Tuple
+
+import pandas as pd
+
+
+def normalize_params(params: Dict[str, Any]) -> Tuple:
+    """
+    Chuẩn hóa tham số truy vấn thành khóa cache: bỏ giá trị None, sắp theo tên,
+    ngày/giờ đổi sang chuỗi ISO để '2025-12-01' và date(2025, 12, 1) trùng khóa
+    """
+    items = []
+    for name, value in sorted(params.items()):
+        if value is None:
+            continue
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        elif isinstance(value, list):
+            value = tuple(value)
+        items.append((name, value))
+    return tuple(items)
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Ước lượng dung lượng (byte) của một kết quả truy vấn
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+class QueryCache:
+    """
+    Cache kết quả truy vấn theo LRU, giới hạn số phần tử và tổng dung lượng, có TTL.
+
+    Mỗi phần tử được gắn với generation của dữ liệu lúc truy vấn; khi generation
+    hiện tại khác (đã có ghi/xóa dữ liệu) phần tử bị coi là hết hạn.
+    Kết quả trả về là chính đối tượng đã lưu, nơi gọi không được sửa đổi nó.
+    """
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 64 * 1024 * 1024, ttl: float = 300.0):
+        """
+        Args:
+            max_entries: Số kết quả tối đa
+            max_bytes: Tổng dung lượng tối đa (byte); kết quả lớn hơn không được lưu
+            ttl: Thời gian sống (giây) của mỗi kết quả, 0 để tắt cache
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[int, float, Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0, 'invalidated': 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def _drop(self, key: Hashable):
+        _, _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: Hashable, generation: int) -> Tuple[bool, Any]:
+        """
+        Returns:
+            tuple: (True, kết quả) nếu có kết quả còn hạn cho generation này, ngược lại (False, None)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_generation, expires_at, value, _ = entry
+                if entry_generation != generation:
+                    self._drop(key)
+                    self._counters['invalidated'] += 1
+                elif expires_at < time.monotonic():
+                    self._drop(key)
+                    self._counters['expired'] += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self._counters['hits'] += 1
+                    return True, value
+            self._counters['misses'] += 1
+            return False, None
+
+    def put(self, key: Hashable, generation: int, value: Any):
+        if not self.enabled:
+            return
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (generation, time.monotonic() + self.ttl, value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._counters['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._counters['invalidated'] += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        """
+        Returns:
+            dict: hits, misses, hit_rate, evictions, expired, invalidated, entries, bytes
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            lookups = stats['hits'] + stats['misses']
+            stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+            return stats
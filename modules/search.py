@@ -0,0 +1,276 @@
+import re
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Cú pháp truy vấn (các điều kiện cách nhau bởi khoảng trắng được AND với nhau):
+#   10.0.0.0/8          IP theo CIDR
+#   192.168. / 192.168.1  IP theo tiền tố (như so khớp chuỗi); 1.2.3.4 là IP chính xác
+#   404 / 4xx           status chính xác / theo nhóm
+#   2025-12-04 10:05    thời gian theo tiền tố (ngày, giờ, phút, giây)
+#   not found           chuỗi con trong log_level / response (không phân biệt hoa thường)
+#   ip:..., status:..., level:..., response:...   chỉ định cột
+_DATETIME_TOKEN = re.compile(r'\d{4}-\d{2}(?:-\d{2}(?:[ T]\d{2}(?::\d{2}(?::\d{2})?)?)?)?')
+_CIDR = re.compile(r'^(\d{1,3}(?:\.\d{1,3}){3})/(\d{1,2})$')
+_IP_PREFIX = re.compile(r'^\d{1,3}(?:\.\d{1,3}){0,3}\.?$')
+_STATUS_CLASS = re.compile(r'^([1-5])xx$', re.IGNORECASE)
+
+_TIME_PRECISIONS = [
+    ('%Y-%m-%d %H:%M:%S', timedelta(seconds=1)),
+    ('%Y-%m-%d %H:%M', timedelta(minutes=1)),
+    ('%Y-%m-%d %H', timedelta(hours=1)),
+    ('%Y-%m-%d', timedelta(days=1)),
+]
+
+
+def _octet_ranges(prefix: str) -> List[Tuple[int, int]]:
+    """
+    Các khoảng giá trị octet (0-255) có dạng chuỗi bắt đầu bằng prefix,
+    vd '1' -> [(1, 1), (10, 19), (100, 199)]
+    """
+    values = [v for v in range(256) if str(v).startswith(prefix)]
+    ranges = []
+    for v in values:
+        if ranges and ranges[-1][1] == v - 1:
+            ranges[-1] = (ranges[-1][0], v)
+        else:
+            ranges.append((v, v))
+    return ranges
+
+
+def ip_prefix_ranges(text: str) -> List[Tuple[int, int]]:
+    """
+    Chuyển tiền tố IP dạng chuỗi thành các khoảng uint32 [lo, hi] (bao gồm hai đầu).
+
+    '192.168.' khớp 192.168.x.x; '192.168.1' khớp 192.168.1.x, 192.168.10-19.x,
+    192.168.100-199.x; địa chỉ đủ 4 octet chỉ khớp chính nó.
+    """
+    parts = text.rstrip('.').split('.')
+    if text.endswith('.') or len(parts) == 4:
+        complete, partial = parts, None
+    else:
+        complete, partial = parts[:-1], parts[-1]
+    if any(int(octet) > 255 for octet in complete):
+        return []
+
+    base = 0
+    for octet in complete:
+        base = (base << 8) | int(octet)
+
+    if partial is None:
+        shift = 8 * (4 - len(complete))
+        return [(base << shift, ((base + 1) << shift) - 1)]
+
+    shift = 8 * (3 - len(complete))
+    return [
+        (((base << 8) | lo) << shift, ((((base << 8) | hi) + 1) << shift) - 1)
+        for lo, hi in _octet_ranges(partial)
+    ]
+
+
+def cidr_range(text: str) -> Optional[Tuple[int, int]]:
+    """
+    Khoảng uint32 [lo, hi] của một mạng CIDR, vd '10.0.0.0/8'
+    """
+    match = _CIDR.match(text)
+    if not match:
+        return None
+    octets = [int(p) for p in match.group(1).split('.')]
+    bits = int(match.group(2))
+    if any(o > 255 for o in octets) or bits > 32:
+        return None
+    address = (octets[0] << 24) | (octets[1] << 16) | (octets[2] << 8) | octets[3]
+    size = 1 << (32 - bits)
+    lo = address & ~(size - 1) & 0xFFFFFFFF
+    return lo, lo + size - 1
+
+
+def _epoch_seconds(value: datetime) -> int:
+    return int((value - datetime(1970, 1, 1)).total_seconds())
+
+
+def time_prefix_range(text: str) -> Optional[Tuple[int, int]]:
+    """
+    Khoảng epoch giây [lo, hi) ứng với tiền tố thời gian, vd '2025-12-04 10' là cả giờ 10
+    """
+    text = text.replace('T', ' ')
+    try:
+        if len(text) == 7:
+            start = datetime.strptime(text, '%Y-%m')
+            return _epoch_seconds(start), _epoch_seconds((start + timedelta(days=32)).replace(day=1))
+    except ValueError:
+        return None
+
+    for fmt, step in _TIME_PRECISIONS:
+        try:
+            start = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        return _epoch_seconds(start), _epoch_seconds(start + step)
+    return None
+
+
+def parse_query(query: str) -> List[Tuple[str, str]]:
+    """
+    Tách truy vấn thành các điều kiện (cột, giá trị); cột 'any' nghĩa là tự nhận dạng
+    """
+    terms = [('time', match.group(0)) for match in _DATETIME_TOKEN.finditer(query)]
+    rest = _DATETIME_TOKEN.sub(' ', query)
+
+    for token in rest.split():
+        field, sep, value = token.partition(':')
+        if sep and field.lower() in ('ip', 'status', 'level', 'response', 'time') and value:
+            terms.append((field.lower(), value))
+        else:
+            terms.append(('any', token))
+    return terms
+
+
+class _SortedColumn:
+    """
+    Cột số đã sắp xếp kèm vị trí dòng gốc, trả lời truy vấn khoảng bằng searchsorted
+    """
+
+    def __init__(self, values: np.ndarray):
+        if len(values) and np.all(values[1:] >= values[:-1]):
+            self.order = None                       # Đã có thứ tự (vd timestamp của log)
+            self.values = values
+        else:
+            self.order = np.argsort(values, kind='stable').astype(np.int32 if len(values) < 2**31 else np.int64)
+            self.values = values[self.order]
+
+    def mark(self, mask: np.ndarray, lo, hi_exclusive):
+        """
+        Đánh dấu vào mask các dòng có giá trị trong [lo, hi_exclusive)
+        """
+        start = np.searchsorted(self.values, lo, side='left')
+        stop = np.searchsorted(self.values, hi_exclusive, side='left')
+        if self.order is None:
+            mask[start:stop] = True
+        else:
+            mask[self.order[start:stop]] = True
+
+
+class LogSearchIndex:
+    """
+    Chỉ mục tìm kiếm cho một LogDataset, được tạo một lần và dùng lại cho mọi truy vấn.
+
+    - ip, timestamp: mảng đã sắp xếp + searchsorted (CIDR, tiền tố IP, khoảng thời gian)
+    - status: so sánh vector trên cột uint16
+    - log_level, response: so khớp chuỗi trên danh sách category, rồi tra bảng theo mã category
+
+    Chỉ mục của từng cột chỉ được tạo khi truy vấn cần tới cột đó.
+    Mỗi bộ so khớp trả về mask boolean theo dòng.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+        self._sorted = {}
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def _column(self, name: str) -> _SortedColumn:
+        if name not in self._sorted:
+            self._sorted[name] = _SortedColumn(self.frame[name].to_numpy())
+        return self._sorted[name]
+
+    def _empty(self) -> np.ndarray:
+        return np.zeros(len(self.frame), dtype=bool)
+
+    # ------------------------------------------------------------------
+    # Bộ so khớp theo cột
+    # ------------------------------------------------------------------
+    def match_ip_ranges(self, ranges: List[Tuple[int, int]]) -> np.ndarray:
+        mask = self._empty()
+        column = self._column("ip")
+        for lo, hi in ranges:
+            column.mark(mask, np.uint32(lo), np.uint64(hi) + 1)
+        return mask
+
+    def match_ip(self, text: str) -> np.ndarray:
+        """
+        IP theo CIDR ('10.0.0.0/8') hoặc theo tiền tố ('192.168.', '1.2.3.4')
+        """
+        cidr = cidr_range(text)
+        if cidr is not None:
+            return self.match_ip_ranges([cidr])
+        if _IP_PREFIX.match(text):
+            return self.match_ip_ranges(ip_prefix_ranges(text))
+        return self._empty()
+
+    def match_status(self, text: str) -> np.ndarray:
+        """
+        Status chính xác ('404') hoặc theo nhóm ('4xx')
+        """
+        status = self.frame["status"].to_numpy()
+        match = _STATUS_CLASS.match(text)
+        if match:
+            lo = int(match.group(1)) * 100
+            return (status >= lo) & (status < lo + 100)
+        if text.isdigit() and int(text) <= np.iinfo(status.dtype).max:
+            return status == int(text)
+        return self._empty()
+
+    def match_time(self, text: str) -> np.ndarray:
+        """
+        Các dòng có timestamp nằm trong khoảng của tiền tố thời gian
+        """
+        mask = self._empty()
+        bounds = time_prefix_range(text)
+        if bounds is not None:
+            self._column("timestamp").mark(mask, *bounds)
+        return mask
+
+    def match_text(self, text: str, columns=("log_level", "response")) -> np.ndarray:
+        """
+        Chuỗi con (không phân biệt hoa thường) trong các cột category
+        """
+        mask = self._empty()
+        for name in columns:
+            column = self.frame[name]
+            categories = column.cat.categories.astype(str)
+            # Bảng tra theo mã category; phần tử cuối (mã -1, giá trị thiếu) luôn False
+            lookup = np.zeros(len(categories) + 1, dtype=bool)
+            lookup[:-1] = categories.str.contains(text, case=False, regex=False)
+            if lookup.any():
+                mask |= lookup[column.cat.codes.to_numpy()]
+        return mask
+
+    def match_any(self, text: str) -> np.ndarray:
+        """
+        Tự nhận dạng: CIDR/tiền tố IP, status, hoặc chuỗi trong log_level/response
+        """
+        if _CIDR.match(text):
+            return self.match_ip(text)
+        mask = self.match_text(text)
+        if _IP_PREFIX.match(text):
+            mask |= self.match_ip(text)
+        if text.isdigit() or _STATUS_CLASS.match(text):
+            mask |= self.match_status(text)
+        return mask
+
+    # ------------------------------------------------------------------
+    # Truy vấn
+    # ------------------------------------------------------------------
+    def search(self, query: str) -> np.ndarray:
+        """
+        Trả về vị trí các dòng thỏa mọi điều kiện trong query (mảng int64 tăng dần)
+        """
+        matchers = {
+            'ip': self.match_ip,
+            'status': self.match_status,
+            'time': self.match_time,
+            'level': lambda text: self.match_text(text, ("log_level",)),
+            'response': lambda text: self.match_text(text, ("response",)),
+            'any': self.match_any,
+        }
+        mask = None
+        for field, value in parse_query(query):
+            matched = matchers[field](value)
+            mask = matched if mask is None else mask & matched
+        if mask is None:
+            return np.arange(len(self.frame), dtype=np.int64)
+        return np.flatnonzero(mask)
@@ -0,0 +1,25 @@
+"""
+Cấu hình dùng chung cho mọi backend lưu trữ, đọc từ biến môi trường / .env.
+
+Module này không import driver database nào, nên app, ingest, CLI và các
+backend nhúng (sqlite, parquet) đọc cấu hình mà không cần mysql-connector.
+Cấu hình riêng của từng backend nằm trong module của backend đó
+(DB_CONFIG trong modules.database, SQLITE_PATH, PARQUET_DIR).
+"""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Backend lưu trữ được modules.storage chọn: mysql (DB_CONFIG), sqlite (SQLITE_PATH) hoặc parquet (PARQUET_DIR)
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'mysql').lower()
+
+DB_BATCH_SIZE = int(os.getenv('DB_BATCH_SIZE', 10_000))    # Số dòng mỗi batch khi bulk insert
+DB_QUEUE_BATCHES = int(os.getenv('DB_QUEUE_BATCHES', 8))   # Số batch tối đa chờ giữa parser và các writer
+DB_LOCAL_INFILE = os.getenv('DB_LOCAL_INFILE', '0') == '1' # Cho phép LOAD DATA LOCAL INFILE
+
+DB_PAGE_SIZE = int(os.getenv('DB_PAGE_SIZE', 500))         # Số dòng mỗi trang khi duyệt server_logs
+
+PARTITION_DAYS_AHEAD = int(os.getenv('PARTITION_DAYS_AHEAD', 7))  # Số ngày partition được tạo trước
+LOG_RETENTION_DAYS = int(os.getenv('LOG_RETENTION_DAYS', 0))      # Số ngày giữ log, 0 = giữ tất cả
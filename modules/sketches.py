@@ -0,0 +1,264 @@
+import io
+import os
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from modules.dataset import uint32_to_ipv4
+
+SKETCH_HLL_PRECISION = int(os.getenv('SKETCH_HLL_PRECISION', 12))   # 2^p thanh ghi, sai số ~1.04/sqrt(2^p)
+SKETCH_TOP_K = int(os.getenv('SKETCH_TOP_K', 64))                   # Số IP theo dõi trong Space-Saving
+
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def hash64(values) -> np.ndarray:
+    """
+    Hash 64 bit (splitmix64) cho mảng số nguyên, vector hóa bằng numpy
+    """
+    z = np.asarray(values).astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """
+    Số bit có nghĩa của mảng uint64 (0 với giá trị 0), tính chính xác theo hai nửa 32 bit
+    """
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    _, high_bits = np.frexp(high)
+    _, low_bits = np.frexp(low)
+    return np.where(high > 0, high_bits + 32, low_bits)
+
+
+class HyperLogLog:
+    """
+    Ước lượng số phần tử khác nhau với bộ nhớ cố định 2^p byte.
+    Sai số chuẩn tương đối ~1.04/sqrt(2^p); gộp hai sketch bằng max từng thanh ghi.
+    """
+
+    def __init__(self, precision: int = SKETCH_HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / float(np.sqrt(len(self.registers)))
+
+    def add(self, values):
+        hashes = hash64(values)
+        if len(hashes) == 0:
+            return
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        rest = (hashes << p) & _MASK64
+        rank = np.minimum(64 - _bit_length(rest) + 1, 64 - self.precision + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog"):
+        if other.precision != self.precision:
+            raise ValueError("Không thể gộp HyperLogLog khác precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * float(np.log(m / zeros))     # Linear counting cho tập nhỏ
+        return raw
+
+
+class SpaceSaving:
+    """
+    Top-K phần tử xuất hiện nhiều nhất với tối đa k bộ đếm (Space-Saving).
+
+    Mỗi phần tử giữ count (ước lượng trên) và error: số lần thật nằm trong
+    [count - error, count]. floor là cận trên cho mọi phần tử không có trong bảng.
+    Gộp hai sketch: cộng bộ đếm (phần tử thiếu ở một bên lấy floor của bên đó) rồi giữ k lớn nhất.
+    """
+
+    def __init__(self, k: int = SKETCH_TOP_K):
+        self.k = k
+        self.items = np.zeros(0, dtype=np.uint32)    # Luôn sắp tăng dần để tra cứu bằng searchsorted
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.errors = np.zeros(0, dtype=np.int64)
+        self.floor = 0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @classmethod
+    def from_counts(cls, items: np.ndarray, counts: np.ndarray, k: int = SKETCH_TOP_K) -> "SpaceSaving":
+        """
+        Sketch chính xác từ bảng đếm, cắt còn k phần tử lớn nhất
+        """
+        items = np.asarray(items, dtype=np.uint32)
+        order = np.argsort(items, kind='stable')
+        sketch = cls(k)
+        sketch._keep(items[order], np.asarray(counts, dtype=np.int64)[order],
+                     np.zeros(len(items), dtype=np.int64), 0)
+        return sketch
+
+    def _keep(self, items: np.ndarray, counts: np.ndarray, errors: np.ndarray, floor: int):
+        """
+        Giữ k phần tử có count lớn nhất; count lớn nhất bị bỏ trở thành cận trên floor
+        """
+        order = np.argsort(-counts, kind='stable')
+        if len(order) > self.k:
+            floor = max(floor, int(counts[order[self.k]]))
+            order = order[:self.k]
+        keep = np.sort(order)
+        self.items, self.counts, self.errors, self.floor = items[keep], counts[keep], errors[keep], floor
+
+    def _lookup(self, items: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (count, error) của các phần tử trong items; phần tử không có trong bảng lấy floor
+        """
+        if len(self.items) == 0:
+            filler = np.full(len(items), self.floor, dtype=np.int64)
+            return filler, filler.copy()
+        position = np.minimum(np.searchsorted(self.items, items), len(self.items) - 1)
+        found = self.items[position] == items
+        return (np.where(found, self.counts[position], self.floor),
+                np.where(found, self.errors[position], self.floor))
+
+    def add(self, values):
+        values = np.asarray(values)
+        if len(values) == 0:
+            return
+        items, counts = np.unique(values, return_counts=True)
+        self.merge(SpaceSaving.from_counts(items, counts, self.k))
+
+    def merge(self, other: "SpaceSaving"):
+        items = np.union1d(self.items, other.items).astype(np.uint32)
+        counts, errors = self._lookup(items)
+        other_counts, other_errors = other._lookup(items)
+        self._keep(items, counts + other_counts, errors + other_errors, self.floor + other.floor)
+
+    def top(self, n: int = 10) -> pd.DataFrame:
+        """
+        n phần tử lớn nhất: item, count (ước lượng trên), error
+        """
+        order = np.argsort(-self.counts, kind='stable')[:n]
+        return pd.DataFrame({
+            "item": self.items[order],
+            "count": self.counts[order],
+            "error": self.errors[order],
+        })
+
+
+class LogSketches:
+    """
+    Nhóm sketch cho một tập log (một file, một worker hoặc một bucket thời gian):
+    số request, HyperLogLog số IP khác nhau, Space-Saving top IP và top IP gây lỗi 404.
+    Mọi thành phần đều gộp được nên có thể tổng hợp theo khoảng thời gian bất kỳ.
+    """
+
+    def __init__(self, precision: int = SKETCH_HLL_PRECISION, k: int = SKETCH_TOP_K):
+        self.total = 0
+        self.distinct_ips = HyperLogLog(precision)
+        self.top_ips = SpaceSaving(k)
+        self.top_404_ips = SpaceSaving(k)
+
+    def __len__(self) -> int:
+        return self.total
+
+    def update(self, ips, statuses):
+        """
+        Args:
+            ips: Mảng IPv4 dạng uint32
+            statuses: Mảng status code tương ứng
+        """
+        ips = np.asarray(ips, dtype=np.uint32)
+        self.total += len(ips)
+        self.distinct_ips.add(ips)
+        self.top_ips.add(ips)
+        self.top_404_ips.add(ips[np.asarray(statuses) == 404])
+
+    def update_frame(self, frame: pd.DataFrame):
+        """
+        Cập nhật từ frame dạng gọn của LogDataset (cột ip uint32, status)
+        """
+        self.update(frame["ip"].to_numpy(), frame["status"].to_numpy())
+
+    def merge(self, other: "LogSketches") -> "LogSketches":
+        self.total += other.total
+        self.distinct_ips.merge(other.distinct_ips)
+        self.top_ips.merge(other.top_ips)
+        self.top_404_ips.merge(other.top_404_ips)
+        return self
+
+    @classmethod
+    def merge_all(cls, sketches: Iterable["LogSketches"]) -> Optional["LogSketches"]:
+        """
+        Gộp nhiều sketch thành sketch mới (None nếu không có sketch nào)
+        """
+        result = None
+        for sketch in sketches:
+            if result is None:
+                result = cls(sketch.distinct_ips.precision, sketch.top_ips.k)
+            result.merge(sketch)
+        return result
+
+    def summary(self, top_n: int = 10) -> dict:
+        """
+        Kết quả gần đúng kèm sai số
+
+        Returns:
+            dict: unique_ips, unique_ips_error (sai số chuẩn tuyệt đối),
+                  top_ips / top_404_ips (pd.Series IP -> số request, ước lượng trên),
+                  top_ips_error / top_404_ips_error (pd.Series IP -> sai số tối đa)
+        """
+        unique = self.distinct_ips.estimate()
+        result = {
+            'unique_ips': int(round(unique)),
+            'unique_ips_error': int(round(unique * self.distinct_ips.relative_error)),
+        }
+        for name in ('top_ips', 'top_404_ips'):
+            top = getattr(self, name).top(top_n)
+            index = uint32_to_ipv4(top["item"].to_numpy())
+            result[name] = pd.Series(top["count"].to_numpy(), index=index, dtype="int64")
+            result[f"{name}_error"] = pd.Series(top["error"].to_numpy(), index=index, dtype="int64")
+        return result
+
+    # ------------------------------------------------------------------
+    # Lưu trữ
+    # ------------------------------------------------------------------
+    def to_bytes(self) -> bytes:
+        """
+        Dạng nhị phân (npz nén) để lưu vào log_sketch_hour
+        """
+        arrays = {
+            'meta': np.array([self.total, self.distinct_ips.precision, self.top_ips.k,
+                              self.top_ips.floor, self.top_404_ips.floor], dtype=np.int64),
+            'hll': self.distinct_ips.registers,
+        }
+        for name in ('top_ips', 'top_404_ips'):
+            sketch = getattr(self, name)
+            arrays[f'{name}_items'] = sketch.items
+            arrays[f'{name}_counts'] = sketch.counts
+            arrays[f'{name}_errors'] = sketch.errors
+
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "LogSketches":
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            total, precision, k, top_floor, top_404_floor = arrays['meta'].tolist()
+            sketch = cls(precision=precision, k=k)
+            sketch.total = total
+            sketch.distinct_ips.registers = arrays['hll'].copy()
+            for name, floor in (('top_ips', top_floor), ('top_404_ips', top_404_floor)):
+                part = getattr(sketch, name)
+                part.items = arrays[f'{name}_items'].copy()
+                part.counts = arrays[f'{name}_counts'].copy()
+                part.errors = arrays[f'{name}_errors'].copy()
+                part.floor = floor
+        return sketch
@@ -0,0 +1,670 @@
+"""
+Backend lưu trữ SQLite nhúng (STORAGE_BACKEND=sqlite): cùng bảng server_logs,
+ingest_manifest và các index với init.sql trong một file SQLITE_PATH, không cần
+MySQL server (test, CI, triển khai nhỏ một máy).
+
+- Kết nối mở ở chế độ WAL (đọc không chặn ghi), synchronous=NORMAL, bảng tạm
+  trong bộ nhớ; mỗi lần gọi mở một kết nối riêng (rẻ với SQLite), giống
+  get_db_connection của modules.database.
+- Ghi: một thread writer duy nhất (SQLite chỉ cho một writer), câu INSERT được
+  chuẩn bị một lần và dùng lại cho mọi dòng (executemany + cache statement của
+  sqlite3), nhiều batch gom trong một transaction tới SQLITE_TXN_ROWS dòng; mỗi
+  batch nằm trong một SAVEPOINT nên batch lỗi chỉ rollback batch đó.
+- Không có bảng tổng hợp / sketch: thống kê tính chính xác bằng GROUP BY trên
+  các index của server_logs.
+- Các hàm có cùng tên, tham số và dạng kết quả với modules.database nên
+  modules.storage chọn được backend chỉ bằng cấu hình.
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from modules import notify
+from modules.dataset import LogDataset
+from modules.metrics import metrics
+from modules.settings import DB_BATCH_SIZE, DB_PAGE_SIZE, DB_QUEUE_BATCHES, LOG_RETENTION_DAYS, PARTITION_DAYS_AHEAD
+from modules.storage_common import (PAGE_COLUMNS, _page_filters, _stage_report, build_log_filters,
+                                    iter_dataframe_batches, show_save_report, timed_query)
+from modules.timeseries import RateIndex, choose_bucket
+
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'data/logs.db')                    # File database
+SQLITE_TXN_ROWS = int(os.getenv('SQLITE_TXN_ROWS', 200_000))            # Số dòng tối đa mỗi transaction ghi
+SQLITE_CACHE_MB = int(os.getenv('SQLITE_CACHE_MB', 64))                 # Page cache mỗi kết nối
+SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', 30))       # Giây chờ khi database đang bị khóa ghi
+
+# Cùng cột và index với init.sql (row_hash BINARY(16) -> BLOB, ENUM -> TEXT);
+# id là INTEGER PRIMARY KEY (alias của rowid) nên không cần index riêng
+SQLITE_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS server_logs (
+        id INTEGER PRIMARY KEY,
+        ip_address TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        status INTEGER NOT NULL,
+        log_level TEXT NOT NULL DEFAULT 'INFO',
+        response TEXT NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        row_hash BLOB NULL
+    )""",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_row_hash ON server_logs (row_hash, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_timestamp ON server_logs (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_ip_address ON server_logs (ip_address)",
+    "CREATE INDEX IF NOT EXISTS idx_status ON server_logs (status)",
+    "CREATE INDEX IF NOT EXISTS idx_log_level ON server_logs (log_level)",
+    "CREATE INDEX IF NOT EXISTS idx_composite ON server_logs (timestamp, log_level, status)",
+    """CREATE TABLE IF NOT EXISTS ingest_manifest (
+        id INTEGER PRIMARY KEY,
+        source_name TEXT NOT NULL,
+        head_hash BLOB NOT NULL,
+        tail_hash BLOB NOT NULL,
+        range_start INTEGER NOT NULL,
+        range_end INTEGER NOT NULL,
+        rows_parsed INTEGER NOT NULL DEFAULT 0,
+        rows_inserted INTEGER NOT NULL DEFAULT 0,
+        loaded_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_head_hash ON ingest_manifest (head_hash, range_end)",
+]
+
+INSERT_QUERY = """
+    INSERT INTO server_logs
+    (ip_address, timestamp, status, log_level, response)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+# Bản ghi có row_hash: dòng trùng (unique index uq_row_hash) được bỏ qua
+INSERT_DEDUP_QUERY = """
+    INSERT OR IGNORE INTO server_logs
+    (ip_address, timestamp, status, log_level, response, row_hash)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+PAGE_QUERY = """
+    SELECT id, ip_address, timestamp, status, log_level, response
+    FROM server_logs
+    WHERE {where}
+    ORDER BY timestamp DESC, id DESC
+    LIMIT ?
+"""
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Timestamp lưu dạng TEXT 'YYYY-MM-DD HH:MM:SS': so sánh chuỗi đúng thứ tự thời gian
+# và dùng được với các hàm date()/strftime() của SQLite
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(sep=' '))
+
+_schema_lock = threading.Lock()
+_schema_ready = set()
+
+
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Mở một kết nối tới file database (tạo thư mục, bảng và index nếu chưa có).
+    Kết nối ở chế độ autocommit: thao tác ghi nhiều câu tự mở transaction bằng BEGIN.
+    """
+    path = path or SQLITE_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT, isolation_level=None,
+                           check_same_thread=False)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_MB * 1024}")
+        with _schema_lock:
+            if path not in _schema_ready:
+                for statement in SQLITE_SCHEMA:
+                    conn.execute(statement)
+                _schema_ready.add(path)
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn
+
+
+@contextmanager
+def get_db_connection():
+    """
+    Kết nối dùng trong khối with (None nếu không mở được), luôn được đóng khi ra khỏi khối
+    """
+    try:
+        conn = connect()
+    except sqlite3.Error as err:
+        notify.error(f"Lỗi kết nối database: {err}")
+        yield None
+        return
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def _bound(value) -> Optional[str]:
+    """
+    Mốc thời gian của bộ lọc dưới dạng chuỗi cùng định dạng với cột timestamp
+    ('YYYY-MM-DD' được hiểu là 00:00:00 như DATETIME của MySQL)
+    """
+    return pd.Timestamp(value).strftime(TIME_FORMAT) if value else None
+
+
+def _where(start_date=None, end_date=None, log_level=None, ip_address=None,
+           min_status=None, max_status=None) -> Tuple[str, list]:
+    """
+    build_log_filters của modules.database với placeholder của sqlite3
+    """
+    where, params = build_log_filters(_bound(start_date), _bound(end_date), log_level, ip_address,
+                                      min_status, max_status)
+    return where.replace("%s", "?"), params
+
+
+def _to_datetime(value: Optional[str]) -> Optional[datetime]:
+    return pd.Timestamp(value).to_pydatetime() if value else None
+
+
+# ----------------------------------------------------------------------
+# Ghi
+# ----------------------------------------------------------------------
+def bulk_save_batches(
+    batches: Iterable[List[Tuple]],
+    workers: int = 1,
+    use_load_data: bool = False,
+    queue_batches: int = DB_QUEUE_BATCHES
+) -> Dict:
+    """
+    Ghi các batch log vào SQLite (cùng dạng báo cáo với modules.database.bulk_save_batches).
+
+    Một thread producer duyệt `batches` (parse) và đẩy vào hàng đợi giới hạn
+    queue_batches batch; một thread writer ghi từng batch bằng executemany trên
+    cùng câu INSERT đã chuẩn bị. Các batch được gom trong một transaction tới
+    SQLITE_TXN_ROWS dòng (một lần fsync WAL cho cả nhóm), mỗi batch là một
+    SAVEPOINT: batch lỗi chỉ rollback batch đó; commit lỗi thì cả nhóm bị tính là lỗi.
+    Lỗi khi tạo batch (đọc / parse file) được raise lại sau khi writer dừng.
+
+    Args:
+        batches: Iterable các list tuple (ip_address, timestamp, status, log_level, response[, row_hash])
+        workers, use_load_data: Giữ cho cùng chữ ký với backend MySQL, không dùng
+        queue_batches: Số batch tối đa nằm chờ trong hàng đợi
+    """
+    report = {
+        'rows_inserted': 0,
+        'batches': 0,
+        'failed_batches': [],
+        'elapsed_sec': 0.0,
+        'rows_per_sec': 0.0,
+        'stages': {},
+    }
+
+    try:
+        conn = connect()
+    except sqlite3.Error as e:
+        report['failed_batches'].append({'batch': None, 'rows': 0, 'error': f"Không mở được database: {e}"})
+        return report
+
+    pending = queue.Queue(maxsize=max(1, queue_batches))
+    counters = {'parsed_rows': 0, 'parse_sec': 0.0, 'backpressure_sec': 0.0,
+                'written_rows': 0, 'insert_sec': 0.0, 'starved_sec': 0.0, 'queue_peak': 0}
+    producer_error = []
+    start = time.perf_counter()
+
+    def producer():
+        iterator = iter(batches)
+        batch_no = 0
+        try:
+            while True:
+                t0 = time.perf_counter()
+                batch = next(iterator, None)
+                t1 = time.perf_counter()
+                counters['parse_sec'] += t1 - t0
+                if batch is None:
+                    return
+                counters['parsed_rows'] += len(batch)
+                pending.put((batch_no, batch))
+                counters['backpressure_sec'] += time.perf_counter() - t1
+                counters['queue_peak'] = max(counters['queue_peak'], pending.qsize())
+                batch_no += 1
+        except Exception as e:
+            producer_error.append(e)
+        finally:
+            pending.put(None)
+
+    # Các batch đã ghi trong transaction đang mở: (số thứ tự, số dòng, số dòng đã chèn)
+    in_txn = []
+
+    def commit():
+        if not in_txn:
+            return
+        try:
+            with metrics.timer("save.commit"):
+                conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            conn.rollback()
+            for batch_no, rows, _ in in_txn:
+                report['failed_batches'].append({'batch': batch_no, 'rows': rows, 'error': str(e)})
+        else:
+            for _, rows, inserted in in_txn:
+                report['rows_inserted'] += inserted
+                counters['written_rows'] += rows
+        in_txn.clear()
+
+    def write(batch: List[Tuple]) -> int:
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+        conn.execute("SAVEPOINT batch")
+        before = conn.total_changes
+        try:
+            with metrics.timer("save.insert"):
+                conn.executemany(INSERT_DEDUP_QUERY if len(batch[0]) == 6 else INSERT_QUERY, batch)
+        except Exception:
+            conn.execute("ROLLBACK TO batch")
+            conn.execute("RELEASE batch")
+            raise
+        conn.execute("RELEASE batch")
+        return conn.total_changes - before
+
+    def writer():
+        txn_rows = 0
+        while True:
+            t0 = time.perf_counter()
+            with metrics.timer("save.wait_input"):
+                item = pending.get()
+            t1 = time.perf_counter()
+            counters['starved_sec'] += t1 - t0
+            if item is None:
+                break
+            batch_no, batch = item
+            report['batches'] += 1
+            try:
+                in_txn.append((batch_no, len(batch), write(batch)))
+                txn_rows += len(batch)
+            except Exception as e:
+                report['failed_batches'].append({'batch': batch_no, 'rows': len(batch), 'error': str(e)})
+            if txn_rows >= SQLITE_TXN_ROWS:
+                commit()
+                txn_rows = 0
+            counters['insert_sec'] += time.perf_counter() - t1
+        t0 = time.perf_counter()
+        commit()
+        counters['insert_sec'] += time.perf_counter() - t0
+
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(writer), executor.submit(producer)]
+            for future in futures:
+                future.result()
+    finally:
+        conn.close()
+
+    report['elapsed_sec'] = time.perf_counter() - start
+    report['stages'] = {
+        'parse': _stage_report(counters['parsed_rows'], counters['parse_sec'], counters['backpressure_sec']),
+        'insert': _stage_report(counters['written_rows'], counters['insert_sec'], counters['starved_sec']),
+        'queue_peak': counters['queue_peak'],
+    }
+    metrics.observe("save.produce", counters['parse_sec'])
+    metrics.observe("save.backpressure", counters['backpressure_sec'])
+    metrics.observe("save.total", report['elapsed_sec'])
+    metrics.incr("save.rows", report['rows_inserted'])
+    metrics.incr("save.batches", report['batches'])
+    metrics.incr("save.failed_batches", len(report['failed_batches']))
+    if report['elapsed_sec'] > 0:
+        report['rows_per_sec'] = report['rows_inserted'] / report['elapsed_sec']
+    report['failed_batches'].sort(key=lambda item: item['batch'])
+
+    if producer_error:
+        raise producer_error[0]
+    return report
+
+
+def save_dataframe(data, batch_size: int = DB_BATCH_SIZE, use_load_data: bool = False) -> bool:
+    """
+    Lưu DataFrame hoặc LogDataset vào SQLite
+
+    Returns:
+        bool: True nếu mọi batch đều thành công
+    """
+    if data is None or data.empty:
+        notify.warning("Không có dữ liệu để lưu")
+        return False
+
+    if isinstance(data, LogDataset):
+        batches = data.iter_record_batches(batch_size)
+    else:
+        batches = iter_dataframe_batches(data, batch_size)
+
+    return show_save_report(bulk_save_batches(batches))
+
+
+# ----------------------------------------------------------------------
+# Manifest nạp file (xem modules.ingest)
+# ----------------------------------------------------------------------
+@timed_query
+def get_last_ingest(head_hash: bytes) -> Optional[dict]:
+    """
+    Lần nạp gần nhất (range_end lớn nhất) của file có head_hash (cùng dạng với bản MySQL)
+    """
+    with get_db_connection() as conn:
+        if conn is None:
+            return None
+        try:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("""
+                SELECT source_name, range_start, range_end, tail_hash, rows_inserted, loaded_at
+                FROM ingest_manifest
+                WHERE head_hash = ?
+                ORDER BY range_end DESC
+                LIMIT 1
+            """, (head_hash,)).fetchone()
+            return dict(row) if row else None
+        except sqlite3.Error as e:
+            notify.error(f"Lỗi khi đọc ingest_manifest: {e}")
+            return None
+
+
+@timed_query
+def record_ingest(entry: dict) -> bool:
+    """
+    Ghi một lần nạp file vào ingest_manifest
+    """
+    with get_db_connection() as conn:
+        if conn is None:
+            return False
+        try:
+            conn.execute("""
+                INSERT INTO ingest_manifest
+                (source_name, head_hash, tail_hash, range_start, range_end, rows_parsed, rows_inserted)
+                VALUES (:source_name, :head_hash, :tail_hash, :range_start,
+                        :range_end, :rows_parsed, :rows_inserted)
+            """, entry)
+            return True
+        except sqlite3.Error as e:
+            notify.error(f"Lỗi khi ghi ingest_manifest: {e}")
+            return False
+
+
+# ----------------------------------------------------------------------
+# Đọc
+# ----------------------------------------------------------------------
+@timed_query
+def get_logs_by_filters(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    log_level: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    min_status: Optional[int] = None,
+    max_status: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Lấy dữ liệu log với các bộ lọc tùy chọn (mới nhất trước), cùng cột với bản MySQL
+    """
+    with get_db_connection() as conn:
+        if conn is None:
+            return pd.DataFrame()
+
+        where, params = _where(start_date, end_date, log_level, ip_address, min_status, max_status)
+        query = f"SELECT * FROM server_logs WHERE {where} ORDER BY timestamp DESC"
+        try:
+            df = pd.read_sql(query, conn, params=params)
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+            return df
+        except Exception as e:
+            notify.error(f"Lỗi khi lọc dữ liệu: {e}")
+            return pd.DataFrame()
+
+
+@timed_query
+def fetch_log_page(
+    after: Optional[Tuple] = None,
+    page_size: int = DB_PAGE_SIZE,
+    **filters
+) -> Tuple[LogDataset, Optional[Tuple]]:
+    """
+    Đọc một trang server_logs (mới nhất trước) bằng keyset pagination trên (timestamp, id)
+
+    Args:
+        after: Cursor (timestamp, id) của dòng cuối trang trước, None cho trang đầu
+        page_size: Số dòng mỗi trang
+        **filters: log_level, status, ip_address (so khớp bằng)
+
+    Returns:
+        tuple: (LogDataset của trang, cursor trang kế tiếp hoặc None nếu là trang cuối)
+
+    Raises:
+        sqlite3.Error: Nếu không mở được database hoặc truy vấn lỗi
+    """
+    where, params = _page_filters(after, filters)
+    conn = connect()
+    try:
+        # Đọc thêm một dòng để biết còn trang sau hay không
+        rows = conn.execute(PAGE_QUERY.format(where=where.replace("%s", "?")),
+                            params + [page_size + 1]).fetchall()
+    finally:
+        conn.close()
+
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    frame = pd.DataFrame(rows, columns=PAGE_COLUMNS)
+    frame['timestamp'] = pd.to_datetime(frame['timestamp'])
+    next_cursor = (rows[-1][2], rows[-1][0]) if has_next else None
+    return LogDataset.from_dataframe(frame), next_cursor
+
+
+def _ip_summary(conn, where: str, params: list, top_k: int) -> dict:
+    """
+    Số IP khác nhau, top IP và top IP lỗi 404 tính chính xác (cùng dạng với LogSketches.summary)
+    """
+    result = {'approximate': False}
+    result['unique_ips'] = int(conn.execute(
+        f"SELECT COUNT(DISTINCT ip_address) FROM server_logs WHERE {where}", params).fetchone()[0])
+    result['unique_ips_error'] = 0
+
+    for name, condition in (('top_ips', ''), ('top_404_ips', ' AND status = 404')):
+        rows = conn.execute(f"""
+            SELECT ip_address, COUNT(*) FROM server_logs
+            WHERE {where}{condition} GROUP BY ip_address ORDER BY 2 DESC LIMIT ?
+        """, params + [top_k]).fetchall()
+        top = pd.Series({ip: int(count) for ip, count in rows}, dtype="int64")
+        result[name] = top
+        result[f"{name}_error"] = pd.Series(0, index=top.index, dtype="int64")
+    return result
+
+
+@timed_query
+def get_dashboard_aggregates(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    log_level: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    min_status: Optional[int] = None,
+    max_status: Optional[int] = None,
+    top_k: int = 10
+) -> dict:
+    """
+    Các chỉ số Dashboard (cùng dạng với bản MySQL), tính chính xác bằng GROUP BY
+    trên các index của server_logs
+    """
+    with get_db_connection() as conn:
+        if conn is None:
+            return {}
+        try:
+            where, params = _where(start_date, end_date, log_level, ip_address, min_status, max_status)
+            status_rows = conn.execute(f"""
+                SELECT status, COUNT(*) FROM server_logs
+                WHERE {where} GROUP BY status ORDER BY 2 DESC
+            """, params).fetchall()
+            ip_summary = _ip_summary(conn, where, params, top_k)
+        except sqlite3.Error as e:
+            notify.error(f"Lỗi khi tổng hợp dữ liệu: {e}")
+            return {}
+
+    status_counts = pd.Series({int(status): int(count) for status, count in status_rows}, dtype="int64")
+    total = int(status_counts.sum())
+    error_count = int(status_counts[status_counts.index >= 400].sum())
+    return {
+        'total_requests': total,
+        'error_count': error_count,
+        'error_rate': (error_count / total * 100) if total else 0.0,
+        'status_counts': status_counts,
+        **ip_summary,
+    }
+
+
+@timed_query
+def get_statistics() -> dict:
+    """
+    Thống kê tổng quan: số dòng theo log_level và số IP khác nhau đọc từ
+    idx_log_level / idx_ip_address, thời gian sớm/muộn nhất từ idx_timestamp
+    """
+    with get_db_connection() as conn:
+        if conn is None:
+            return {}
+        try:
+            level_counts = dict(conn.execute(
+                "SELECT log_level, COUNT(*) FROM server_logs GROUP BY log_level").fetchall())
+            unique_ips = conn.execute("SELECT COUNT(DISTINCT ip_address) FROM server_logs").fetchone()[0]
+            earliest, latest = conn.execute("""
+                SELECT (SELECT MIN(timestamp) FROM server_logs),
+                       (SELECT MAX(timestamp) FROM server_logs)
+            """).fetchone()
+        except sqlite3.Error as e:
+            notify.error(f"Lỗi khi lấy thống kê: {e}")
+            return {}
+
+    return {
+        'total_logs': int(sum(level_counts.values())),
+        'unique_ips': int(unique_ips),
+        'unique_ips_error': 0,
+        'error_count': int(level_counts.get('ERROR', 0)),
+        'warning_count': int(level_counts.get('WARNING', 0)),
+        'info_count': int(level_counts.get('INFO', 0)),
+        'earliest_log': _to_datetime(earliest),
+        'latest_log': _to_datetime(latest),
+    }
+
+
+@timed_query
+def get_request_rate(start: Optional[str] = None, end: Optional[str] = None) -> Optional[RateIndex]:
+    """
+    Số request và số lỗi theo thời gian cho biểu đồ lưu lượng. GROUP BY theo
+    bucket đủ rộng để khoảng dữ liệu có không quá RATE_MAX_BUCKETS bucket
+    (1 giây với log ngắn), nên số dòng trả về không phụ thuộc số log.
+    """
+    with get_db_connection() as conn:
+        if conn is None:
+            return None
+        try:
+            where, params = _where(start, end)
+            first, last = conn.execute(f"""
+                SELECT (SELECT MIN(timestamp) FROM server_logs WHERE {where}),
+                       (SELECT MAX(timestamp) FROM server_logs WHERE {where})
+            """, params + params).fetchone()
+            rows, resolution = [], 1
+            if first is not None:
+                span = int((pd.Timestamp(last) - pd.Timestamp(first)).total_seconds()) + 1
+                resolution = choose_bucket(span)
+                rows = conn.execute(f"""
+                    SELECT CAST(strftime('%s', timestamp) AS INTEGER) / ? * ? AS bucket,
+                           COUNT(*), SUM(status >= 400)
+                    FROM server_logs
+                    WHERE {where}
+                    GROUP BY bucket
+                """, [resolution, resolution] + params).fetchall()
+        except sqlite3.Error as e:
+            notify.error(f"Lỗi khi lấy lưu lượng theo thời gian: {e}")
+            return None
+
+    counts = np.array(rows, dtype=np.int64).reshape(-1, 3)
+    return RateIndex.from_counts(counts[:, 0], counts[:, 1], counts[:, 2], resolution)
+
+
+# ----------------------------------------------------------------------
+# Quản lý
+# ----------------------------------------------------------------------
+@timed_query
+def clear_all_logs() -> bool:
+    """
+    Xóa toàn bộ server_logs và ingest_manifest (để có thể nạp lại các file cũ)
+    """
+    with get_db_connection() as conn:
+        if conn is None:
+            return False
+        try:
+            conn.execute("BEGIN")
+            deleted = conn.execute("DELETE FROM server_logs").rowcount
+            conn.execute("DELETE FROM ingest_manifest")
+            conn.execute("COMMIT")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            notify.success(f"Đã xóa {deleted} bản ghi")
+            return True
+        except sqlite3.Error as e:
+            notify.error(f"Lỗi khi xóa dữ liệu: {e}")
+            if conn.in_transaction:
+                conn.rollback()
+            return False
+
+
+def rebuild_rollups() -> bool:
+    """
+    Backend SQLite không có bảng tổng hợp: thống kê luôn tính trên server_logs
+    """
+    notify.info("Backend SQLite không dùng bảng tổng hợp, không cần tính lại")
+    return True
+
+
+@timed_query
+def maintain_partitions(days_ahead: int = PARTITION_DAYS_AHEAD,
+                        retention_days: int = LOG_RETENTION_DAYS) -> Optional[int]:
+    """
+    Xóa log cũ hơn retention_days ngày (SQLite không có partition, days_ahead không cần dùng)
+
+    Returns:
+        int: Số dòng đã xóa, hoặc None nếu lỗi
+    """
+    if retention_days <= 0:
+        return 0
+    cutoff = (datetime.now() - timedelta(days=retention_days)).strftime("%Y-%m-%d")
+    with get_db_connection() as conn:
+        if conn is None:
+            return None
+        try:
+            return conn.execute("DELETE FROM server_logs WHERE timestamp < ?", (cutoff,)).rowcount
+        except sqlite3.Error as e:
+            notify.error(f"Lỗi khi bảo trì partition: {e}")
+            return None
+
+
+@timed_query
+def get_partitions() -> pd.DataFrame:
+    """
+    Số dòng theo ngày (thay cho danh sách partition của MySQL)
+    """
+    with get_db_connection() as conn:
+        if conn is None:
+            return pd.DataFrame()
+        try:
+            return pd.read_sql("""
+                SELECT date(timestamp) AS name, COUNT(*) AS rows
+                FROM server_logs
+                GROUP BY 1
+                ORDER BY 1
+            """, conn)
+        except Exception as e:
+            notify.error(f"Lỗi khi đọc partition: {e}")
+            return pd.DataFrame()
+
+
+def get_query_cache_stats() -> Optional[Dict]:
+    """
+    Backend SQLite không có cache truy vấn: mỗi lần đọc tính lại trên dữ liệu
+    """
+    return None
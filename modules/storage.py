@@ -0,0 +1,122 @@
+"""
+Chọn backend lưu trữ theo cấu hình STORAGE_BACKEND (modules.settings):
+    - mysql (mặc định): modules.database, MySQL trong docker-compose
+    - sqlite: modules.sqlite_store, file SQLite nhúng SQLITE_PATH (không cần server)
+    - parquet: modules.parquet_store, file Parquet phân vùng theo ngày trong PARQUET_DIR
+
+Mỗi backend là một module có đủ các hàm của StorageBackend (cùng tên, tham số
+và dạng kết quả). App, ingest, pager và follower import các thao tác lưu trữ
+từ đây thay vì từ modules.database, nên đổi backend không cần sửa code.
+Chỉ module của backend được chọn được import: sqlite / parquet không cần mysql-connector.
+"""
+import importlib
+from types import ModuleType
+from typing import Dict, Iterable, List, Optional, Protocol, Tuple
+
+import pandas as pd
+
+from modules.dataset import LogDataset
+from modules.settings import STORAGE_BACKEND
+from modules.timeseries import RateIndex
+
+# Tên backend -> module cài đặt
+BACKENDS = {
+    'mysql': 'modules.database',
+    'sqlite': 'modules.sqlite_store',
+    'parquet': 'modules.parquet_store',
+}
+
+# Gói cần cài thêm cho từng backend (gợi ý khi import lỗi)
+BACKEND_REQUIREMENTS = {
+    'mysql': 'mysql-connector-python',
+    'parquet': 'pyarrow',
+}
+
+
+class StorageBackend(Protocol):
+    """
+    Các thao tác app dùng trên kho log; xem modules.database cho mô tả đầy đủ
+    từng hàm và dạng kết quả.
+    """
+
+    # Ghi
+    def bulk_save_batches(self, batches: Iterable[List[Tuple]], workers: int = ...,
+                          use_load_data: bool = ..., queue_batches: int = ...) -> Dict: ...
+
+    def save_dataframe(self, data, batch_size: int = ..., use_load_data: bool = ...) -> bool: ...
+
+    # Manifest nạp file
+    def get_last_ingest(self, head_hash: bytes) -> Optional[dict]: ...
+
+    def record_ingest(self, entry: dict) -> bool: ...
+
+    # Đọc / lọc / thống kê
+    def get_logs_by_filters(self, start_date: Optional[str] = ..., end_date: Optional[str] = ...,
+                            log_level: Optional[str] = ..., ip_address: Optional[str] = ...,
+                            min_status: Optional[int] = ..., max_status: Optional[int] = ...) -> pd.DataFrame: ...
+
+    def fetch_log_page(self, after: Optional[Tuple] = ..., page_size: int = ...,
+                       **filters) -> Tuple[LogDataset, Optional[Tuple]]: ...
+
+    def get_dashboard_aggregates(self, start_date: Optional[str] = ..., end_date: Optional[str] = ...,
+                                 log_level: Optional[str] = ..., ip_address: Optional[str] = ...,
+                                 min_status: Optional[int] = ..., max_status: Optional[int] = ...,
+                                 top_k: int = ...) -> dict: ...
+
+    def get_statistics(self) -> dict: ...
+
+    def get_request_rate(self, start: Optional[str] = ..., end: Optional[str] = ...) -> Optional[RateIndex]: ...
+
+    # Quản lý
+    def clear_all_logs(self) -> bool: ...
+
+    def rebuild_rollups(self) -> bool: ...
+
+    def maintain_partitions(self, days_ahead: int = ..., retention_days: int = ...) -> Optional[int]: ...
+
+    def get_partitions(self) -> pd.DataFrame: ...
+
+    def get_query_cache_stats(self) -> Optional[Dict]: ...
+
+
+OPERATIONS = tuple(name for name in vars(StorageBackend) if not name.startswith('_'))
+
+
+def load_backend(name: str) -> ModuleType:
+    """
+    Import module của backend `name` và kiểm tra có đủ các thao tác của StorageBackend
+
+    Raises:
+        ValueError: Nếu tên backend không hợp lệ
+        ImportError: Nếu thiếu gói phụ thuộc hoặc module thiếu thao tác
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"STORAGE_BACKEND không hợp lệ: {name!r} ({', '.join(BACKENDS)})")
+    try:
+        module = importlib.import_module(BACKENDS[name])
+    except ImportError as e:
+        hint = f", cần pip install {BACKEND_REQUIREMENTS[name]}" if name in BACKEND_REQUIREMENTS else ""
+        raise ImportError(f"Không import được STORAGE_BACKEND={name}{hint}: {e}") from e
+
+    missing = [op for op in OPERATIONS if not callable(getattr(module, op, None))]
+    if missing:
+        raise ImportError(f"Backend {name} ({BACKENDS[name]}) thiếu: {', '.join(missing)}")
+    return module
+
+
+backend = load_backend(STORAGE_BACKEND)
+
+bulk_save_batches = backend.bulk_save_batches
+save_dataframe = backend.save_dataframe
+get_last_ingest = backend.get_last_ingest
+record_ingest = backend.record_ingest
+get_logs_by_filters = backend.get_logs_by_filters
+fetch_log_page = backend.fetch_log_page
+get_dashboard_aggregates = backend.get_dashboard_aggregates
+get_statistics = backend.get_statistics
+get_request_rate = backend.get_request_rate
+clear_all_logs = backend.clear_all_logs
+rebuild_rollups = backend.rebuild_rollups
+maintain_partitions = backend.maintain_partitions
+get_partitions = backend.get_partitions
+get_query_cache_stats = backend.get_query_cache_stats
@@ -0,0 +1,143 @@
+"""
+Phần dùng chung của các backend lưu trữ (modules.database, modules.sqlite_store,
+modules.parquet_store): đo thời gian truy vấn, báo cáo ghi, chuyển DataFrame
+thành batch tuple và điều kiện WHERE cho các backend SQL.
+Không import driver database nào.
+"""
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from modules import notify
+from modules.metrics import metrics
+from modules.settings import DB_BATCH_SIZE
+
+PAGE_COLUMNS = ["id", "ip_address", "timestamp", "status", "log_level", "response"]
+
+
+def timed_query(func):
+    """
+    Decorator: đo thời gian mỗi lần gọi hàm truy vấn dưới tên 'db.query.<tên hàm>'
+    """
+    return metrics.timed(f"db.query.{func.__name__}")(func)
+
+
+def _stage_report(rows: int, busy_sec: float, wait_sec: float, parallel: int = 1) -> Dict:
+    """
+    Thông lượng một giai đoạn của pipeline: rows_per_sec tính trên thời gian bận
+    (chia cho số thread chạy song song), wait_sec là thời gian chờ giai đoạn kia
+    """
+    wall = busy_sec / parallel
+    return {
+        'rows': rows,
+        'busy_sec': wall,
+        'wait_sec': wait_sec / parallel,
+        'rows_per_sec': rows / wall if wall > 0 else 0.0,
+    }
+
+
+def iter_dataframe_batches(df: pd.DataFrame, batch_size: int = DB_BATCH_SIZE) -> Iterator[List[Tuple]]:
+    """
+    Chuyển DataFrame log thành các batch tuple sẵn sàng cho driver.
+
+    Mỗi chunk được chuyển theo cột (datetime64 -> datetime, int64 -> int,
+    category -> str) thay vì duyệt từng dòng bằng iterrows.
+    """
+    if 'ip_address' in df.columns and 'ip' not in df.columns:
+        df = df.rename(columns={'ip_address': 'ip'})
+
+    for start in range(0, len(df), batch_size):
+        chunk = df.iloc[start:start + batch_size]
+        size = len(chunk)
+        yield list(zip(
+            chunk["ip"].astype(str).tolist(),
+            pd.to_datetime(chunk["timestamp"]).to_numpy(dtype="datetime64[us]").tolist(),
+            chunk["status"].to_numpy(dtype="int64").tolist(),
+            chunk["log_level"].astype(object).tolist() if "log_level" in chunk else ["INFO"] * size,
+            chunk["response"].astype(object).tolist() if "response" in chunk else [""] * size,
+        ))
+
+
+def show_save_report(report: Dict) -> bool:
+    """
+    Báo kết quả bulk insert qua notify (giao diện hoặc log)
+
+    Returns:
+        bool: True nếu không có batch lỗi
+    """
+    failed = report['failed_batches']
+    if report['rows_inserted']:
+        notify.success(f"Đã lưu {report['rows_inserted']:,} vào database "
+                   f"({report['rows_per_sec']:,.0f} dòng/giây)")
+    
+    if failed:
+        notify.error(f" Lỗi khi lưu dữ liệu: {len(failed)}/{report['batches']} batch thất bại")
+        for item in failed[:5]:
+            notify.warning(f"Batch {item['batch']} ({item['rows']:,} dòng): {item['error'][:200]}")
+    
+    return not failed
+
+
+def build_log_filters(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    log_level: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    min_status: Optional[int] = None,
+    max_status: Optional[int] = None,
+    time_column: str = "timestamp"
+) -> Tuple[str, list]:
+    """
+    Build điều kiện WHERE động cho các bộ lọc của get_logs_by_filters
+    
+    Args:
+        time_column: Cột thời gian dùng cho start_date/end_date
+                     ('timestamp' với server_logs, 'bucket' với bảng tổng hợp)
+    
+    Returns:
+        tuple: (chuỗi điều kiện, list tham số)
+    """
+    query = "1=1"
+    params = []
+    
+    if start_date:
+        query += f" AND {time_column} >= %s"
+        params.append(start_date)
+    
+    if end_date:
+        query += f" AND {time_column} <= %s"
+        params.append(end_date)
+    
+    if log_level:
+        query += " AND log_level = %s"
+        params.append(log_level)
+    
+    if ip_address:
+        query += " AND ip_address = %s"
+        params.append(ip_address)
+    
+    if min_status:
+        query += " AND status >= %s"
+        params.append(min_status)
+    
+    if max_status:
+        query += " AND status <= %s"
+        params.append(max_status)
+    
+    return query, params
+
+
+def _page_filters(after: Optional[Tuple], filters: Dict) -> Tuple[str, list]:
+    """
+    Điều kiện WHERE cho một trang: vị trí keyset và các bộ lọc bằng (log_level, status, ip_address)
+    """
+    clauses, params = [], []
+    if after is not None:
+        # Viết tách thay vì (timestamp, id) < (%s, %s) để MySQL dùng range scan trên index
+        clauses.append("(timestamp < %s OR (timestamp = %s AND id < %s))")
+        params.extend([after[0], after[0], after[1]])
+    for column in ("log_level", "status", "ip_address"):
+        if filters.get(column) is not None:
+            clauses.append(f"{column} = %s")
+            params.append(filters[column])
+    return " AND ".join(clauses) or "1=1", params
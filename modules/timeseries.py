@@ -0,0 +1,167 @@
+import math
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Số điểm tối đa mỗi đường sau khi giảm mẫu LTTB (xấp xỉ số pixel chiều ngang của biểu đồ)
+RATE_MAX_POINTS = int(os.getenv('RATE_MAX_POINTS', 1500))
+
+# Số bucket tối đa được tổng hợp trước khi giảm mẫu: giới hạn chi phí mỗi lần vẽ / zoom
+RATE_MAX_BUCKETS = int(os.getenv('RATE_MAX_BUCKETS', 20_000))
+
+# Số ô tối đa của histogram gốc; khoảng thời gian dài hơn thì độ phân giải gốc thô hơn 1 giây
+RATE_BASE_MAX_BUCKETS = 2_000_000
+
+# Độ rộng bucket "đẹp" (giây) được ưu tiên khi tổng hợp lại
+BUCKET_STEPS = [1, 2, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800, 3600,
+                2 * 3600, 3 * 3600, 6 * 3600, 12 * 3600, 86400, 7 * 86400]
+
+
+def choose_bucket(span: int, resolution: int = 1, max_buckets: int = RATE_MAX_BUCKETS) -> int:
+    """
+    Độ rộng bucket (giây, bội số của resolution) nhỏ nhất để span giây chia được thành
+    không quá max_buckets bucket
+    """
+    needed = max(resolution, math.ceil(span / max_buckets))
+    step = next((step for step in BUCKET_STEPS if step >= needed), needed)
+    return math.ceil(step / resolution) * resolution
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: chọn `threshold` điểm giữ được hình dạng đường
+    (đỉnh, đáy) của chuỗi (x, y) đã sắp theo x
+
+    Returns:
+        Mảng vị trí các điểm được chọn (luôn gồm điểm đầu và điểm cuối)
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Biên các bucket giữa (bỏ điểm đầu và cuối)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Điểm thứ ba của tam giác: trung bình bucket kế tiếp (hoặc điểm cuối)
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        px, py = x[previous], y[previous]
+        area = np.abs((px - avg_x) * (y[start:end] - py) - (px - x[start:end]) * (avg_y - py))
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+
+    return selected
+
+
+class RateIndex:
+    """
+    Số request và số lỗi (status >= 400) theo từng ô thời gian của một dataset,
+    kèm tổng tích lũy để tổng hợp lại một khoảng bất kỳ với chi phí chỉ phụ thuộc
+    số bucket (không phụ thuộc số dòng log).
+
+    - start: epoch giây của ô đầu tiên
+    - resolution: độ rộng một ô (giây), 1 trừ khi khoảng thời gian rất dài
+    """
+
+    def __init__(self, start: int, resolution: int, requests: np.ndarray, errors: np.ndarray):
+        self.start = int(start)
+        self.resolution = int(resolution)
+        self._requests = np.concatenate([[0], np.cumsum(requests, dtype=np.int64)])
+        self._errors = np.concatenate([[0], np.cumsum(errors, dtype=np.int64)])
+
+    def __len__(self) -> int:
+        return len(self._requests) - 1
+
+    @property
+    def end(self) -> int:
+        """Epoch giây ngay sau ô cuối cùng"""
+        return self.start + (len(self._requests) - 1) * self.resolution
+
+    @property
+    def total(self) -> int:
+        return int(self._requests[-1])
+
+    @classmethod
+    def from_events(cls, timestamps: np.ndarray, statuses: np.ndarray) -> "RateIndex":
+        """
+        Histogram từ cột timestamp (epoch giây) và status của LogDataset
+        """
+        if len(timestamps) == 0:
+            return cls(0, 1, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        start, last = int(timestamps.min()), int(timestamps.max())
+        resolution = max(1, math.ceil((last - start + 1) / RATE_BASE_MAX_BUCKETS))
+        cells = (timestamps - start) // resolution
+        size = (last - start) // resolution + 1
+        return cls(start, resolution,
+                   np.bincount(cells, minlength=size),
+                   np.bincount(cells[statuses >= 400], minlength=size))
+
+    @classmethod
+    def from_counts(cls, buckets: np.ndarray, requests: np.ndarray, errors: np.ndarray,
+                    resolution: int) -> "RateIndex":
+        """
+        Histogram từ số đếm theo bucket có sẵn (ví dụ bảng tổng hợp theo phút / giờ)
+
+        Args:
+            buckets: Epoch giây đầu mỗi bucket (bội số của resolution kể từ bucket đầu)
+        """
+        if len(buckets) == 0:
+            return cls(0, resolution, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        start = int(buckets.min())
+        cells = (buckets - start) // resolution
+        size = int(cells.max()) + 1
+        return cls(start, resolution,
+                   np.bincount(cells, weights=requests, minlength=size).astype(np.int64),
+                   np.bincount(cells, weights=errors, minlength=size).astype(np.int64))
+
+    def series(self, start: Optional[int] = None, end: Optional[int] = None,
+               max_buckets: int = RATE_MAX_BUCKETS) -> Tuple[pd.DataFrame, int]:
+        """
+        Requests/giây và errors/giây trong [start, end) với bucket tự chọn theo độ dài khoảng
+
+        Returns:
+            tuple: (DataFrame time / requests_per_sec / errors_per_sec, độ rộng bucket giây)
+        """
+        start = self.start if start is None else max(self.start, int(start))
+        end = self.end if end is None else min(self.end, int(end))
+        if end <= start:
+            return pd.DataFrame({"time": pd.to_datetime([]), "requests_per_sec": [], "errors_per_sec": []}), 0
+
+        bucket = choose_bucket(end - start, self.resolution, max_buckets)
+        # Biên bucket tính theo ô gốc, căn theo bội số bucket kể từ self.start
+        cells_per_bucket = bucket // self.resolution
+        first = (start - self.start) // self.resolution // cells_per_bucket * cells_per_bucket
+        last = -(-(end - self.start) // self.resolution)
+        edges = np.minimum(np.arange(first, last + cells_per_bucket, cells_per_bucket), last)
+        edges = np.unique(edges)
+
+        requests = np.diff(self._requests[edges])
+        errors = np.diff(self._errors[edges])
+        widths = np.diff(edges) * self.resolution
+        times = (self.start + edges[:-1] * self.resolution).astype("datetime64[s]")
+        return pd.DataFrame({
+            "time": times,
+            "requests_per_sec": requests / widths,
+            "errors_per_sec": errors / widths,
+        }), bucket
+
+
+def downsample(frame: pd.DataFrame, column: str, max_points: int = RATE_MAX_POINTS) -> pd.DataFrame:
+    """
+    Giữ tối đa max_points điểm của một cột theo LTTB (trục x là cột time)
+    """
+    positions = lttb(frame["time"].to_numpy().astype(np.int64), frame[column].to_numpy(), max_points)
+    return frame.iloc[positions]
@@ -0,0 +1,185 @@
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+TIMESTAMP_FORMATS = [
+    '%d/%b/%Y:%H:%M:%S',      # 04/Dec/2025:10:00:00
+    '%d/%m/%Y:%H:%M:%S',      # 04/12/2025:10:00:00
+    '%Y-%m-%d %H:%M:%S',      # 2025-12-04 10:00:00
+    '%d-%b-%Y %H:%M:%S',      # 04-Dec-2025 10:00:00
+]
+
+CLF_FORMAT = TIMESTAMP_FORMATS[0]
+
+# Số chuỗi thời gian khác nhau được nhớ trong cache của mỗi decoder
+TIMESTAMP_CACHE_SIZE = 65_536
+
+_MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+
+
+def split_time_field(time_str: str) -> Tuple[str, Optional[str]]:
+    """
+    Tách trường thời gian của log thành (phần ngày giờ, múi giờ)
+
+    Ví dụ: '04/Dec/2025:10:00:00 +0700' -> ('04/Dec/2025:10:00:00', '+0700')
+
+    Raises:
+        IndexError: Nếu chuỗi chỉ gồm khoảng trắng
+    """
+    if ' ' not in time_str:
+        return time_str, None
+    parts = time_str.split()
+    return parts[0], parts[1] if len(parts) > 1 else None
+
+
+def parse_utc_offset(zone: Optional[str]) -> Optional[int]:
+    """
+    Chuyển múi giờ dạng '+0700' / '-0530' thành số phút lệch so với UTC
+    """
+    if not zone or len(zone) != 5 or zone[0] not in '+-':
+        return None
+    digits = zone[1:]
+    if not (digits.isascii() and digits.isdigit()):
+        return None
+    minutes = int(digits[:2]) * 60 + int(digits[2:])
+    return -minutes if zone[0] == '-' else minutes
+
+
+def decode_clf(token: str) -> Optional[datetime]:
+    """
+    Decode nhanh định dạng CLF 'dd/Mon/YYYY:HH:MM:SS' bằng cách cắt chuỗi
+    theo vị trí cố định thay vì dùng strptime
+
+    Returns:
+        datetime hoặc None nếu chuỗi không đúng hình dạng CLF
+    """
+    if (len(token) != 20 or token[2] != '/' or token[6] != '/'
+            or token[11] != ':' or token[14] != ':' or token[17] != ':'):
+        return None
+
+    month = _MONTHS.get(token[3:6].lower())
+    digits = token[0:2] + token[7:11] + token[12:14] + token[15:17] + token[18:20]
+    if month is None or not (digits.isascii() and digits.isdigit()):
+        return None
+
+    try:
+        return datetime(int(token[7:11]), month, int(token[0:2]),
+                        int(token[12:14]), int(token[15:17]), int(token[18:20]))
+    except ValueError:
+        return None
+
+
+def detect_timestamp_format(samples: Iterable[str]) -> Optional[str]:
+    """
+    Xác định format thời gian phổ biến nhất trong một mẫu các trường thời gian
+
+    Args:
+        samples: Các chuỗi thời gian lấy từ đầu file
+
+    Returns:
+        Format trong TIMESTAMP_FORMATS, hoặc None nếu không format nào khớp
+    """
+    counts = dict.fromkeys(TIMESTAMP_FORMATS, 0)
+
+    for time_str in samples:
+        try:
+            token, _ = split_time_field(time_str)
+        except IndexError:
+            continue
+        if decode_clf(token) is not None:
+            counts[CLF_FORMAT] += 1
+            continue
+        for fmt in TIMESTAMP_FORMATS:
+            try:
+                datetime.strptime(token, fmt)
+            except ValueError:
+                continue
+            counts[fmt] += 1
+            break
+
+    best = max(counts, key=counts.get)
+    return best if counts[best] else None
+
+
+class TimestampDecoder:
+    """
+    Decoder thời gian cho một file log.
+
+    - Format được xác định một lần (detect_timestamp_format) và được thử trước
+    - CLF được decode bằng cắt chuỗi theo vị trí cố định
+    - Kết quả được nhớ trong LRU cache giới hạn, vì hàng nghìn dòng log
+      thường dùng chung một giây
+    - Múi giờ (+0700) được giữ lại để có thể chuẩn hóa về UTC
+    """
+
+    def __init__(self, fmt: Optional[str] = None, utc: bool = False,
+                 cache_size: int = TIMESTAMP_CACHE_SIZE):
+        """
+        Args:
+            fmt: Format ưu tiên (mặc định CLF)
+            utc: True để trả về thời gian đã chuẩn hóa về UTC (naive)
+            cache_size: Số chuỗi thời gian tối đa trong cache
+        """
+        self.fmt = fmt or CLF_FORMAT
+        self.utc = utc
+        self._formats = [self.fmt] + [f for f in TIMESTAMP_FORMATS if f != self.fmt]
+        self._decode_cached = lru_cache(maxsize=cache_size)(self._decode_uncached)
+
+    @classmethod
+    def from_sample(cls, samples: Iterable[str], **kwargs) -> "TimestampDecoder":
+        """
+        Tạo decoder với format được xác định từ mẫu
+        """
+        return cls(fmt=detect_timestamp_format(samples), **kwargs)
+
+    def _decode_uncached(self, time_str: str) -> Tuple[Optional[datetime], Optional[int]]:
+        try:
+            token, zone = split_time_field(time_str)
+        except IndexError:
+            return None, None
+
+        offset = parse_utc_offset(zone)
+
+        if self.fmt == CLF_FORMAT:
+            value = decode_clf(token)
+            if value is not None:
+                return value, offset
+
+        for fmt in self._formats:
+            try:
+                return datetime.strptime(token, fmt), offset
+            except ValueError:
+                continue
+
+        return None, offset
+
+    def decode_with_offset(self, time_str: str) -> Tuple[Optional[datetime], Optional[int]]:
+        """
+        Decode chuỗi thời gian, giữ nguyên giờ địa phương
+
+        Returns:
+            tuple: (datetime naive theo giờ địa phương hoặc None,
+                    số phút lệch so với UTC hoặc None nếu log không có múi giờ)
+        """
+        return self._decode_cached(time_str)
+
+    def decode(self, time_str: str) -> Optional[datetime]:
+        """
+        Decode chuỗi thời gian; nếu utc=True thì trừ đi độ lệch múi giờ
+
+        Returns:
+            datetime hoặc None nếu parse thất bại
+        """
+        value, offset = self._decode_cached(time_str)
+        if self.utc and value is not None and offset:
+            return value - timedelta(minutes=offset)
+        return value
+
+    def cache_info(self):
+        """
+        Thống kê hit/miss của cache
+        """
+        return self._decode_cached.cache_info()
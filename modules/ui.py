@@ -0,0 +1,181 @@
+"""
+Lớp giao diện Streamlit mỏng bọc phần lõi (parser, database): progress bar,
+hiển thị cảnh báo / lỗi và thống kê parse. Phần lõi không import Streamlit nên
+chạy được trong cron, worker, benchmark và CLI (python -m modules.cli).
+"""
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from modules.dataset import LogDataset
+from modules.ingest import ingest_source
+from modules.log_parser import new_parse_stats, parse_source, source_size
+from modules.notify import log_notifier
+
+
+def streamlit_notifier(level: str, message: str):
+    """
+    Notifier (xem modules.notify) hiển thị thông báo bằng st.error / st.warning / st.info / st.success.
+    Thông báo từ thread không thuộc lần chạy script (writer thread, thread nền) được ghi log.
+    """
+    if get_script_run_ctx(suppress_warning=True) is None:
+        log_notifier(level, message)
+        return
+    getattr(st, level, st.info)(message)
+
+
+@contextmanager
+def streamlit_progress(source):
+    """
+    Progress bar Streamlit theo số byte đã đọc (chỉ hiện với file lớn > 64 KB)
+
+    Yields:
+        Callback nhận số byte đã đọc, hoặc None nếu không cần progress bar
+    """
+    total_bytes = source_size(source)
+    if not total_bytes or total_bytes <= 64 * 1024:
+        yield None
+        return
+
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+
+    def update_progress(bytes_read: int):
+        progress_bar.progress(min(bytes_read / total_bytes, 1.0))
+        status_text.text(f"Đang xử lý {bytes_read:,}/{total_bytes:,} bytes...")
+
+    try:
+        yield update_progress
+    finally:
+        # Clear progress bar
+        progress_bar.empty()
+        status_text.empty()
+
+
+def parse_uploaded_file(uploaded_file, engine: str = "line") -> Tuple[LogDataset, Dict]:
+    """
+    Parse file upload thành LogDataset (modules.log_parser.parse_source),
+    hiển thị progress, cảnh báo và thống kê trên giao diện
+
+    Returns:
+        tuple: (dataset, stats_dict)
+    """
+    try:
+        with streamlit_progress(uploaded_file) as update_progress:
+            dataset, stats, members = parse_source(uploaded_file, engine=engine,
+                                                   progress=update_progress, on_warning=st.warning)
+    except Exception as e:
+        st.error(f" Không thể đọc file: {e}")
+        return LogDataset(), new_parse_stats()
+
+    if stats['latin1_chunks']:
+        st.info(" File được decode bằng Latin-1 encoding")
+
+    show_parse_summary(stats)
+    if len(members) > 1:
+        show_member_summary(members)
+
+    return dataset, stats
+
+
+def ingest_uploaded_file(uploaded_file) -> Tuple[LogDataset, Dict, Optional[Dict]]:
+    """
+    Parse file upload đúng một lần: các batch vừa được nạp vào database qua
+    pipeline của ingest_source (idempotent, có row_hash) vừa được giữ lại thành
+    LogDataset trong bộ nhớ, nên tổng thời gian gần max(parse, insert).
+
+    Returns:
+        tuple: (dataset, stats_dict, report của ingest_source hoặc None nếu lỗi)
+    """
+    parts = []
+    try:
+        # Batch đến từ thread producer của pipeline: chỉ chuyển sang dạng gọn, không gọi Streamlit
+        report, stats = ingest_source(uploaded_file, source_name=uploaded_file.name,
+                                      on_batch=lambda batch: parts.append(LogDataset.from_records(batch)))
+    except Exception as e:
+        st.error(f" Không thể đọc file: {e}")
+        return LogDataset(), new_parse_stats(), None
+
+    show_parse_summary(stats)
+    if len(report['members']) > 1:
+        show_member_summary(report['members'])
+
+    return LogDataset.concat(parts), stats, report
+
+
+def show_member_summary(members: List[Dict]):
+    """
+    Hiển thị thống kê parse của từng file trong archive
+    """
+    with st.expander(f"📦 {len(members)} file trong archive"):
+        table = pd.DataFrame(members).rename(columns={
+            'member': 'File',
+            'total_lines': 'Tổng số dòng',
+            'parsed_success': 'Parse thành công',
+            'parse_errors': 'Không khớp pattern',
+            'invalid_ips': 'IP không hợp lệ',
+            'timestamp_errors': 'Lỗi timestamp',
+            'invalid_status': 'Status không hợp lệ',
+            'empty_lines': 'Dòng trống',
+            'latin1_chunks': 'Khối Latin-1',
+        })
+        st.dataframe(table, use_container_width=True, hide_index=True)
+
+
+def show_parse_summary(stats: Dict):
+    """
+    Hiển thị thống kê parse chi tiết trên giao diện
+    """
+    # Hiển thị thống kê chi tiết
+    if stats['total_lines'] > 0:
+        success_rate = (stats['parsed_success'] / stats['total_lines']) * 100
+        
+
+        if success_rate >= 90:
+            box_type = "success"
+            emoji = "✅"
+        elif success_rate >= 70:
+            box_type = "info"
+            emoji = "ℹ️"
+        else:
+            box_type = "warning"
+            emoji = "⚠️"
+        
+        stats_message = f"""
+        {emoji} **Kết quả parse log:**
+        
+        **Tổng quan:**
+        - Tổng số dòng: **{stats['total_lines']:,}**
+        - Parse thành công: **{stats['parsed_success']:,}** ({success_rate:.1f}%)
+        - Dòng trống: **{stats['empty_lines']:,}**
+        
+        **Chi tiết lỗi:**
+        - Không khớp pattern: **{stats['parse_errors']:,}**
+        - IP không hợp lệ: **{stats['invalid_ips']:,}**
+        - Lỗi timestamp: **{stats['timestamp_errors']:,}**
+        - Status code không hợp lệ: **{stats['invalid_status']:,}**
+        """
+        
+        if box_type == "success":
+            st.success(stats_message)
+        elif box_type == "info":
+            st.info(stats_message)
+        else:
+            st.warning(stats_message)
+        
+        # Cảnh báo nếu quá nhiều lỗi
+        total_errors = (stats['parse_errors'] + stats['invalid_ips'] + 
+                       stats['timestamp_errors'] + stats['invalid_status'])
+        
+        if total_errors > stats['parsed_success']:
+            st.error("""
+            ⚠️ Số dòng lỗi nhiều hơn số dòng thành công!
+            
+            Gợi ý khắc phục:
+            1. Kiểm tra format log có đúng chuẩn Apache/Nginx không
+            2. Xem mẫu log mong đợi: `127.0.0.1 - - [04/Dec/2025:10:00:00 +0700] "GET /index.html HTTP/1.1" 200 1024`
+            3. Kiểm tra encoding file (UTF-8 hoặc Latin-1)
+            """)
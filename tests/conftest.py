@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# modules.storage chọn backend khi import: test dùng SQLite nhúng trong thư mục tạm,
+# không cần MySQL server hay mysql-connector
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", os.path.join(tempfile.mkdtemp(prefix="log-analyzer-tests-"), "logs.db"))
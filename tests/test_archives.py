@@ -0,0 +1,94 @@
+"""
+Log trong file nén / archive (tar.gz, zip, zip trong tar.gz) được giải nén dạng
+streaming và parse cho cùng kết quả như log thường.
+"""
+import gzip
+import io
+import tarfile
+import tracemalloc
+import zipfile
+
+from modules.archives import iter_log_members, parse_archive
+from modules.log_parser import parse_log_dataset
+
+
+def log_bytes(first: int, last: int) -> bytes:
+    return b"".join(f'10.0.{n // 256 % 256}.{n % 256} - - [04/Dec/2025:00:{n // 60 % 60:02d}:{n % 60:02d} +0000] '
+                    f'"GET /item/{n} HTTP/1.1" {404 if n % 7 == 0 else 200} {n}\n'.encode()
+                    for n in range(first, last))
+
+
+def tar_bytes(members, compress: bool = True) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz" if compress else "w") as tar:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def zip_bytes(members) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+class Unseekable(io.RawIOBase):
+    """
+    Stream chỉ đọc tuần tự (như body của request upload)
+    """
+
+    def __init__(self, data: bytes):
+        self._data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._data.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def test_archive_matches_plain_log(tmp_path):
+    parts = [log_bytes(0, 300), log_bytes(300, 700), log_bytes(700, 1000)]
+    expected, expected_stats = parse_log_dataset(io.BytesIO(b"".join(parts)))
+
+    nested = tar_bytes([("a.log", parts[0]), ("b.log.gz", gzip.compress(parts[1])),
+                        ("more.zip", zip_bytes([("c.log", parts[2])]))])
+    for name, data in (("logs.tgz", nested), ("logs.zip", zip_bytes(zip(["a.log", "b.log", "c.log"], parts)))):
+        dataset, stats, members = parse_archive(io.BytesIO(data), name=name)
+        assert len(members) == 3
+        assert stats["parsed_success"] == expected_stats["parsed_success"] == 1000
+        assert sorted(dataset.frame["ip"]) == sorted(expected.frame["ip"])
+
+
+def test_members_of_unseekable_stream():
+    data = tar_bytes([("a.log", log_bytes(0, 10)), ("b.zip", zip_bytes([("b.log", log_bytes(10, 20))]))])
+    members = [(member, stream.read(), independent)
+               for member, stream, independent in iter_log_members(Unseekable(data), "logs.tgz")]
+
+    # Member của tar chỉ đọc được trước member tiếp theo; zip trong tar được chép ra file tạm
+    assert members == [("logs.tar/a.log", log_bytes(0, 10), False),
+                       ("logs.tar/b.zip/b.log", log_bytes(10, 20), True)]
+
+
+def test_tar_member_is_streamed():
+    data = tar_bytes([("big.log", log_bytes(0, 100_000))])
+    size = len(log_bytes(0, 100_000))
+
+    tracemalloc.start()
+    try:
+        read = 0
+        for _, stream, _ in iter_log_members(io.BytesIO(data), "logs.tgz"):
+            while chunk := stream.read(64 * 1024):
+                read += len(chunk)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert read == size
+    assert peak < size // 4
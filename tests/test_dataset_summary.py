@@ -0,0 +1,35 @@
+"""
+summarize_dataset đếm chính xác số IP khác nhau, top IP và top IP lỗi 404 trên dữ liệu trong bộ nhớ.
+"""
+from datetime import datetime
+
+from modules.dataset import LogDataset, summarize_dataset
+from modules.log_parser import determine_log_level, determine_response_text
+
+
+def make_dataset(ips, statuses):
+    timestamp = datetime(2025, 12, 4)
+    return LogDataset.from_records([(ip, timestamp, status, determine_log_level(status),
+                                     determine_response_text(status)) for ip, status in zip(ips, statuses)])
+
+
+def test_counts_are_exact():
+    # Nhiều IP chỉ xuất hiện một lần: sketch sẽ phải ước lượng, ở đây phải đếm đúng
+    ips = [f"10.{n // 65536}.{n // 256 % 256}.{n % 256}" for n in range(5000)] + ["1.2.3.4"] * 7 + ["5.6.7.8"] * 3
+    statuses = [200] * 5000 + [404] * 7 + [404, 200, 404]
+    summary = summarize_dataset(make_dataset(ips, statuses), top_k=3)
+
+    assert summary["approximate"] is False
+    assert summary["unique_ips"] == 5002
+    assert summary["total_requests"] == len(ips)
+    assert summary["error_count"] == 9
+
+    assert summary["top_ips"].to_dict() == {"1.2.3.4": 7, "5.6.7.8": 3, "10.0.0.0": 1}
+    assert summary["top_404_ips"].to_dict() == {"1.2.3.4": 7, "5.6.7.8": 2}
+    assert (summary["top_ips_error"] == 0).all()
+
+
+def test_empty_dataset():
+    summary = summarize_dataset(LogDataset())
+    assert summary["unique_ips"] == 0
+    assert summary["top_ips"].empty and summary["top_404_ips"].empty
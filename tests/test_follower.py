@@ -0,0 +1,189 @@
+"""
+LogFollower giao mỗi dòng đúng một lần: qua dòng cuối chưa hoàn chỉnh,
+logrotate (đổi tên file), copytruncate, lỗi sink và khởi động lại từ checkpoint.
+"""
+import os
+import time
+from datetime import timedelta
+
+import pytest
+
+from modules.follower import CheckpointStore, LogFollower
+from modules.log_parser import ROW_HASH_WINDOW
+
+
+def line(n: int) -> bytes:
+    # Mỗi dòng có IP riêng để nhận diện; nhiều dòng chung một giây
+    return (f'10.0.{n // 256}.{n % 256} - - [04/Dec/2025:00:00:{n // 10 % 60:02d} +0000] '
+            f'"GET /item/{n} HTTP/1.1" 200 {n}\n').encode()
+
+
+def lines(first: int, last: int) -> bytes:
+    return b"".join(line(n) for n in range(first, last))
+
+
+class ListSink:
+    def __init__(self):
+        self.rows = []
+        self.fail_after = None   # Số batch ghi được trước khi lỗi
+
+    def __call__(self, batches):
+        written = 0
+        for batch in batches:
+            if self.fail_after is not None:
+                if self.fail_after == 0:
+                    raise RuntimeError("database unavailable")
+                self.fail_after -= 1
+            self.rows.extend(batch)
+            written += len(batch)
+        return written
+
+    def ips(self):
+        return [row[0] for row in self.rows]
+
+
+def expected_ips(first: int, last: int):
+    return [f'10.0.{n // 256}.{n % 256}' for n in range(first, last)]
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return tmp_path / "access.log"
+
+
+def make_follower(log_path, sink, tmp_path):
+    checkpoints = CheckpointStore(str(tmp_path / "checkpoints.json"))
+    return LogFollower([str(log_path)], sink=sink, checkpoints=checkpoints, batch_size=7)
+
+
+def append(path, data: bytes):
+    with open(path, "ab") as fh:
+        fh.write(data)
+
+
+def test_partial_line_waits_for_newline(log_path, tmp_path):
+    sink = ListSink()
+    full = line(1)
+    log_path.write_bytes(lines(0, 1) + full[:20])
+    follower = make_follower(log_path, sink, tmp_path)
+
+    assert follower.poll_once() == 1
+    assert follower.poll_once() == 0
+
+    append(log_path, full[20:] + lines(2, 30))
+    assert follower.poll_once() == 29
+    follower.close()
+
+    assert sink.ips() == expected_ips(0, 30)
+
+
+def test_rotation_and_truncation_deliver_exactly_once(log_path, tmp_path):
+    sink = ListSink()
+    log_path.write_bytes(lines(0, 50))
+    follower = make_follower(log_path, sink, tmp_path)
+    follower.poll_once()
+
+    # logrotate: dòng cuối của file cũ không có newline, file mới được tạo cùng tên
+    append(log_path, lines(50, 60) + line(60)[:-1])
+    os.rename(log_path, tmp_path / "access.log.1")
+    log_path.write_bytes(lines(61, 80))
+    follower.poll_once()
+    follower.poll_once()
+
+    # copytruncate: file bị cắt về 0 rồi ghi tiếp
+    with open(log_path, "r+b") as fh:
+        fh.truncate(0)
+    append(log_path, lines(80, 90))
+    follower.poll_once()
+    follower.close()
+
+    assert sink.ips() == expected_ips(0, 90)
+    assert len({row[-1] for row in sink.rows}) == 90
+
+
+def test_failed_sink_retries_same_rows(log_path, tmp_path):
+    sink = ListSink()
+    log_path.write_bytes(lines(0, 20))
+    follower = make_follower(log_path, sink, tmp_path)
+    follower.poll_once()
+
+    # Batch đầu của đoạn mới ghi được rồi sink lỗi: offset không được checkpoint
+    append(log_path, lines(20, 40))
+    sink.fail_after = 1
+    assert follower.poll_once() == 0
+    sink.fail_after = None
+    follower.poll_once()
+    follower.close()
+
+    # Đoạn đọc lại mang đúng row_hash cũ, nên database (UNIQUE row_hash) chỉ giữ một bản
+    unique = {row[-1]: row[0] for row in sink.rows}
+    assert len(sink.rows) == 40 + 7
+    assert sorted(unique.values()) == sorted(expected_ips(0, 40))
+
+
+def test_restart_resumes_from_checkpoint(log_path, tmp_path):
+    first, second = ListSink(), ListSink()
+    log_path.write_bytes(lines(0, 25))
+    follower = make_follower(log_path, first, tmp_path)
+    follower.poll_once()
+    follower.close()
+
+    # Dòng trùng hệt dòng cuối đã nạp (cùng giây) vẫn là một dòng mới
+    append(log_path, line(24) + lines(25, 35))
+    follower = make_follower(log_path, second, tmp_path)
+    follower.poll_once()
+    follower.close()
+
+    assert first.ips() == expected_ips(0, 25)
+    assert second.ips() == expected_ips(24, 35)
+    hashes = [row[-1] for row in first.rows + second.rows]
+    assert len(set(hashes)) == len(hashes)
+
+
+def test_poll_keeps_up_with_full_row_hash_window(log_path, tmp_path):
+    # 10k dòng/giây: hasher giữ ROW_HASH_WINDOW giây x 10k khóa, mỗi lần poll (0.5 s) có 5k dòng mới
+    sink = ListSink()
+    log_path.write_bytes(lines(0, 10))
+    follower = LogFollower([str(log_path)], sink=sink, checkpoints=CheckpointStore(str(tmp_path / "cp.json")),
+                           batch_size=5_000)
+    follower.poll_once()
+
+    hasher = follower.files[0].row_hasher
+    for age in range(1, ROW_HASH_WINDOW):
+        hasher._occurrences[hasher._latest - timedelta(seconds=age)] = dict.fromkeys(range(age * 10_000,
+                                                                                           (age + 1) * 10_000), 1)
+
+    for first in range(10, 20_010, 5_000):
+        append(log_path, lines(first, first + 5_000))
+        start = time.perf_counter()
+        assert follower.poll_once() == 5_000
+        assert time.perf_counter() - start < 0.5
+    follower.close()
+
+    assert sink.ips() == expected_ips(0, 20_010)
+
+
+def test_buffered_rows_are_checkpointed_only_after_flush(log_path, tmp_path):
+    sink = ListSink()
+    log_path.write_bytes(lines(0, 30))
+    checkpoints = CheckpointStore(str(tmp_path / "checkpoints.json"))
+    follower = LogFollower([str(log_path)], sink=sink, checkpoints=checkpoints, batch_size=7,
+                           flush_rows=50, flush_interval=3600)
+
+    assert follower.poll_once() == 0
+    assert checkpoints.get(str(log_path)) is None
+
+    # Dừng đột ngột trước khi ghi: lần chạy sau đọc lại từ đầu
+    restarted = LogFollower([str(log_path)], sink=sink, checkpoints=checkpoints, batch_size=7,
+                            flush_rows=50, flush_interval=3600)
+    append(log_path, lines(30, 60))
+    assert restarted.poll_once() == 60
+    assert checkpoints.get(str(log_path))['offset'] == log_path.stat().st_size
+
+    append(log_path, lines(60, 70))
+    assert restarted.poll_once() == 0
+    restarted.close()
+    follower.files[0].close()
+
+    assert sink.ips() == expected_ips(0, 70)
+    assert checkpoints.get(str(log_path))['offset'] == log_path.stat().st_size
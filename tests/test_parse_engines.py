@@ -0,0 +1,100 @@
+"""
+Ba engine parse (line, parallel, vectorized) phải cho cùng bản ghi và cùng
+thống kê trên mọi loại dòng: hợp lệ, sai pattern, IP / timestamp / status
+không hợp lệ, dòng trống, CRLF và byte Latin-1.
+"""
+import pandas as pd
+import pytest
+
+from modules import log_parser
+from modules.log_parser import PARSE_ENGINES, parse_log_to_dataframe, parse_source
+from modules.metrics import metrics
+
+LINES = [
+    b'189.214.173.14 - - [04/Dec/2025:00:00:00 +0700] "GET /api/v1/users/42 HTTP/1.1" 200 8375',
+    b'69.86.143.207 - - [04/Dec/2025:00:00:01 +0700] "POST /login HTTP/1.1" 302 -',
+    b'',
+    b'10.0.0.1 - - [04/Dec/2025:00:00:01 +0700] "GET /missing HTTP/1.1" 404 12\r',
+    b'this line does not match the pattern',
+    b'999.1.1.1 - - [04/Dec/2025:00:00:02 +0700] "GET / HTTP/1.1" 200 1',
+    b'10.0.0.2 - - [31/Foo/2025:00:00:02 +0700] "GET / HTTP/1.1" 200 1',
+    b'10.0.0.3 - - [04/Dec/2025:00:00:03 +0700] "GET / HTTP/1.1" 999 1',
+    b'   ',
+    b'10.0.0.5 - - [04/Dec/2025:00:00:04 +0000] "DELETE /api HTTP/2.0" 503 0',
+    b'10.0.0.1 - - [04/Dec/2025:00:00:01 +0700] "GET /missing HTTP/1.1" 404 12',
+]
+
+# latin1_chunks đếm theo khối đọc, nên chỉ có một dòng Latin-1 (ở giữa file) để mọi cách chia đoạn cho cùng kết quả
+LATIN1_LINE = b'10.0.0.4 - - [04/Dec/2025:00:00:03 +0700] "GET /caf\xe9 HTTP/1.1" 500 7'
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "mixed.log"
+    # Lặp lại để file đủ lớn cho nhiều đoạn song song; không có newline cuối file
+    lines = LINES * 200
+    lines.insert(len(lines) // 2, LATIN1_LINE)
+    path.write_bytes(b"\n".join(lines))
+    return path
+
+
+@pytest.fixture(autouse=True)
+def split_small_files(monkeypatch):
+    # Engine parallel chia cả file nhỏ thành nhiều đoạn
+    monkeypatch.setattr(log_parser, "PARALLEL_MIN_BYTES", 0)
+    monkeypatch.setattr(log_parser, "PARSE_WORKERS", 3)
+
+
+def _parse(path, engine):
+    df, stats = parse_log_to_dataframe(str(path), engine=engine)
+    df = df.reset_index(drop=True)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df["status"] = df["status"].astype(int)
+    for column in ("ip", "log_level", "response"):
+        df[column] = df[column].astype(str)
+    return df, stats
+
+
+def test_engines_parse_identically(log_file):
+    expected_df, expected_stats = _parse(log_file, "line")
+
+    assert expected_stats["total_lines"] == len(LINES) * 200 + 1
+    assert expected_stats["parsed_success"] == 5 * 200 + 1
+    assert expected_stats["empty_lines"] > 0
+    assert expected_stats["parse_errors"] > 0
+    assert expected_stats["invalid_ips"] > 0
+    assert expected_stats["timestamp_errors"] > 0
+    assert expected_stats["invalid_status"] > 0
+    assert expected_stats["latin1_chunks"] == 1
+
+    for engine in PARSE_ENGINES:
+        df, stats = _parse(log_file, engine)
+        assert stats == expected_stats, engine
+        pd.testing.assert_frame_equal(df, expected_df, check_dtype=False, obj=engine)
+
+
+@pytest.mark.parametrize("engine", PARSE_ENGINES)
+def test_engine_parses_uploaded_bytes(log_file, engine):
+    expected_df, expected_stats = _parse(log_file, "line")
+
+    with open(log_file, "rb") as fh:
+        df, stats = parse_log_to_dataframe(fh, engine=engine)
+
+    assert stats == expected_stats
+    assert len(df) == len(expected_df)
+
+
+def test_unknown_engine(log_file):
+    with pytest.raises(ValueError):
+        parse_log_to_dataframe(str(log_file), engine="awk")
+
+
+@pytest.mark.parametrize("engine", PARSE_ENGINES)
+def test_parse_source_counts_lines_and_rows(log_file, engine, monkeypatch):
+    monkeypatch.setattr(metrics, "enabled", True)
+    metrics.reset()
+    _, stats, _ = parse_source(str(log_file), engine=engine)
+
+    counters = metrics.snapshot()["counters"]
+    assert counters["parse.lines"] == stats["total_lines"]
+    assert counters["parse.rows"] == stats["parsed_success"]
@@ -0,0 +1,195 @@
+"""
+Các thao tác StorageBackend cho cùng kết quả trên mọi backend nhúng
+(STORAGE_BACKEND=sqlite / parquet), mỗi backend dùng một thư mục tạm riêng.
+"""
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from modules.log_parser import compute_row_hash, determine_log_level, determine_response_text
+from modules.storage import OPERATIONS, load_backend
+
+# Các ngày có log, tính từ hôm nay để maintain_partitions có dữ liệu quá hạn để xóa
+TODAY = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+DAYS = [TODAY - timedelta(days=10), TODAY - timedelta(days=2), TODAY - timedelta(days=1)]
+STATUSES = [200, 200, 404, 500, 302, 200, 503]
+PER_DAY = 30
+
+
+def make_rows():
+    rows = []
+    for day in DAYS:
+        for n in range(PER_DAY):
+            # Ba dòng mỗi giây: trang phải tách được các dòng cùng timestamp
+            timestamp = day + timedelta(hours=12, seconds=n // 3)
+            status = STATUSES[n % len(STATUSES)]
+            ip = f"10.0.0.{n % 5}"
+            line = f"{day:%Y%m%d}-{n}"
+            rows.append((ip, timestamp, status, determine_log_level(status),
+                         determine_response_text(status), compute_row_hash(line, 0)))
+    return rows
+
+
+ROWS = make_rows()
+
+
+@pytest.fixture(params=["sqlite", "parquet"])
+def backend(request, tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_BACKEND", request.param)
+    module = load_backend(request.param)
+    if request.param == "sqlite":
+        monkeypatch.setattr(module, "SQLITE_PATH", str(tmp_path / "logs.db"))
+    else:
+        monkeypatch.setattr(module, "PARQUET_DIR", str(tmp_path / "parquet"))
+    return module
+
+
+@pytest.fixture
+def loaded(backend):
+    report = backend.bulk_save_batches([ROWS[:40], ROWS[40:]])
+    assert report['rows_inserted'] == len(ROWS)
+    assert not report['failed_batches']
+    return backend
+
+
+def test_backend_has_every_operation(backend):
+    for name in OPERATIONS:
+        assert callable(getattr(backend, name))
+
+
+def test_empty_backend(backend):
+    assert backend.get_last_ingest(b"x" * 32) is None
+    assert backend.get_logs_by_filters().empty
+    page, cursor = backend.fetch_log_page(page_size=10)
+    assert page.empty and cursor is None
+    assert backend.get_statistics().get('total_logs', 0) == 0
+
+
+def test_ingest_manifest(backend):
+    entry = {'source_name': 'a.log', 'head_hash': b"h" * 32, 'tail_hash': b"t" * 32,
+             'range_start': 0, 'range_end': 100, 'rows_parsed': 5, 'rows_inserted': 5}
+    assert backend.record_ingest(entry)
+    assert backend.record_ingest({**entry, 'range_start': 100, 'range_end': 250})
+
+    last = backend.get_last_ingest(b"h" * 32)
+    assert int(last['range_end']) == 250
+    assert bytes(last['tail_hash']) == b"t" * 32
+    assert backend.get_last_ingest(b"z" * 32) is None
+
+
+def test_rows_with_stored_row_hash_are_skipped(backend):
+    # Đoạn log đọc lại (follower sau lỗi, copytruncate) mang đúng row_hash cũ
+    assert backend.bulk_save_batches([ROWS[:40]])['rows_inserted'] == 40
+    report = backend.bulk_save_batches([ROWS[30:50], ROWS[45:50]])
+    assert report['rows_inserted'] == 10
+    assert backend.get_statistics()['total_logs'] == 50
+
+
+def test_save_dataframe(backend):
+    frame = pd.DataFrame(ROWS[:10], columns=["ip_address", "timestamp", "status", "log_level",
+                                             "response", "row_hash"]).drop(columns="row_hash")
+    assert backend.save_dataframe(frame)
+    assert backend.get_statistics()['total_logs'] == 10
+
+
+def test_filters(loaded):
+    everything = loaded.get_logs_by_filters()
+    assert len(everything) == len(ROWS)
+    assert everything['timestamp'].is_monotonic_decreasing
+
+    errors = loaded.get_logs_by_filters(log_level="ERROR")
+    assert len(errors) == sum(row[3] == "ERROR" for row in ROWS)
+
+    day = DAYS[1].strftime("%Y-%m-%d")
+    one_day = loaded.get_logs_by_filters(start_date=f"{day} 00:00:00", end_date=f"{day} 23:59:59",
+                                         ip_address="10.0.0.1", min_status=200, max_status=399)
+    expected = [row for row in ROWS if row[1].date() == DAYS[1].date()
+                and row[0] == "10.0.0.1" and 200 <= row[2] <= 399]
+    assert len(one_day) == len(expected) > 0
+
+
+@pytest.mark.parametrize("filters", [{}, {"log_level": "INFO"}, {"status": 200}])
+def test_pages_cover_every_row_once(loaded, filters):
+    expected = [row for row in ROWS
+                if row[3] == filters.get("log_level", row[3]) and row[2] == filters.get("status", row[2])]
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        page, cursor = loaded.fetch_log_page(after=cursor, page_size=7, **filters)
+        seen.extend(zip(page.frame["timestamp"], page.frame["status"]))
+        pages += 1
+        if cursor is None:
+            break
+
+    assert pages == -(-len(expected) // 7)
+    timestamps = [timestamp for timestamp, _ in seen]
+    assert timestamps == sorted(timestamps, reverse=True)
+    assert sorted(seen) == sorted((int(row[1].timestamp()), row[2]) for row in expected)
+
+
+def test_pages_split_ties_without_drift(backend):
+    # Các dòng cùng một timestamp nằm ở nhiều lần ghi (nhiều file Parquet);
+    # dòng mới ghi giữa hai lần đọc trang không làm trang sau lặp hay bỏ sót dòng cũ
+    timestamp = DAYS[1] + timedelta(hours=8)
+    old = [(f"10.0.1.{n}", timestamp, 200, "INFO", "OK", compute_row_hash(f"tie-{n}", 0)) for n in range(30)]
+    for first in range(0, 30, 10):
+        backend.bulk_save_batches([old[first:first + 10]])
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = backend.fetch_log_page(after=cursor, page_size=7)
+        seen.extend(page.to_display()["ip"])
+        if len(seen) == 7:
+            backend.bulk_save_batches([[("10.0.2.1", timestamp, 200, "INFO", "OK", compute_row_hash("new", 0))]])
+        if cursor is None:
+            break
+
+    assert sorted(seen) == sorted(row[0] for row in old)
+
+
+def test_dashboard_aggregates(loaded):
+    summary = loaded.get_dashboard_aggregates(top_k=3)
+    errors = sum(row[2] >= 400 for row in ROWS)
+
+    assert summary['total_requests'] == len(ROWS)
+    assert summary['error_count'] == errors
+    assert summary['error_rate'] == pytest.approx(errors / len(ROWS) * 100)
+    assert summary['status_counts'].to_dict() == pd.Series([row[2] for row in ROWS]).value_counts().to_dict()
+    assert summary['unique_ips'] == 5
+    assert len(summary['top_ips']) == 3
+    assert summary['top_ips'].iloc[0] == summary['top_ips'].max()
+    top_404 = loaded.get_dashboard_aggregates(top_k=5)['top_404_ips']
+    assert top_404.sum() == sum(row[2] == 404 for row in ROWS)
+
+
+def test_statistics_and_request_rate(loaded):
+    stats = loaded.get_statistics()
+    assert stats['total_logs'] == len(ROWS)
+    assert stats['error_count'] == sum(row[3] == "ERROR" for row in ROWS)
+    assert stats['warning_count'] == sum(row[3] == "WARNING" for row in ROWS)
+    assert stats['info_count'] == sum(row[3] == "INFO" for row in ROWS)
+    assert stats['unique_ips'] == 5
+    assert pd.Timestamp(stats['earliest_log']) == pd.Timestamp(min(row[1] for row in ROWS))
+    assert pd.Timestamp(stats['latest_log']) == pd.Timestamp(max(row[1] for row in ROWS))
+
+    assert loaded.get_request_rate().total == len(ROWS)
+    day = DAYS[2].strftime("%Y-%m-%d")
+    assert loaded.get_request_rate(f"{day} 00:00:00", f"{day} 23:59:59").total == PER_DAY
+
+
+def test_partitions_and_retention(loaded):
+    partitions = loaded.get_partitions()
+    assert partitions['rows'].sum() == len(ROWS)
+
+    assert loaded.maintain_partitions(retention_days=5) == PER_DAY
+    assert loaded.get_statistics()['total_logs'] == 2 * PER_DAY
+    assert loaded.rebuild_rollups()
+
+
+def test_clear_all_logs(loaded):
+    loaded.record_ingest({'source_name': 'a.log', 'head_hash': b"h" * 32, 'tail_hash': b"t" * 32,
+                          'range_start': 0, 'range_end': 100, 'rows_parsed': 5, 'rows_inserted': 5})
+    assert loaded.clear_all_logs()
+    assert loaded.get_statistics().get('total_logs', 0) == 0
+    assert loaded.get_last_ingest(b"h" * 32) is None